@@ -0,0 +1,166 @@
+"""
+Dataset cache — typed, memory-mappable binary copy of a CSV dataset.
+
+The first load parses the CSV and writes `<csv>.cache/`: one .npy file per
+column (float32 for real-valued columns, the smallest fitting integer type
+for integer columns, fixed-width bytes for strings) plus a manifest. Later
+loads memory-map the columns and wrap them in a DataFrame without copying.
+
+The cache is invalidated by the source file's size, mtime and hash: a size
+change rebuilds it; an mtime change alone (e.g. the file was touched or
+re-copied) triggers a hash comparison, and the cache is kept if the content
+is unchanged.
+
+Writers take an exclusive lock and swap the new cache in by moving the old
+directory aside first, so concurrent writers never collide. A reader whose
+cache was replaced under it loads again from the new one.
+"""
+
+import os
+import json
+import fcntl
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_NAME = "manifest.json"
+CACHE_SUFFIX = ".cache"
+# Loads retried when a concurrent writer replaces the cache mid-read
+LOAD_ATTEMPTS = 3
+
+
+def cache_dir_for(csv_path: str) -> str:
+    return csv_path + CACHE_SUFFIX
+
+
+def load_dataset(csv_path: str) -> pd.DataFrame:
+    """Load `csv_path` through its binary cache, building or refreshing the cache if needed."""
+    cache_dir = cache_dir_for(csv_path)
+    for attempt in range(LOAD_ATTEMPTS):
+        manifest = _valid_manifest(csv_path, cache_dir)
+        if manifest is None:
+            df = pd.read_csv(csv_path)
+            manifest = write_cache(df, csv_path, cache_dir)
+            print(f"💾 Binary dataset cache written to {cache_dir}")
+        try:
+            return _open_columns(cache_dir, manifest)
+        except FileNotFoundError:
+            # Another process replaced the cache between reading its manifest and its columns
+            if attempt == LOAD_ATTEMPTS - 1:
+                raise
+
+
+def write_cache(df: pd.DataFrame, csv_path: str, cache_dir: str) -> dict:
+    """Write the typed columns of `df` and a manifest describing `csv_path`."""
+    with _write_lock(cache_dir):
+        # Another process may have written a cache of the same source while this one waited
+        manifest = _valid_manifest(csv_path, cache_dir)
+        if manifest is not None:
+            return manifest
+        return _write_columns(df, csv_path, cache_dir)
+
+
+def _write_columns(df: pd.DataFrame, csv_path: str, cache_dir: str) -> dict:
+    parent = os.path.dirname(os.path.abspath(cache_dir))
+    tmp_dir = tempfile.mkdtemp(prefix=".dataset-cache-", dir=parent)
+
+    dtypes = {}
+    for i, name in enumerate(df.columns):
+        values = _compact(df[name])
+        np.save(os.path.join(tmp_dir, f"{i:03d}.npy"), values)
+        dtypes[name] = values.dtype.str
+
+    manifest = {
+        **_source_identity(csv_path),
+        "source_sha1": _file_sha1(csv_path),
+        "rows": len(df),
+        "columns": list(df.columns),
+        "dtypes": dtypes,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Move the old cache aside before renaming the new one in: readers see either one, never a partial cache
+    old_dir = None
+    if os.path.exists(cache_dir):
+        old_dir = tempfile.mkdtemp(prefix=".dataset-cache-old-", dir=parent)
+        os.replace(cache_dir, os.path.join(old_dir, "cache"))
+    os.replace(tmp_dir, cache_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+@contextmanager
+def _write_lock(cache_dir: str):
+    """Exclusive advisory lock serializing cache writes across processes."""
+    parent = os.path.dirname(os.path.abspath(cache_dir))
+    with open(os.path.join(parent, f".{os.path.basename(cache_dir)}.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _valid_manifest(csv_path: str, cache_dir: str):
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    identity = _source_identity(csv_path)
+    if manifest.get("source_size") != identity["source_size"]:
+        return None
+    if manifest.get("source_mtime_ns") != identity["source_mtime_ns"]:
+        if manifest.get("source_sha1") != _file_sha1(csv_path):
+            return None
+        # Same content, new mtime — remember it so the next load skips the hash.
+        # Replaced, not rewritten in place: a concurrent reader must never see a truncated manifest.
+        manifest.update(identity)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            pass  # the cache was replaced meanwhile; the next load refreshes the new one
+    return manifest
+
+
+def _open_columns(cache_dir: str, manifest: dict) -> pd.DataFrame:
+    columns = {}
+    for i, name in enumerate(manifest["columns"]):
+        values = np.load(os.path.join(cache_dir, f"{i:03d}.npy"), mmap_mode="r")
+        if values.dtype.kind == "S":
+            values = np.char.decode(values, "utf-8").astype(object)
+        columns[name] = values
+    # copy=False keeps one block per column backed by the memory map
+    return pd.DataFrame(columns, copy=False)
+
+
+def _compact(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_float_dtype(series):
+        return series.to_numpy(dtype=np.float32)
+    if pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return pd.to_numeric(series.astype(np.int64), downcast="integer").to_numpy()
+    return np.char.encode(series.astype(str).to_numpy().astype(str), "utf-8")
+
+
+def _source_identity(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def _file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
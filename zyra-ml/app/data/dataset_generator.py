@@ -22,9 +22,44 @@ import numpy as np
 import pandas as pd
 import os
 
+from app.data.dataset_cache import load_dataset
+from app.utils.config import DATASET_CACHE_ENABLED
+
 DATASET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "machine_data.csv")
 
 
+# Gaussian noise added to the failure score, and the score above which a machine fails
+FAILURE_NOISE = 0.08
+FAILURE_THRESHOLD = 0.50
+
+
+def failure_score(
+    operating_hours,
+    temperature,
+    vibration,
+    pressure,
+    age_months,
+    maintenance_count,
+    load_percentage,
+    rpm,
+    humidity,
+    power_consumption,
+):
+    """Noise-free failure score: weighted combination of the sensor readings."""
+    return (
+        0.25 * (temperature - 40) / 80
+        + 0.20 * (operating_hours / 12000)
+        + 0.15 * (vibration / 8)
+        + 0.10 * (age_months / 120)
+        + 0.10 * (load_percentage / 100)
+        + 0.08 * (pressure / 200)
+        + 0.05 * (humidity / 95)
+        + 0.04 * (power_consumption / 2000)
+        + 0.03 * (rpm / 5000)
+        - 0.10 * (maintenance_count / 20)  # maintenance reduces failure
+    )
+
+
 def generate_dataset(n_samples: int = 5000, seed: int = 42) -> pd.DataFrame:
     """Generate a realistic synthetic machine failure dataset."""
     rng = np.random.RandomState(seed)
@@ -41,22 +76,22 @@ def generate_dataset(n_samples: int = 5000, seed: int = 42) -> pd.DataFrame:
     power_consumption = rng.uniform(100, 2000, n_samples)
 
     # ─── Failure logic (realistic weighted combination) ──────────────────
-    failure_score = (
-        0.25 * (temperature - 40) / 80
-        + 0.20 * (operating_hours / 12000)
-        + 0.15 * (vibration / 8)
-        + 0.10 * (age_months / 120)
-        + 0.10 * (load_percentage / 100)
-        + 0.08 * (pressure / 200)
-        + 0.05 * (humidity / 95)
-        + 0.04 * (power_consumption / 2000)
-        + 0.03 * (rpm / 5000)
-        - 0.10 * (maintenance_count / 20)  # maintenance reduces failure
+    score = failure_score(
+        operating_hours=operating_hours,
+        temperature=temperature,
+        vibration=vibration,
+        pressure=pressure,
+        age_months=age_months,
+        maintenance_count=maintenance_count,
+        load_percentage=load_percentage,
+        rpm=rpm,
+        humidity=humidity,
+        power_consumption=power_consumption,
     )
 
     # Add noise and threshold
-    failure_score += rng.normal(0, 0.08, n_samples)
-    failure = (failure_score > 0.50).astype(int)
+    score += rng.normal(0, FAILURE_NOISE, n_samples)
+    failure = (score > FAILURE_THRESHOLD).astype(int)
 
     df = pd.DataFrame({
         "operating_hours": np.round(operating_hours, 1),
@@ -79,7 +114,7 @@ def load_or_generate_dataset() -> pd.DataFrame:
     """Load dataset from disk if it exists, otherwise generate and save it."""
     if os.path.exists(DATASET_PATH):
         print(f"📂 Loading existing dataset from {DATASET_PATH}")
-        return pd.read_csv(DATASET_PATH)
+        return read_csv_dataset(DATASET_PATH)
 
     print("🔄 Generating synthetic machine dataset (5000 samples)...")
     df = generate_dataset()
@@ -87,4 +122,11 @@ def load_or_generate_dataset() -> pd.DataFrame:
     os.makedirs(os.path.dirname(DATASET_PATH), exist_ok=True)
     df.to_csv(DATASET_PATH, index=False)
     print(f"💾 Dataset saved to {DATASET_PATH}")
-    return df
+    return read_csv_dataset(DATASET_PATH) if DATASET_CACHE_ENABLED else df
+
+
+def read_csv_dataset(csv_path: str) -> pd.DataFrame:
+    """Read a dataset CSV, through the memory-mapped binary cache when enabled."""
+    if DATASET_CACHE_ENABLED:
+        return load_dataset(csv_path)
+    return pd.read_csv(csv_path)
@@ -0,0 +1,238 @@
+"""
+Sharded dataset generator — produces large synthetic datasets (tens of
+millions of rows) across a process pool.
+
+- The dataset is cut into fixed-size shards; shard i draws from its own
+  generator, spawned from one SeedSequence, so the output depends only on
+  (seed, rows, shard_rows) and never on the number of workers
+- Each worker generates one shard at a time and writes it straight to disk,
+  so memory is bounded by `workers × shard_rows`
+- Formats: CSV (part-00000.csv, ...) and/or columnar binary — one .npy file
+  per column per shard (part-00000/<column>.npy), which can be memory-mapped
+- With `cycles`, each shard holds whole per-equipment sequences
+  (equipment_id, cycle) with wear that builds up over time, so the rolling
+  trend features of the training pipeline can be exercised
+
+A manifest.json describes the shards, columns and dtypes.
+
+    python -m app.data.sharded_generator --rows 50000000 --out data/large --workers 8 [--cycles 100]
+"""
+
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.data.dataset_generator import failure_score, FAILURE_NOISE, FAILURE_THRESHOLD
+
+MANIFEST_NAME = "manifest.json"
+FORMATS = ("csv", "npy")
+
+COLUMN_DTYPES = {
+    "operating_hours": "float32",
+    "temperature": "float32",
+    "vibration": "float32",
+    "pressure": "float32",
+    "age_months": "int16",
+    "maintenance_count": "int16",
+    "load_percentage": "float32",
+    "rpm": "float32",
+    "humidity": "float32",
+    "power_consumption": "float32",
+    "failure": "int8",
+}
+SEQUENCE_DTYPES = {"equipment_id": "S16", "cycle": "int32"}
+
+# Decimal places written for each sensor (same rounding as generate_dataset)
+_ROUNDING = {"vibration": 2}
+# Operating hours added per cycle in sequence mode
+_HOURS_PER_CYCLE = 24.0
+
+
+def generate_shards(
+    out_dir: str,
+    rows: int,
+    shard_rows: int = 1_000_000,
+    workers: int = None,
+    seed: int = 42,
+    formats: tuple = FORMATS,
+    cycles: int = None,
+) -> dict:
+    """Generate `rows` rows into `out_dir` and return the manifest."""
+    unknown = set(formats) - set(FORMATS)
+    if unknown or not formats:
+        raise ValueError(f"formats must be a subset of {FORMATS}, got {formats}")
+    if cycles:
+        # Shards hold whole equipment sequences
+        shard_rows = max(cycles, shard_rows // cycles * cycles)
+        rows = -(-rows // cycles) * cycles
+
+    n_shards = -(-rows // shard_rows)
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    tasks = [
+        (out_dir, index, min(shard_rows, rows - index * shard_rows), seeds[index], tuple(formats), cycles)
+        for index in range(n_shards)
+    ]
+
+    os.makedirs(out_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        shards = list(pool.map(_write_shard, tasks))
+
+    dtypes = {**(SEQUENCE_DTYPES if cycles else {}), **COLUMN_DTYPES}
+    manifest = {
+        "rows": rows,
+        "shard_rows": shard_rows,
+        "seed": seed,
+        "cycles": cycles,
+        "formats": list(formats),
+        "columns": list(dtypes),
+        "dtypes": dtypes,
+        "shards": shards,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(out_dir: str) -> dict:
+    with open(os.path.join(out_dir, MANIFEST_NAME), "r") as f:
+        return json.load(f)
+
+
+def csv_parts(out_dir: str) -> list:
+    """Paths of the CSV shards of a generated dataset, in order."""
+    manifest = read_manifest(out_dir)
+    if "csv" not in manifest["formats"]:
+        raise ValueError(f"{out_dir} was generated without CSV output")
+    return [os.path.join(out_dir, shard["csv"]) for shard in manifest["shards"]]
+
+
+def load_shard_columns(out_dir: str, shard: dict, columns: list = None) -> dict:
+    """Memory-map the .npy columns of one shard."""
+    directory = os.path.join(out_dir, shard["npy"])
+    names = columns or read_manifest(out_dir)["columns"]
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in names}
+
+
+def _write_shard(task: tuple) -> dict:
+    out_dir, index, n_rows, seed_seq, formats, cycles = task
+    rng = np.random.default_rng(seed_seq)
+    columns = _sequence_columns(rng, n_rows, cycles, index) if cycles else _independent_columns(rng, n_rows)
+
+    name = f"part-{index:05d}"
+    shard = {"index": index, "rows": n_rows}
+    if "npy" in formats:
+        directory = os.path.join(out_dir, name)
+        os.makedirs(directory, exist_ok=True)
+        for column, values in columns.items():
+            np.save(os.path.join(directory, f"{column}.npy"), values)
+        shard["npy"] = name
+    if "csv" in formats:
+        frame = pd.DataFrame({
+            column: np.char.decode(values) if values.dtype.kind == "S" else values
+            for column, values in columns.items()
+        })
+        frame.to_csv(os.path.join(out_dir, f"{name}.csv"), index=False, float_format="%.6g")
+        shard["csv"] = f"{name}.csv"
+    return shard
+
+
+def _independent_columns(rng, n: int) -> dict:
+    """Independent readings with the same distributions as generate_dataset."""
+    values = {
+        "operating_hours": rng.uniform(0, 12000, n),
+        "temperature": rng.uniform(40, 120, n),
+        "vibration": rng.uniform(0, 8, n),
+        "pressure": rng.uniform(50, 200, n),
+        "age_months": rng.integers(1, 121, n),
+        "maintenance_count": rng.integers(0, 21, n),
+        "load_percentage": rng.uniform(10, 100, n),
+        "rpm": rng.uniform(500, 5000, n),
+        "humidity": rng.uniform(20, 95, n),
+        "power_consumption": rng.uniform(100, 2000, n),
+    }
+    return _finish(rng, values, n)
+
+
+def _sequence_columns(rng, n: int, cycles: int, shard_index: int) -> dict:
+    """
+    Per-equipment sequences of `cycles` readings.
+
+    Each machine has fixed characteristics (age, rpm, humidity, ...) and a
+    wear rate; temperature, vibration and power drift upward with wear, so
+    failures cluster late in a sequence and trends carry signal.
+    """
+    n_equipment = n // cycles
+    t = np.tile(np.arange(cycles), n_equipment)
+
+    def per_machine(values):
+        return np.repeat(values, cycles)
+
+    wear = per_machine(rng.uniform(0.2, 1.0, n_equipment)) * t / max(cycles - 1, 1)
+    values = {
+        "operating_hours": np.minimum(per_machine(rng.uniform(0, 8000, n_equipment)) + _HOURS_PER_CYCLE * t, 12000),
+        "temperature": np.clip(per_machine(rng.uniform(40, 90, n_equipment)) + 30 * wear + rng.normal(0, 2, n), 40, 120),
+        "vibration": np.clip(per_machine(rng.uniform(0, 4, n_equipment)) + 4 * wear + rng.normal(0, 0.2, n), 0, 8),
+        "pressure": np.clip(per_machine(rng.uniform(50, 200, n_equipment)) + rng.normal(0, 3, n), 50, 200),
+        "age_months": per_machine(rng.integers(1, 121, n_equipment)),
+        "maintenance_count": per_machine(rng.integers(0, 21, n_equipment)),
+        "load_percentage": np.clip(per_machine(rng.uniform(10, 100, n_equipment)) + rng.normal(0, 5, n), 10, 100),
+        "rpm": np.clip(per_machine(rng.uniform(500, 5000, n_equipment)) + rng.normal(0, 50, n), 500, 5000),
+        "humidity": per_machine(rng.uniform(20, 95, n_equipment)),
+        "power_consumption": np.clip(
+            per_machine(rng.uniform(100, 1700, n_equipment)) * (1 + 0.2 * wear) + rng.normal(0, 20, n), 100, 2000
+        ),
+    }
+    columns = _finish(rng, values, n)
+
+    ids = np.char.add(f"EQ-{shard_index:05d}-", np.char.zfill(np.arange(n_equipment).astype(str), 6))
+    return {
+        "equipment_id": np.repeat(ids.astype(SEQUENCE_DTYPES["equipment_id"]), cycles),
+        "cycle": t.astype(SEQUENCE_DTYPES["cycle"]),
+        **columns,
+    }
+
+
+def _finish(rng, values: dict, n: int) -> dict:
+    """Label failures, round to sensor precision and cast to the compact dtypes."""
+    score = failure_score(**values) + rng.normal(0, FAILURE_NOISE, n)
+    values["failure"] = score > FAILURE_THRESHOLD
+    columns = {}
+    for name, dtype in COLUMN_DTYPES.items():
+        column = values[name]
+        if np.dtype(dtype).kind == "f":
+            column = np.round(column, _ROUNDING.get(name, 1))
+        columns[name] = column.astype(dtype)
+    return columns
+
+
+# Run standalone
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a large sharded synthetic dataset")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--shard-rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--formats", default="csv,npy", help="comma-separated subset of csv,npy")
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        default=None,
+        help="emit per-equipment sequences of this many readings (adds equipment_id, cycle)",
+    )
+    args = parser.parse_args()
+
+    manifest = generate_shards(
+        args.out,
+        rows=args.rows,
+        shard_rows=args.shard_rows,
+        workers=args.workers,
+        seed=args.seed,
+        formats=tuple(f.strip() for f in args.formats.split(",") if f.strip()),
+        cycles=args.cycles,
+    )
+    print(f"💾 {manifest['rows']} rows in {len(manifest['shards'])} shards written to {args.out}")
@@ -0,0 +1,250 @@
+"""
+Chunked Training
+─────────────────
+Out-of-core variant of training_pipeline.train_model for datasets that do
+not fit in memory. The CSV is streamed three times in chunks of `chunk_size`
+rows; nothing larger than one chunk (plus the forest) is ever held.
+
+1. Statistics — StandardScaler.partial_fit, class counts (for global
+   "balanced" class weights), row count and a fixed-size reservoir sample
+   that provides the drift-histogram bin edges
+2. Training — rows are split train/test by per-class counters (an exact
+   stratified 20 % test split, independent of chunk boundaries). Training
+   rows are scaled into a bounded buffer and every buffer grows a batch of
+   new trees on a warm-started forest, so the forest ends with the usual
+   number of trees, each fit on at most `chunk_size` rows drawn from its
+   part of the file. Histogram counts are accumulated on the way.
+3. Evaluation — test rows are scored by the finished forest; confusion
+   counts and per-class probability histograms give accuracy, weighted F1
+   and ROC AUC without keeping the test set.
+"""
+
+import os
+import math
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import RandomForestClassifier
+
+from app.data.dataset_generator import DATASET_PATH, load_or_generate_dataset
+from app.data.sharded_generator import csv_parts
+from app.ml.training_pipeline import (
+    FEATURE_COLUMNS,
+    TARGET_COLUMN,
+    FOREST_PARAMS,
+    build_reference_histograms,
+    save_artifacts,
+)
+from app.utils.config import TRAINING_CHUNK_SIZE
+
+TEST_FRACTION = 0.2
+# Rows kept for estimating histogram quantile edges
+RESERVOIR_SIZE = 100_000
+# Probability bins for the streaming ROC AUC
+AUC_BINS = 1000
+
+
+class _StratifiedSplitter:
+    """Streaming train/test assignment: exactly `fraction` of every class goes to test."""
+
+    def __init__(self, fraction: float, seed: int):
+        self.fraction = fraction
+        self._seen = {}
+        self._rng = np.random.default_rng(seed)
+        self._offsets = {}
+
+    def test_mask(self, y: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(y), dtype=bool)
+        for label in np.unique(y):
+            rows = np.flatnonzero(y == label)
+            if label not in self._offsets:
+                self._offsets[label] = self._rng.random()
+            start = self._seen.get(label, 0)
+            k = np.arange(start, start + len(rows)) + self._offsets[label]
+            # Row k is a test row when it crosses the next multiple of 1 / fraction
+            mask[rows] = np.floor((k + 1) * self.fraction) > np.floor(k * self.fraction)
+            self._seen[label] = start + len(rows)
+        return mask
+
+
+def train_model_chunked(
+    data_path: str = None,
+    chunk_size: int = TRAINING_CHUNK_SIZE,
+    version: str = None,
+    model_key: str = None,
+) -> dict:
+    """
+    Chunked training pipeline. Returns evaluation metrics.
+
+    `data_path` is a CSV file or a directory written by sharded_generator
+    (its CSV parts are read in order).
+    """
+    if data_path is None:
+        load_or_generate_dataset()  # generates the default dataset if it is missing
+        data_path = DATASET_PATH
+    paths = csv_parts(data_path) if os.path.isdir(data_path) else [data_path]
+    feature_columns = list(FEATURE_COLUMNS)
+
+    def chunks():
+        for path in paths:
+            yield from pd.read_csv(path, usecols=feature_columns + [TARGET_COLUMN], chunksize=chunk_size)
+
+    # ─── 1. Statistics pass ──────────────────────────────────────────
+    scaler = StandardScaler()
+    class_counts = {}
+    n_rows, n_chunks = 0, 0
+    rng = np.random.default_rng(FOREST_PARAMS["random_state"])
+    reservoir = np.empty((RESERVOIR_SIZE, len(feature_columns)))
+
+    for df in chunks():
+        X = df[feature_columns].to_numpy(dtype=float)
+        y = df[TARGET_COLUMN].to_numpy()
+        scaler.partial_fit(X)
+        for label, count in zip(*np.unique(y, return_counts=True)):
+            class_counts[int(label)] = class_counts.get(int(label), 0) + int(count)
+        _reservoir_add(reservoir, X, n_rows, rng)
+        n_rows += len(X)
+        n_chunks += 1
+
+    if len(class_counts) < 2:
+        raise ValueError("Training data must contain both classes")
+    print(f"✅ Dataset scanned: {n_rows} rows in chunks of {chunk_size}")
+    print(f"   Class distribution: {class_counts}")
+
+    # Same weights as class_weight="balanced", computed over the whole dataset
+    class_weight = {label: n_rows / (len(class_counts) * count) for label, count in class_counts.items()}
+    edges = {
+        name: np.asarray(hist["edges"])
+        for name, hist in build_reference_histograms(
+            reservoir[: min(n_rows, len(reservoir))], feature_columns
+        )["features"].items()
+    }
+
+    # ─── 2. Training pass ────────────────────────────────────────────
+    n_trees = FOREST_PARAMS["n_estimators"]
+    # More chunks than trees: each buffer draws a subsample from several chunks
+    chunks_per_step = max(1, math.ceil(n_chunks / n_trees))
+    keep_fraction = 1 / chunks_per_step
+
+    model = RandomForestClassifier(**{**FOREST_PARAMS, "n_estimators": 0}, class_weight=class_weight, warm_start=True)
+    splitter = _StratifiedSplitter(TEST_FRACTION, seed=FOREST_PARAMS["random_state"])
+    counts = {name: np.zeros(len(edges[name]) + 1, dtype=np.int64) for name in feature_columns}
+    buffer_X, buffer_y = [], []
+    batches, chunks_done, n_train = 0, 0, 0
+
+    def grow():
+        # Trees so far stay proportional to the share of the file consumed
+        nonlocal batches, buffer_X, buffer_y
+        if not buffer_y:
+            return
+        y_buffer = np.concatenate(buffer_y)
+        target = max(1, n_trees * chunks_done // n_chunks)
+        if len(np.unique(y_buffer)) < 2 or target <= len(getattr(model, "estimators_", [])):
+            return  # a tree batch needs both classes — keep filling the buffer
+        model.set_params(n_estimators=target)
+        model.fit(np.concatenate(buffer_X), y_buffer)
+        batches += 1
+        buffer_X, buffer_y = [], []
+
+    for df in chunks():
+        X = df[feature_columns].to_numpy(dtype=float)
+        y = df[TARGET_COLUMN].to_numpy()
+        for i, name in enumerate(feature_columns):
+            counts[name] += np.bincount(np.searchsorted(edges[name], X[:, i], side="right"), minlength=len(counts[name]))
+
+        train = ~splitter.test_mask(y)
+        n_train += int(train.sum())
+        if keep_fraction < 1:
+            train &= rng.random(len(y)) < keep_fraction
+        if train.any():
+            buffer_X.append(scaler.transform(X[train]))
+            buffer_y.append(y[train])
+
+        chunks_done += 1
+        if chunks_done % chunks_per_step == 0 or chunks_done == n_chunks:
+            grow()
+    if not hasattr(model, "estimators_"):
+        raise ValueError("Training split never contained both classes")
+    print(f"✅ Model trained: RandomForestClassifier ({len(model.estimators_)} estimators, {batches} tree batches)")
+
+    # ─── 3. Evaluation pass ──────────────────────────────────────────
+    splitter = _StratifiedSplitter(TEST_FRACTION, seed=FOREST_PARAMS["random_state"])
+    confusion = np.zeros((2, 2), dtype=np.int64)
+    proba_hist = np.zeros((2, AUC_BINS), dtype=np.int64)
+
+    for df in chunks():
+        X = df[feature_columns].to_numpy(dtype=float)
+        y = df[TARGET_COLUMN].to_numpy().astype(int)
+        test = splitter.test_mask(y)
+        if not test.any():
+            continue
+        y_test = y[test]
+        proba = model.predict_proba(scaler.transform(X[test]))[:, 1]
+        y_pred = (proba > 0.5).astype(int)
+        np.add.at(confusion, (y_test, y_pred), 1)
+        bins = np.minimum((proba * AUC_BINS).astype(int), AUC_BINS - 1)
+        np.add.at(proba_hist, (y_test, bins), 1)
+
+    n_test = int(confusion.sum())
+    feature_importance = {
+        name: round(float(imp), 4)
+        for name, imp in sorted(zip(feature_columns, model.feature_importances_), key=lambda x: x[1], reverse=True)
+    }
+    metrics = {
+        "accuracy": round(float(np.trace(confusion) / n_test), 4),
+        "f1_score": round(_weighted_f1(confusion), 4),
+        "roc_auc": round(_histogram_auc(proba_hist), 4),
+        "train_samples": n_train,
+        "test_samples": n_test,
+        "feature_importance": feature_importance,
+        "training_mode": "chunked",
+        "chunk_size": chunk_size,
+    }
+
+    print(f"   Accuracy : {metrics['accuracy']}")
+    print(f"   F1 Score : {metrics['f1_score']}")
+    print(f"   ROC AUC  : {metrics['roc_auc']}")
+
+    reference_histograms = {
+        "samples": n_rows,
+        "features": {
+            name: {"edges": [round(float(e), 6) for e in edges[name]], "counts": counts[name].tolist()}
+            for name in feature_columns
+        },
+    }
+    save_artifacts(model, scaler, metrics, feature_columns, reference_histograms, version, model_key=model_key)
+    return metrics
+
+
+def _reservoir_add(reservoir: np.ndarray, X: np.ndarray, seen: int, rng):
+    """Algorithm R over a chunk: every row seen so far is kept with equal probability."""
+    size = len(reservoir)
+    index = seen + np.arange(len(X))
+    fill = index < size
+    reservoir[index[fill]] = X[fill]
+    rest = np.flatnonzero(~fill)
+    if len(rest):
+        slots = rng.integers(0, index[rest] + 1)
+        keep = slots < size
+        reservoir[slots[keep]] = X[rest[keep]]
+
+
+def _weighted_f1(confusion: np.ndarray) -> float:
+    """F1 per class weighted by support (f1_score(average="weighted"))."""
+    total, f1 = confusion.sum(), 0.0
+    for label in range(len(confusion)):
+        tp = confusion[label, label]
+        predicted, actual = confusion[:, label].sum(), confusion[label].sum()
+        if tp:
+            precision, recall = tp / predicted, tp / actual
+            f1 += actual / total * 2 * precision * recall / (precision + recall)
+    return float(f1)
+
+
+def _histogram_auc(proba_hist: np.ndarray) -> float:
+    """ROC AUC from per-class probability histograms (ties within a bin count half)."""
+    negatives, positives = proba_hist[0].astype(float), proba_hist[1].astype(float)
+    negatives_below = np.concatenate([[0.0], np.cumsum(negatives)[:-1]])
+    pairs = positives.sum() * negatives.sum()
+    return float(np.sum(positives * (negatives_below + 0.5 * negatives)) / pairs) if pairs else 0.0
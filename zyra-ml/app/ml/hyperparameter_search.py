@@ -0,0 +1,255 @@
+"""
+Hyperparameter Search
+──────────────────────
+Scores candidate RandomForestClassifier configurations on model quality
+and serving cost together, since depth and tree count drive both /predict
+latency and SHAP time.
+
+1. The dataset is prepared once (same scaler and 80/20 split as
+   train_model) and written as float32 .npy files that every worker
+   memory-maps, so all candidates read one shared copy instead of a
+   pickled dataset per process
+2. Candidates are fitted in parallel across a process pool, one core each
+   (n_jobs=1), and measured for ROC AUC, F1, single-row and batch
+   inference latency (with the configured INFERENCE_BACKEND), single-row
+   SHAP time and pickled model size
+3. The Pareto front over those objectives is written with the full results
+4. `--promote <id>` retrains a chosen candidate through train_model and
+   saves it to the artifacts (or to artifacts/versions/<version>/)
+
+Latency is measured inside the workers, so it is inflated when every core
+is busy fitting; use fewer workers than cores for cleaner timings.
+
+    python -m app.ml.hyperparameter_search [--candidates 24] [--workers 4]
+    python -m app.ml.hyperparameter_search --promote 7 [--version v3]
+"""
+
+import os
+import json
+import time
+import pickle
+import random
+import argparse
+import itertools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score, roc_auc_score
+
+from app.ml.training_pipeline import FOREST_PARAMS, MODEL_DIR, prepare_training_data, train_model
+from app.models.compiled_forest import CompiledForest
+from app.utils.config import INFERENCE_BACKEND
+
+RESULTS_PATH = os.path.join(MODEL_DIR, "search", "results.json")
+
+# Values tried for each tuned parameter; the current FOREST_PARAMS are always candidate 0
+SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200, 300],
+    "max_depth": [6, 10, 15, None],
+    "min_samples_leaf": [1, 2, 5],
+    "max_features": ["sqrt", 0.5],
+}
+
+# (metric, direction) pairs the Pareto front is computed over
+OBJECTIVES = [
+    ("roc_auc", "max"),
+    ("f1_score", "max"),
+    ("single_row_ms", "min"),
+    ("batch_ms", "min"),
+    ("shap_ms", "min"),
+    ("model_mb", "min"),
+]
+
+BATCH_ROWS = 256
+LATENCY_REPEATS = 50
+SHAP_REPEATS = 5
+
+# Worker-side views of the shared dataset, set by _init_worker
+_shared = {}
+
+
+def run_search(
+    data_path: str = None,
+    use_trend_features: bool = False,
+    max_candidates: int = None,
+    workers: int = None,
+    seed: int = 42,
+    out_path: str = RESULTS_PATH,
+) -> dict:
+    """Evaluate the candidates, write the results and Pareto front to `out_path` and return them."""
+    candidates = candidate_params(max_candidates, seed)
+    data = prepare_training_data(use_trend_features, data_path)
+
+    with tempfile.TemporaryDirectory(prefix="zyra-search-") as shared_dir:
+        for name in ("X_train", "X_test", "y_train", "y_test"):
+            values = data[name].astype(np.float32) if name.startswith("X") else data[name]
+            np.save(os.path.join(shared_dir, f"{name}.npy"), values)
+        del data
+
+        workers = min(workers or os.cpu_count(), len(candidates))
+        print(f"🔎 Evaluating {len(candidates)} candidates on {workers} worker(s)")
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(shared_dir,)
+        ) as pool:
+            results = []
+            for result in pool.map(_evaluate, enumerate(candidates)):
+                results.append(result)
+                print(
+                    f"   #{result['id']:<3} AUC {result['roc_auc']:.4f}  F1 {result['f1_score']:.4f}  "
+                    f"1-row {result['single_row_ms']:.2f} ms  SHAP {result['shap_ms']:.1f} ms  "
+                    f"{result['model_mb']:.1f} MB  {result['params']}"
+                )
+
+    front = pareto_front(results)
+    report = {
+        "backend": INFERENCE_BACKEND,
+        "objectives": dict(OBJECTIVES),
+        "pareto_front": [r["id"] for r in front],
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✅ Pareto front: {len(front)} of {len(results)} candidates")
+    for r in sorted(front, key=lambda r: r["single_row_ms"]):
+        print(f"   #{r['id']:<3} AUC {r['roc_auc']:.4f}  1-row {r['single_row_ms']:.2f} ms  {r['params']}")
+    print(f"💾 Search results saved to {out_path}")
+    return report
+
+
+def candidate_params(max_candidates: int = None, seed: int = 42) -> list:
+    """The current FOREST_PARAMS followed by the search grid (a seeded sample of it if capped)."""
+    baseline = {name: FOREST_PARAMS[name] for name in SEARCH_SPACE}
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    grid = [params for params in grid if params != baseline]
+    if max_candidates is not None and max_candidates - 1 < len(grid):
+        grid = random.Random(seed).sample(grid, max(0, max_candidates - 1))
+    return [baseline] + grid
+
+
+def pareto_front(results: list) -> list:
+    """Results not dominated on every objective by another result."""
+
+    def oriented(result):
+        return [result[name] if direction == "max" else -result[name] for name, direction in OBJECTIVES]
+
+    scores = [oriented(r) for r in results]
+
+    def dominates(a, b):
+        return all(x >= y for x, y in zip(a, b)) and any(x > y for x, y in zip(a, b))
+
+    return [r for r, s in zip(results, scores) if not any(dominates(other, s) for other in scores)]
+
+
+def promote(candidate_id: int, results_path: str = RESULTS_PATH, version: str = None, **train_kwargs) -> dict:
+    """Retrain candidate `candidate_id` of a search with train_model and save it to the artifacts."""
+    with open(results_path, "r") as f:
+        report = json.load(f)
+    matches = [r for r in report["results"] if r["id"] == candidate_id]
+    if not matches:
+        raise ValueError(f"No candidate #{candidate_id} in {results_path}")
+    if candidate_id not in report["pareto_front"]:
+        print(f"⚠️ Candidate #{candidate_id} is not on the Pareto front")
+    print(f"🚀 Promoting candidate #{candidate_id}: {matches[0]['params']}")
+    return train_model(version=version, model_params=matches[0]["params"], **train_kwargs)
+
+
+def _init_worker(shared_dir: str):
+    for name in ("X_train", "X_test", "y_train", "y_test"):
+        _shared[name] = np.load(os.path.join(shared_dir, f"{name}.npy"), mmap_mode="r")
+
+
+def _evaluate(task: tuple) -> dict:
+    candidate_id, params = task
+    X_train, X_test = _shared["X_train"], _shared["X_test"]
+    y_train, y_test = _shared["y_train"], _shared["y_test"]
+
+    start = time.perf_counter()
+    model = RandomForestClassifier(**{**FOREST_PARAMS, **params, "n_jobs": 1}, class_weight="balanced")
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    y_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_proba > 0.5).astype(int)
+    predict = _serving_predict(model)
+
+    return {
+        "id": candidate_id,
+        "params": params,
+        "roc_auc": round(float(roc_auc_score(y_test, y_proba)), 4),
+        "f1_score": round(float(f1_score(y_test, y_pred, average="weighted")), 4),
+        "single_row_ms": _median_ms(lambda: predict(X_test[:1]), LATENCY_REPEATS),
+        "batch_ms": _median_ms(lambda: predict(X_test[:BATCH_ROWS]), LATENCY_REPEATS // 5),
+        "shap_ms": _shap_ms(model, X_test[:1]),
+        "model_mb": round(len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 2**20, 2),
+        "max_depth_reached": max(tree.tree_.max_depth for tree in model.estimators_),
+        "fit_seconds": round(fit_seconds, 2),
+    }
+
+
+def _serving_predict(model):
+    """predict_proba as the serving path runs it for the configured backend."""
+    if INFERENCE_BACKEND == "compiled":
+        # The scaler is already applied to the shared split; compile with an identity transform
+        n_features = _shared["X_test"].shape[1]
+        compiled = CompiledForest.from_sklearn(model, _IdentityScaler(n_features))
+        return compiled.predict_proba
+    return model.predict_proba
+
+
+class _IdentityScaler:
+    def __init__(self, n_features: int):
+        self.mean_ = np.zeros(n_features)
+        self.scale_ = np.ones(n_features)
+
+
+def _shap_ms(model, row: np.ndarray) -> float:
+    import shap
+
+    explainer = shap.TreeExplainer(model)
+    return _median_ms(lambda: explainer.shap_values(row), SHAP_REPEATS)
+
+
+def _median_ms(fn, repeats: int) -> float:
+    fn()  # warm-up
+    samples = []
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(float(np.median(samples)) * 1e3, 3)
+
+
+# Run standalone
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency-aware hyperparameter search for the failure model")
+    parser.add_argument("--data", help="CSV or sharded_generator output directory (default: machine_data.csv)")
+    parser.add_argument("--trend-features", action="store_true", help="search with rolling trend features")
+    parser.add_argument("--candidates", type=int, help="evaluate the baseline plus a seeded sample of the grid")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--results", default=RESULTS_PATH, help="search results JSON (written, or read by --promote)")
+    parser.add_argument("--promote", type=int, metavar="ID", help="retrain candidate ID from --results and save it")
+    parser.add_argument("--version", help="with --promote: save to artifacts/versions/<version>/ instead")
+    args = parser.parse_args()
+
+    if args.promote is not None:
+        promote(
+            args.promote,
+            args.results,
+            version=args.version,
+            use_trend_features=args.trend_features,
+            data_path=args.data,
+        )
+    else:
+        run_search(
+            data_path=args.data,
+            use_trend_features=args.trend_features,
+            max_candidates=args.candidates,
+            workers=args.workers,
+            seed=args.seed,
+            out_path=args.results,
+        )
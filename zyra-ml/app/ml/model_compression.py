@@ -0,0 +1,238 @@
+"""
+Model Compression
+──────────────────
+Post-training compression of the random forest into a compact serving model.
+The smaller model has fewer trees and shallower trees, and is chosen so
+that it loses at most `max_auc_loss` ROC AUC.
+
+1. Candidates are scored on out-of-bag predictions over the training set.
+   Each tree is scored only on the rows its bootstrap sample left out.
+   The test split never influences the choice, so the accuracy loss the
+   report gives for it is an honest estimate.
+2. For each depth cap in DEPTH_CAPS, every tree of the fitted forest is
+   truncated at that depth. Cut nodes become leaves holding the class
+   distribution sklearn already stores for internal nodes, so nothing is
+   refitted.
+3. The search finds the smallest k whose out-of-bag AUC is within
+   `max_auc_loss` of the full forest's. The trees of a random forest are
+   independent draws, so the first k trees form a k-tree forest. Picking
+   trees one by one for the best AUC overfits the selection data instead.
+4. The candidate with the fewest nodes wins. Traversal, SHAP and memory
+   cost all scale with node count.
+5. The winner is checked once on the test split. If it loses more than
+   `max_auc_loss` ROC AUC there, it is dropped: no compact model is saved
+   and the report says why. A larger candidate is not tried instead, which
+   would let the test split pick the model.
+
+The compact model is an ordinary RandomForestClassifier, so the scaler, the
+compiled backend, the memory-mapped arrays and the SHAP explainer all work
+unchanged. It is saved next to rf_model.pkl as rf_model_compact.pkl and
+served with SERVE_COMPACT_MODEL=true. compression_report.json compares
+both models: size, load time, predict latency, SHAP latency and accuracy.
+
+    python -m app.ml.training_pipeline --compress [--max-auc-loss 0.005]
+"""
+
+import os
+import copy
+import time
+import tempfile
+
+import joblib
+import numpy as np
+from sklearn.ensemble._forest import _generate_unsampled_indices, _get_n_samples_bootstrap
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.tree._tree import TREE_LEAF, TREE_UNDEFINED, Tree
+
+from app.models.compiled_forest import CompiledForest
+from app.utils.config import COMPRESSION_MAX_AUC_LOSS, INFERENCE_BACKEND
+
+COMPACT_MODEL_FILE = "rf_model_compact.pkl"
+COMPRESSION_REPORT_FILE = "compression_report.json"
+
+# Depth caps tried (None keeps the trees' full depth)
+DEPTH_CAPS = (None, 12, 10, 8, 6)
+
+BATCH_ROWS = 256
+LATENCY_REPEATS = 50
+LOAD_REPEATS = 3
+SHAP_REPEATS = 5
+
+
+def compress_forest(
+    model,
+    scaler,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    max_auc_loss: float = COMPRESSION_MAX_AUC_LOSS,
+):
+    """
+    Select the smallest truncated tree subset of `model` within `max_auc_loss`
+    of its out-of-bag ROC AUC. Returns (compact model, report); the report
+    compares the two models on the test split. The compact model is None
+    when its test-split ROC AUC loss exceeds `max_auc_loss`.
+    """
+    if not model.bootstrap:
+        raise ValueError("Compression selects trees by out-of-bag AUC and needs a forest trained with bootstrap=True")
+
+    # The rows each tree did not see — the same helpers sklearn's own oob_score_ uses
+    n_samples = X_train.shape[0]
+    n_bootstrap = _get_n_samples_bootstrap(n_samples, model.max_samples)
+    oob_rows = [_generate_unsampled_indices(tree.random_state, n_samples, n_bootstrap) for tree in model.estimators_]
+
+    full_auc = oob_auc_curve(model.estimators_, oob_rows, X_train, y_train)[-1]
+    target = full_auc - max_auc_loss
+    print(f"   out-of-bag AUC of the full forest: {full_auc:.4f}")
+
+    best = None
+    for depth in DEPTH_CAPS:
+        trees = [truncate_tree(tree, depth) for tree in model.estimators_]
+        curve = oob_auc_curve(trees, oob_rows, X_train, y_train)
+        reached = curve >= target
+        k = int(np.argmax(reached)) + 1 if reached.any() else len(trees)
+        n_nodes = sum(tree.tree_.node_count for tree in trees[:k])
+        print(
+            f"   depth {depth or 'full':>4}: {k:>3} trees, {n_nodes:>7} nodes, "
+            f"out-of-bag AUC {curve[k - 1]:.4f}{'' if reached.any() else ' (target not reached)'}"
+        )
+        if reached.any() and (best is None or n_nodes < best[0]):
+            best = (n_nodes, depth, trees[:k])
+
+    if best is None:
+        # Not even the untruncated forest reaches the target (max_auc_loss < 0); keep it whole
+        best = (sum(t.tree_.node_count for t in model.estimators_), None, list(model.estimators_))
+    _, depth, trees = best
+
+    compact = copy.copy(model)
+    compact.estimators_ = trees
+    compact.n_estimators = len(trees)
+    if depth is not None:
+        compact.max_depth = min(depth, model.max_depth or depth)
+
+    report = {
+        "max_auc_loss": max_auc_loss,
+        "depth_cap": depth,
+        "oob_roc_auc": round(float(full_auc), 4),
+        "test_samples": int(len(y_test)),
+        "inference_backend": INFERENCE_BACKEND,
+        "original": measure_model(model, scaler, X_test, y_test),
+        "compact": measure_model(compact, scaler, X_test, y_test),
+    }
+    report["roc_auc_loss"] = round(report["original"]["roc_auc"] - report["compact"]["roc_auc"], 4)
+    report["accepted"] = report["roc_auc_loss"] <= max_auc_loss
+    if not report["accepted"]:
+        report["rejected_reason"] = (
+            f"test-split ROC AUC loss {report['roc_auc_loss']} exceeds max_auc_loss {max_auc_loss}"
+        )
+        print(f"⚠️  Compact model discarded: {report['rejected_reason']}")
+        return None, report
+    return compact, report
+
+
+def truncate_tree(estimator, max_depth: int = None):
+    """Copy of a fitted DecisionTreeClassifier with every node below `max_depth` cut off."""
+    if max_depth is None or estimator.tree_.max_depth <= max_depth:
+        return estimator
+
+    state = estimator.tree_.__getstate__()
+    nodes, values = state["nodes"], state["values"]
+
+    # Depth-first, left before right: the node order sklearn itself builds
+    kept, depths, stack = [], [], [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        kept.append(node)
+        depths.append(depth)
+        if nodes[node]["left_child"] != TREE_LEAF and depth < max_depth:
+            stack.append((nodes[node]["right_child"], depth + 1))
+            stack.append((nodes[node]["left_child"], depth + 1))
+
+    kept = np.array(kept)
+    new_id = np.full(len(nodes), TREE_LEAF, dtype=np.intp)
+    new_id[kept] = np.arange(len(kept))
+
+    new_nodes = nodes[kept].copy()
+    is_split = new_nodes["left_child"] != TREE_LEAF
+    cut = is_split & (np.array(depths) >= max_depth)
+    split = is_split & ~cut
+    new_nodes["left_child"][split] = new_id[new_nodes["left_child"][split]]
+    new_nodes["right_child"][split] = new_id[new_nodes["right_child"][split]]
+    new_nodes["left_child"][cut] = TREE_LEAF
+    new_nodes["right_child"][cut] = TREE_LEAF
+    new_nodes["feature"][cut] = TREE_UNDEFINED
+    new_nodes["threshold"][cut] = TREE_UNDEFINED
+
+    tree = Tree(estimator.n_features_in_, np.atleast_1d(estimator.n_classes_).astype(np.intp), estimator.n_outputs_)
+    tree.__setstate__({
+        "max_depth": max_depth,
+        "node_count": len(kept),
+        "nodes": new_nodes,
+        "values": np.ascontiguousarray(values[kept]),
+    })
+
+    truncated = copy.copy(estimator)
+    truncated.tree_ = tree
+    truncated.max_depth = max_depth
+    return truncated
+
+
+def oob_auc_curve(trees: list, oob_rows: list, X: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Out-of-bag ROC AUC of the first k trees, for k = 1..len(trees)."""
+    totals, counts = np.zeros(len(y)), np.zeros(len(y))
+    curve = np.empty(len(trees))
+    for i, (tree, rows) in enumerate(zip(trees, oob_rows)):
+        totals[rows] += tree.predict_proba(X[rows])[:, 1]
+        counts[rows] += 1
+        # Rows no tree so far left out have no out-of-bag prediction yet
+        covered = counts > 0
+        curve[i] = roc_auc_score(y[covered], totals[covered] / counts[covered])
+    return curve
+
+
+def measure_model(model, scaler, X: np.ndarray, y: np.ndarray) -> dict:
+    """Accuracy, size, load time and serving latencies of one model on the scaled test split."""
+    import shap
+
+    fd, path = tempfile.mkstemp(suffix=".pkl", prefix="zyra-compress-")
+    os.close(fd)
+    try:
+        joblib.dump(model, path)
+        size = os.path.getsize(path)
+        load_ms = _median_ms(lambda: joblib.load(path), LOAD_REPEATS)
+    finally:
+        os.remove(path)
+
+    predict = model.predict_proba
+    if INFERENCE_BACKEND == "compiled":
+        predict = CompiledForest.from_sklearn(model, scaler).predict_proba
+
+    start = time.perf_counter()
+    explainer = shap.TreeExplainer(model)
+    explainer_build_ms = (time.perf_counter() - start) * 1e3
+
+    y_proba = model.predict_proba(X)[:, 1]
+    return {
+        "n_trees": len(model.estimators_),
+        "max_depth": max(tree.tree_.max_depth for tree in model.estimators_),
+        "n_nodes": int(sum(tree.tree_.node_count for tree in model.estimators_)),
+        "roc_auc": round(float(roc_auc_score(y, y_proba)), 4),
+        "f1_score": round(float(f1_score(y, (y_proba > 0.5).astype(int), average="weighted")), 4),
+        "model_mb": round(size / 2**20, 2),
+        "load_ms": load_ms,
+        "single_row_ms": _median_ms(lambda: predict(X[:1]), LATENCY_REPEATS),
+        "batch_ms": _median_ms(lambda: predict(X[:BATCH_ROWS]), LATENCY_REPEATS // 5),
+        "explainer_build_ms": round(explainer_build_ms, 1),
+        "shap_ms": _median_ms(lambda: explainer.shap_values(X[:1]), SHAP_REPEATS),
+    }
+
+
+def _median_ms(fn, repeats: int) -> float:
+    fn()  # warm-up
+    samples = []
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(float(np.median(samples)) * 1e3, 3)
@@ -1,16 +1,30 @@
 """
 ML Training Pipeline
 ─────────────────────
-1. Load / generate dataset
+1. Load / generate dataset (optionally derive rolling trend features)
 2. Preprocess (scaling)
 3. Train/test split (80/20, stratified)
-4. Train RandomForestClassifier
+4. Train RandomForestClassifier (FOREST_PARAMS, or a configuration promoted
+   from hyperparameter_search.py)
 5. Evaluate: Accuracy, F1, ROC AUC
-6. Save trained model + scaler + metrics to disk
+   (optionally compress into a compact serving model — see model_compression.py)
+(`--chunked` streams large CSVs instead — see chunked_training.py)
+6. Save trained model + scaler + metrics + reference histograms to disk
+   (plus the memory-mappable forest / explainer arrays), either to the
+   default artifacts directory, to artifacts/versions/<version>/ or, for a
+   per-equipment-type model, to artifacts/types/<model_key>/ — staged in a
+   hidden directory and renamed into place, so readers never see partial files
+
+`progress(phase, **detail)` is called as each phase starts (load, scale,
+fit, evaluate, compress, save) and after each slice of fitted trees; the
+background training jobs (app/services/training_jobs.py) report it.
 """
 
 import os
 import json
+import shutil
+import argparse
+import tempfile
 import joblib
 import numpy as np
 import pandas as pd
@@ -18,8 +32,22 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, f1_score, roc_auc_score, classification_report
+from sklearn.utils.class_weight import compute_class_weight
 
-from app.data.dataset_generator import load_or_generate_dataset
+from app.data.dataset_generator import load_or_generate_dataset, read_csv_dataset
+from app.data.sharded_generator import csv_parts
+from app.ml.model_compression import COMPACT_MODEL_FILE, COMPRESSION_REPORT_FILE, compress_forest
+from app.models.model_loader import TYPES_DIR, VERSIONS_DIR, model_key_dir, version_dir
+from app.models.shared_artifacts import export_shared_arrays
+from app.services.feature_store import TREND_BASE_FEATURES, TREND_FEATURE_COLUMNS
+from app.utils.config import (
+    COMPRESSION_MAX_AUC_LOSS,
+    FEATURE_STORE_WINDOW,
+    FEATURE_STORE_EWMA_ALPHA,
+    INFERENCE_BACKEND,
+    MMAP_ARTIFACTS,
+    TRAINING_CHUNK_SIZE,
+)
 
 # ─── Paths ────────────────────────────────────────────────────────────
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "artifacts")
@@ -27,6 +55,11 @@ MODEL_PATH = os.path.join(MODEL_DIR, "rf_model.pkl")
 SCALER_PATH = os.path.join(MODEL_DIR, "scaler.pkl")
 METRICS_PATH = os.path.join(MODEL_DIR, "metrics.json")
 FEATURE_NAMES_PATH = os.path.join(MODEL_DIR, "feature_names.json")
+REFERENCE_HISTOGRAMS_PATH = os.path.join(MODEL_DIR, "reference_histograms.json")
+SHARED_DIR = os.path.join(MODEL_DIR, "shared")
+
+# Quantile bins per feature for the drift monitor's reference distribution
+REFERENCE_BINS = 10
 
 FEATURE_COLUMNS = [
     "operating_hours",
@@ -43,21 +76,119 @@ FEATURE_COLUMNS = [
 
 TARGET_COLUMN = "failure"
 
+# RandomForestClassifier settings shared by the in-memory and chunked training paths
+FOREST_PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 15,
+    "min_samples_split": 5,
+    "min_samples_leaf": 2,
+    "max_features": "sqrt",
+    "random_state": 42,
+    "n_jobs": -1,
+}
+
+# Warm-start slices the forest is fitted in when progress is reported
+FIT_PROGRESS_STEPS = 10
+
+# Temporal datasets identify each reading by equipment and sequence number
+EQUIPMENT_COLUMN = "equipment_id"
+SEQUENCE_COLUMN = "cycle"
+
+
+def add_trend_features(
+    df: pd.DataFrame,
+    window: int = FEATURE_STORE_WINDOW,
+    alpha: float = FEATURE_STORE_EWMA_ALPHA,
+) -> pd.DataFrame:
+    """
+    Add TREND_FEATURE_COLUMNS computed per equipment over its reading sequence.
+
+    Definitions match the serving-side FeatureStore: rolling mean, EWMA
+    (adjust=False), least-squares slope and max over the last `window`
+    readings, with values rounded to float32 like the store's ring buffer.
+    """
+    missing = {EQUIPMENT_COLUMN, SEQUENCE_COLUMN} - set(df.columns)
+    if missing:
+        raise ValueError(
+            f"Trend features need per-equipment sequences; dataset lacks {sorted(missing)}"
+        )
+
+    df = df.sort_values([EQUIPMENT_COLUMN, SEQUENCE_COLUMN], kind="stable")
+    equipment = df[EQUIPMENT_COLUMN]
+
+    t = df.groupby(EQUIPMENT_COLUMN, sort=False).cumcount().astype(float)
+    n = np.minimum(t + 1, window)
+    t_start = t - n + 1
+    sum_t = n * (n - 1) / 2
+    sum_tt = (n - 1) * n * (2 * n - 1) / 6
+
+    def rolling(series, how):
+        grouped = series.groupby(equipment, sort=False).rolling(window, min_periods=1)
+        return getattr(grouped, how)().reset_index(level=0, drop=True)
+
+    for feature in TREND_BASE_FEATURES:
+        y = df[feature].astype(np.float32).astype(np.float64)
+        sum_y = rolling(y, "sum")
+        # Σ t·y with t re-based to the start of each window
+        sum_ty = rolling(t * y, "sum") - t_start * sum_y
+
+        df[f"{feature}_mean"] = sum_y / n
+        df[f"{feature}_ewma"] = (
+            y.groupby(equipment, sort=False).ewm(alpha=alpha, adjust=False).mean()
+            .reset_index(level=0, drop=True)
+        )
+        df[f"{feature}_slope"] = np.where(
+            n > 1, (n * sum_ty - sum_t * sum_y) / np.maximum(n * sum_tt - sum_t ** 2, 1e-12), 0.0
+        )
+        df[f"{feature}_max"] = rolling(y, "max")
+
+    return df
 
-def train_model() -> dict:
-    """Full training pipeline. Returns evaluation metrics."""
 
-    os.makedirs(MODEL_DIR, exist_ok=True)
+def build_reference_histograms(X: np.ndarray, feature_columns: list, n_bins: int = REFERENCE_BINS) -> dict:
+    """
+    Summarize the training distribution of each feature as a quantile histogram.
+
+    `edges` are the interior bin edges; a value v falls in bin
+    searchsorted(edges, v, side="right"), so counts has len(edges) + 1 entries.
+    """
+    features = {}
+    for i, name in enumerate(feature_columns):
+        column = X[:, i].astype(float)
+        edges = np.unique(np.quantile(column, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        bins = np.searchsorted(edges, column, side="right")
+        features[name] = {
+            "edges": [round(float(e), 6) for e in edges],
+            "counts": np.bincount(bins, minlength=len(edges) + 1).tolist(),
+        }
+    return {"samples": int(X.shape[0]), "features": features}
+
+
+def prepare_training_data(use_trend_features: bool = False, data_path: str = None, progress=None) -> dict:
+    """
+    Steps 1-3 of the pipeline: load the dataset, fit the scaler and make the
+    stratified 80/20 split. Shared with the hyperparameter search so that
+    candidates are scored on exactly the split the promoted model sees.
+    """
+    progress = progress or _no_progress
 
     # ─── 1. Load dataset ──────────────────────────────────────────────
-    df = load_or_generate_dataset()
+    progress("load")
+    df = _read_dataset(data_path) if data_path else load_or_generate_dataset()
     print(f"✅ Dataset loaded: {df.shape[0]} rows, {df.shape[1]} columns")
     print(f"   Class distribution: {dict(df[TARGET_COLUMN].value_counts())}")
 
-    X = df[FEATURE_COLUMNS].values
+    feature_columns = list(FEATURE_COLUMNS)
+    if use_trend_features:
+        df = add_trend_features(df)
+        feature_columns += TREND_FEATURE_COLUMNS
+        print(f"✅ Trend features added: {len(TREND_FEATURE_COLUMNS)} columns")
+
+    X = df[feature_columns].values
     y = df[TARGET_COLUMN].values
 
     # ─── 2. Preprocessing (Standard Scaling) ──────────────────────────
+    progress("scale", rows=int(X.shape[0]))
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
 
@@ -67,21 +198,52 @@ def train_model() -> dict:
     )
     print(f"   Train: {X_train.shape[0]}, Test: {X_test.shape[0]}")
 
+    return {
+        "X": X,
+        "feature_columns": feature_columns,
+        "scaler": scaler,
+        "X_train": X_train,
+        "X_test": X_test,
+        "y_train": y_train,
+        "y_test": y_test,
+    }
+
+
+def train_model(
+    use_trend_features: bool = False,
+    version: str = None,
+    data_path: str = None,
+    model_params: dict = None,
+    compress: bool = False,
+    max_auc_loss: float = COMPRESSION_MAX_AUC_LOSS,
+    model_key: str = None,
+    progress=None,
+) -> dict:
+    """
+    Full training pipeline. Returns evaluation metrics.
+
+    `model_params` overrides entries of FOREST_PARAMS (e.g. a configuration
+    promoted from the hyperparameter search). `compress` also saves a compact
+    model that loses at most `max_auc_loss` ROC AUC. `model_key` saves the
+    model as that equipment type's model instead of a version. `progress`
+    receives each phase and the trees fitted so far.
+    """
+    report = progress or _no_progress
+    data = prepare_training_data(use_trend_features, data_path, report)
+    feature_columns, scaler = data["feature_columns"], data["scaler"]
+    X_train, X_test, y_train, y_test = data["X_train"], data["X_test"], data["y_train"], data["y_test"]
+    params = {**FOREST_PARAMS, **(model_params or {})}
+
     # ─── 4. Train RandomForestClassifier ──────────────────────────────
-    model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        max_features="sqrt",
-        random_state=42,
-        n_jobs=-1,
-        class_weight="balanced",
-    )
-    model.fit(X_train, y_train)
-    print("✅ Model trained: RandomForestClassifier (200 estimators)")
+    model = RandomForestClassifier(**params, class_weight="balanced")
+    if progress is None:
+        model.fit(X_train, y_train)
+    else:
+        _fit_with_progress(model, X_train, y_train, progress)
+    print(f"✅ Model trained: RandomForestClassifier ({params['n_estimators']} estimators)")
 
     # ─── 5. Evaluate ──────────────────────────────────────────────────
+    report("evaluate")
     y_pred = model.predict(X_test)
     y_proba = model.predict_proba(X_test)[:, 1]
 
@@ -94,7 +256,7 @@ def train_model() -> dict:
     feature_importance = {
         name: round(float(imp), 4)
         for name, imp in sorted(
-            zip(FEATURE_COLUMNS, importances), key=lambda x: x[1], reverse=True
+            zip(feature_columns, importances), key=lambda x: x[1], reverse=True
         )
     }
 
@@ -105,6 +267,7 @@ def train_model() -> dict:
         "train_samples": int(X_train.shape[0]),
         "test_samples": int(X_test.shape[0]),
         "feature_importance": feature_importance,
+        "model_params": params,
     }
 
     print(f"   Accuracy : {metrics['accuracy']}")
@@ -112,23 +275,273 @@ def train_model() -> dict:
     print(f"   ROC AUC  : {metrics['roc_auc']}")
     print(f"\n📊 Classification Report:\n{classification_report(y_test, y_pred)}")
 
+    compact_model = compression_report = None
+    if compress:
+        report("compress")
+        print(f"🗜️  Compressing forest (max ROC AUC loss {max_auc_loss})")
+        compact_model, compression_report = compress_forest(
+            model, scaler, X_train, y_train, X_test, y_test, max_auc_loss
+        )
+        original, compact = compression_report["original"], compression_report["compact"]
+        metrics["compression"] = {
+            "accepted": compression_report["accepted"],
+            "n_trees": compact["n_trees"],
+            "max_depth": compact["max_depth"],
+            "roc_auc_loss": compression_report["roc_auc_loss"],
+        }
+        print(f"   Trees    : {original['n_trees']} → {compact['n_trees']} (depth {original['max_depth']} → {compact['max_depth']})")
+        print(f"   Size     : {original['model_mb']} → {compact['model_mb']} MB")
+        print(f"   1-row    : {original['single_row_ms']} → {compact['single_row_ms']} ms")
+        print(f"   SHAP     : {original['shap_ms']} → {compact['shap_ms']} ms")
+        print(f"   ROC AUC  : {original['roc_auc']} → {compact['roc_auc']} (test split)")
+
     # ─── 6. Save artifacts ────────────────────────────────────────────
-    joblib.dump(model, MODEL_PATH)
-    joblib.dump(scaler, SCALER_PATH)
+    report("save")
+    save_artifacts(
+        model,
+        scaler,
+        metrics,
+        feature_columns,
+        build_reference_histograms(data["X"], feature_columns),
+        version,
+        compact_model,
+        compression_report,
+        model_key,
+    )
+    return metrics
+
+
+def _no_progress(phase: str, **detail):
+    pass
 
-    with open(METRICS_PATH, "w") as f:
+
+def _fit_with_progress(model: RandomForestClassifier, X: np.ndarray, y: np.ndarray, progress):
+    """
+    Fit `model` in FIT_PROGRESS_STEPS warm-start slices, reporting the trees
+    fitted after each. sklearn skips the random draws of the trees already
+    fitted, so the forest equals the one a single fit() builds.
+    """
+    n_estimators, class_weight = model.n_estimators, model.class_weight
+    warm_class_weight = class_weight
+    if class_weight == "balanced":
+        # The preset warns under warm_start; the weights of the full y are the same ones
+        classes = np.unique(y)
+        warm_class_weight = dict(zip(classes, compute_class_weight("balanced", classes=classes, y=y)))
+
+    model.set_params(warm_start=True, class_weight=warm_class_weight)
+    progress("fit", trees_fitted=0, n_estimators=n_estimators)
+    for trees in sorted({max(1, n_estimators * step // FIT_PROGRESS_STEPS) for step in range(1, FIT_PROGRESS_STEPS + 1)}):
+        model.set_params(n_estimators=trees)
+        model.fit(X, y)
+        progress("fit", trees_fitted=trees, n_estimators=n_estimators)
+    model.set_params(warm_start=False, class_weight=class_weight)
+
+
+def _read_dataset(data_path: str) -> pd.DataFrame:
+    """A CSV file, or every CSV part of a sharded_generator directory."""
+    if os.path.isdir(data_path):
+        return pd.concat([read_csv_dataset(path) for path in csv_parts(data_path)], ignore_index=True)
+    return read_csv_dataset(data_path)
+
+
+def save_artifacts(
+    model,
+    scaler,
+    metrics: dict,
+    feature_columns: list,
+    reference_histograms: dict,
+    version: str = None,
+    compact_model=None,
+    compression_report: dict = None,
+    model_key: str = None,
+):
+    """
+    Write model, scaler, metrics and histograms to the default, a versioned
+    or a per-type directory, plus the compact model and its report when given.
+
+    Everything is written to a hidden staging directory first. A version or
+    type directory is then swapped in whole with a rename. In the default
+    directory the files are renamed one by one, so none is ever seen half
+    written, and rf_model.pkl (what loaders look for) arrives last.
+    """
+    if model_key:
+        final_dir = model_key_dir(model_key)
+    else:
+        final_dir = version_dir(version) if version else MODEL_DIR
+    parent = os.path.dirname(os.path.abspath(final_dir)) if final_dir != MODEL_DIR else MODEL_DIR
+    os.makedirs(parent, exist_ok=True)
+    # The pid lets a canceled training job's leftovers be found (remove_staged_artifacts)
+    out_dir = tempfile.mkdtemp(prefix=f".staging-{os.getpid()}-", dir=parent)
+
+    try:
+        _write_artifacts(
+            out_dir, model, scaler, metrics, feature_columns, reference_histograms, compact_model, compression_report
+        )
+        if final_dir != MODEL_DIR:
+            _swap_in(out_dir, final_dir)
+        else:
+            # A compact model or report of a previous training run no longer matches this one
+            stale = [COMPACT_MODEL_FILE] if compact_model is None else []
+            if compression_report is None:
+                stale.append(COMPRESSION_REPORT_FILE)
+            for name in stale:
+                if os.path.exists(os.path.join(final_dir, name)):
+                    os.remove(os.path.join(final_dir, name))
+            for name in sorted(os.listdir(out_dir), key=lambda name: name == "rf_model.pkl"):
+                if os.path.isdir(os.path.join(out_dir, name)):
+                    _swap_in(os.path.join(out_dir, name), os.path.join(final_dir, name))
+                else:
+                    os.replace(os.path.join(out_dir, name), os.path.join(final_dir, name))
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    print(f"💾 Model saved to {os.path.join(final_dir, 'rf_model.pkl')}")
+    print(f"💾 Scaler saved to {os.path.join(final_dir, 'scaler.pkl')}")
+    print(f"💾 Metrics saved to {os.path.join(final_dir, 'metrics.json')}")
+    print(f"💾 Reference histograms saved to {os.path.join(final_dir, 'reference_histograms.json')}")
+    if compact_model is not None:
+        print(f"💾 Compact model saved to {os.path.join(final_dir, COMPACT_MODEL_FILE)}")
+    if MMAP_ARTIFACTS:
+        print(f"💾 Shared arrays exported to {os.path.join(final_dir, 'shared')}")
+
+
+def _write_artifacts(
+    out_dir: str,
+    model,
+    scaler,
+    metrics: dict,
+    feature_columns: list,
+    reference_histograms: dict,
+    compact_model,
+    compression_report: dict,
+):
+    model_path = os.path.join(out_dir, "rf_model.pkl")
+    scaler_path = os.path.join(out_dir, "scaler.pkl")
+
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+
+    with open(os.path.join(out_dir, "metrics.json"), "w") as f:
         json.dump(metrics, f, indent=2)
 
-    with open(FEATURE_NAMES_PATH, "w") as f:
-        json.dump(FEATURE_COLUMNS, f)
+    with open(os.path.join(out_dir, "feature_names.json"), "w") as f:
+        json.dump(feature_columns, f)
 
-    print(f"💾 Model saved to {MODEL_PATH}")
-    print(f"💾 Scaler saved to {SCALER_PATH}")
-    print(f"💾 Metrics saved to {METRICS_PATH}")
+    with open(os.path.join(out_dir, "reference_histograms.json"), "w") as f:
+        json.dump(reference_histograms, f)
+
+    if compact_model is not None:
+        joblib.dump(compact_model, os.path.join(out_dir, COMPACT_MODEL_FILE))
+    if compression_report is not None:
+        # Also kept when the compact model was discarded, to record why
+        with open(os.path.join(out_dir, COMPRESSION_REPORT_FILE), "w") as f:
+            json.dump(compression_report, f, indent=2)
+
+    if MMAP_ARTIFACTS:
+        # Export the memory-mappable arrays now so serving workers never unpickle the forest.
+        # Renames keep the pickles' mtimes, so the manifest still matches once published.
+        export_shared_arrays(
+            model,
+            scaler,
+            feature_columns,
+            model_path,
+            scaler_path,
+            os.path.join(out_dir, "shared"),
+            compile_forest=INFERENCE_BACKEND == "compiled",
+        )
+
+
+def _swap_in(src: str, dst: str):
+    """Rename directory `src` to `dst`, replacing an existing `dst`."""
+    old_dir = None
+    if os.path.exists(dst):
+        old_dir = tempfile.mkdtemp(prefix=f".replaced-{os.getpid()}-", dir=os.path.dirname(os.path.abspath(dst)))
+        os.replace(dst, os.path.join(old_dir, os.path.basename(dst)))
+    os.replace(src, dst)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
 
-    return metrics
+
+def remove_staged_artifacts(pid: int):
+    """
+    Delete what a save_artifacts call in process `pid` left behind when it
+    was killed. A process killed inside _swap_in, after moving the previous
+    directory aside but before renaming the new one in, leaves the only
+    copy of the previous model in .replaced-<pid>-*/; it is moved back.
+    """
+    for parent in (MODEL_DIR, VERSIONS_DIR, TYPES_DIR):
+        if not os.path.isdir(parent):
+            continue
+        for name in os.listdir(parent):
+            path = os.path.join(parent, name)
+            if name.startswith(f".replaced-{pid}-"):
+                for entry in os.listdir(path):
+                    if not os.path.exists(os.path.join(parent, entry)):
+                        os.replace(os.path.join(path, entry), os.path.join(parent, entry))
+                        print(f"♻️  Restored {os.path.join(parent, entry)} from an interrupted swap")
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.startswith(f".staging-{pid}-"):
+                shutil.rmtree(path, ignore_errors=True)
 
 
 # Run standalone
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the equipment failure model")
+    parser.add_argument(
+        "--trend-features",
+        action="store_true",
+        help="add rolling trend features (needs equipment_id and cycle columns)",
+    )
+    parser.add_argument(
+        "--version",
+        help="save to artifacts/versions/<version>/ for activation via POST /models/<version>/activate",
+    )
+    parser.add_argument(
+        "--model-key",
+        help="save as the model of one equipment type (artifacts/types/<model_key>/), served to requests with that model_key",
+    )
+    parser.add_argument(
+        "--data",
+        help="CSV or sharded_generator output directory to train on (default: machine_data.csv)",
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="stream the CSV in chunks instead of loading it (bounded memory, for large datasets)",
+    )
+    parser.add_argument("--chunk-size", type=int, help="rows per chunk in --chunked mode")
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help=f"also save a compact model ({COMPACT_MODEL_FILE}) with fewer, shallower trees",
+    )
+    parser.add_argument(
+        "--max-auc-loss",
+        type=float,
+        default=COMPRESSION_MAX_AUC_LOSS,
+        help="with --compress: largest ROC AUC drop accepted for the compact model",
+    )
+    args = parser.parse_args()
+
+    if args.chunked:
+        if args.trend_features:
+            parser.error("--trend-features needs whole equipment sequences and is not supported with --chunked")
+        if args.compress:
+            parser.error("--compress needs the in-memory test split and is not supported with --chunked")
+        from app.ml.chunked_training import train_model_chunked
+
+        train_model_chunked(
+            data_path=args.data,
+            chunk_size=args.chunk_size or TRAINING_CHUNK_SIZE,
+            version=args.version,
+            model_key=args.model_key,
+        )
+    else:
+        train_model(
+            use_trend_features=args.trend_features,
+            version=args.version,
+            data_path=args.data,
+            compress=args.compress,
+            max_auc_loss=args.max_auc_loss,
+            model_key=args.model_key,
+        )
@@ -0,0 +1,62 @@
+"""
+Approximate SHAP explanations, traded against exact TreeSHAP for speed.
+
+Two methods (SHAP_APPROX_METHOD):
+  - saabas       Saabas path attribution: each split on the decision path is
+                 credited with the change in the node's expected value. One
+                 pass down each tree, no path-subset weighting.
+  - tree_subset  Exact TreeSHAP over the first SHAP_APPROX_TREES trees,
+                 rescaled to the size of the full forest. Random forest trees
+                 are independent draws, so the subset is an unbiased sample.
+
+Both keep the TreeExplainer output layout, so callers pick the failure class
+and rank features exactly as for exact values. The error against exact SHAP
+is measured on warm-up rows when a bundle is loaded (see
+ModelRegistry.warm_up) with `measure_agreement`.
+"""
+
+import numpy as np
+
+from app.utils.config import SHAP_APPROX_METHOD, SHAP_APPROX_TREES
+
+METHODS = ("saabas", "tree_subset")
+
+
+def approximate_shap_values(explainer, X_scaled: np.ndarray, method: str = SHAP_APPROX_METHOD, n_trees: int = SHAP_APPROX_TREES):
+    """Approximate `explainer.shap_values(X_scaled)` with `method`."""
+    if method == "saabas":
+        return explainer.shap_values(X_scaled, approximate=True)
+    if method != "tree_subset":
+        raise ValueError(f"Unknown SHAP approximation method '{method}' — expected one of {', '.join(METHODS)}")
+
+    total = explainer.model.values.shape[0]
+    limit = max(1, min(n_trees, total))
+    # Each tree's values are already divided by the forest size; the subset's sum is rescaled to match
+    values = explainer.shap_values(X_scaled, tree_limit=limit, check_additivity=False)
+    scale = total / limit
+    if isinstance(values, list):
+        return [v * scale for v in values]
+    return values * scale
+
+
+def measure_agreement(exact: np.ndarray, approximate: np.ndarray, top_k: int = 3) -> dict:
+    """
+    Compare (n_rows, n_features) approximate SHAP values with exact ones.
+
+    - top1_agreement       share of rows with the same strongest feature
+    - top_k_set_agreement  mean overlap of the top-k feature sets (0–1)
+    - top_k_rank_agreement share of rows with the identical top-k ranking
+    - max_abs_deviation    largest absolute SHAP value error
+    """
+    top_k = min(top_k, exact.shape[1])
+    exact_top = np.argsort(-np.abs(exact), axis=1, kind="stable")[:, :top_k]
+    approx_top = np.argsort(-np.abs(approximate), axis=1, kind="stable")[:, :top_k]
+    overlap = [len(set(a) & set(b)) / top_k for a, b in zip(exact_top, approx_top)]
+    return {
+        "rows": int(exact.shape[0]),
+        "top_k": top_k,
+        "top1_agreement": round(float(np.mean(exact_top[:, 0] == approx_top[:, 0])), 4),
+        "top_k_set_agreement": round(float(np.mean(overlap)), 4),
+        "top_k_rank_agreement": round(float(np.mean((exact_top == approx_top).all(axis=1))), 4),
+        "max_abs_deviation": round(float(np.max(np.abs(approximate - exact))), 4),
+    }
@@ -0,0 +1,113 @@
+"""
+Compiled Forest — flat-array inference for the RandomForestClassifier.
+
+The trees of the fitted forest are copied into contiguous NumPy arrays
+(feature, threshold, left, right, leaf value) indexed by a global node id.
+Prediction walks every tree at once: each step gathers the current node of
+all (row, tree) pairs and moves left or right in a single vectorized
+operation, so a 1-row call costs `max_depth` small array operations instead
+of sklearn's input validation and per-estimator joblib dispatch.
+
+Leaves point to themselves, so iterating exactly `max_depth` steps lands every
+path on its leaf without any masking.
+"""
+
+import numpy as np
+
+
+class CompiledForest:
+    """Flat-array copy of a fitted RandomForestClassifier plus its StandardScaler."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, mean, scale):
+        self.feature = feature  # (n_nodes,) int — split feature (0 for leaves)
+        self.threshold = threshold  # (n_nodes,) float64 — split threshold (+inf for leaves)
+        self.left = left  # (n_nodes,) int — left child (self for leaves)
+        self.right = right  # (n_nodes,) int — right child (self for leaves)
+        self.value = value  # (n_nodes, n_classes) float64 — normalized class distribution
+        self.roots = roots  # (n_trees,) int — root node id of each tree
+        self.max_depth = int(max_depth)
+        self.mean = mean  # (n_features,) — scaler mean_
+        self.scale = scale  # (n_features,) — scaler scale_
+
+    @classmethod
+    def from_sklearn(cls, model, scaler) -> "CompiledForest":
+        """Compile the fitted forest and scaler into flat arrays."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(index_dtype),
+            right=np.concatenate(rights).astype(index_dtype),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=index_dtype),
+            max_depth=max_depth,
+            mean=np.asarray(scaler.mean_, dtype=np.float64),
+            scale=np.asarray(scaler.scale_, dtype=np.float64),
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """Equivalent of StandardScaler.transform without sklearn's validation overhead."""
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def apply(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Return the (n_samples, n_trees) leaf node ids reached by each row."""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X_scaled, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Average the leaf class distributions over all trees, like sklearn."""
+        leaves = self.apply(X_scaled)
+        return self.value[leaves].mean(axis=1)
+
+
+def verify_parity(compiled: CompiledForest, model, n_samples: int = 512, seed: int = 0, tol: float = 1e-9) -> float:
+    """
+    Compare compiled and sklearn probabilities on random scaled inputs.
+
+    Returns the max absolute difference; raises ValueError if it exceeds `tol`.
+    """
+    rng = np.random.RandomState(seed)
+    X_scaled = rng.normal(0.0, 1.5, size=(n_samples, len(compiled.mean)))
+
+    expected = model.predict_proba(X_scaled)
+    actual = compiled.predict_proba(X_scaled)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > tol:
+        raise ValueError(f"Compiled forest diverges from sklearn (max abs diff {max_diff:.3g})")
+    return max_diff
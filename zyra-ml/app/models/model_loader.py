@@ -1,61 +1,373 @@
 """
 Model Loader — loads trained model, scaler, metrics, and feature names from disk.
+
+Objects derived from the model that never change between requests (the SHAP
+TreeExplainer and the global feature importance) are built once here.
+
+With MMAP_ARTIFACTS (default), the forest and explainer arrays are exported
+once to <artifacts>/shared/ and memory-mapped read-only, so uvicorn workers
+share the same page-cache pages. Nothing is unpickled eagerly unless the
+sklearn backend needs the fitted estimator for inference; the estimator and
+explainer load on first use.
+
+With SERVE_COMPACT_MODEL, a version that has a compressed forest
+(rf_model_compact.pkl, see app/ml/model_compression.py) serves that instead,
+with its memory-mapped arrays in shared_compact/.
+
+Versioned layout:
+    artifacts/                       default (unversioned) artifacts
+    artifacts/versions/<version>/    same files, one directory per version
+    artifacts/versions/ACTIVE        version loaded at startup, if present
+    artifacts/types/<model_key>/     per-equipment-type models, loaded on demand by
+                                     the model pool (app/services/model_pool.py)
+
+All artifacts of one version live in a ModelBundle. Requests pin the active
+bundle with use_bundle(), so a swap to a new version never changes the model
+under a request that is already running.
 """
 
 import os
+import re
 import json
+import threading
+from contextlib import contextmanager
+
 import joblib
 
-_model = None
-_scaler = None
-_metrics = None
-_feature_names = None
+from app.models.compiled_forest import CompiledForest, verify_parity
+from app.models.shared_artifacts import (
+    FOREST_ARRAYS,
+    SHAP_ARRAYS,
+    artifact_digest,
+    read_manifest,
+    export_shared_arrays,
+    load_shared_forest,
+    load_shared_explainer,
+)
+from app.utils.config import INFERENCE_BACKEND, MMAP_ARTIFACTS, SERVE_COMPACT_MODEL
+from app.utils.stage_timing import stage_timer
 
 ARTIFACTS_DIR = os.path.join(os.path.dirname(__file__), "..", "artifacts")
 MODEL_PATH = os.path.join(ARTIFACTS_DIR, "rf_model.pkl")
 SCALER_PATH = os.path.join(ARTIFACTS_DIR, "scaler.pkl")
 METRICS_PATH = os.path.join(ARTIFACTS_DIR, "metrics.json")
 FEATURE_NAMES_PATH = os.path.join(ARTIFACTS_DIR, "feature_names.json")
+REFERENCE_HISTOGRAMS_PATH = os.path.join(ARTIFACTS_DIR, "reference_histograms.json")
+SHARED_DIR = os.path.join(ARTIFACTS_DIR, "shared")
+VERSIONS_DIR = os.path.join(ARTIFACTS_DIR, "versions")
+TYPES_DIR = os.path.join(ARTIFACTS_DIR, "types")
+ACTIVE_VERSION_PATH = os.path.join(VERSIONS_DIR, "ACTIVE")
+
+_VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+
+class ModelBundle:
+    """Every artifact of one model version, loaded from one directory."""
+
+    def __init__(self, directory: str, name: str = None):
+        self.directory = directory
+        self.name = name  # None for the default (unversioned) layout
+        self.model_path = os.path.join(directory, "rf_model.pkl")
+        self.scaler_path = os.path.join(directory, "scaler.pkl")
+        self.shared_dir = os.path.join(directory, "shared")
+
+        compact_path = os.path.join(directory, "rf_model_compact.pkl")
+        if SERVE_COMPACT_MODEL and os.path.exists(compact_path):
+            self.model_path = compact_path
+            self.shared_dir = os.path.join(directory, "shared_compact")
+
+        self.model = None
+        self.model_bytes = 0  # pickle size of the loaded estimator
+        self.scaler = None
+        self.metrics = None
+        self.feature_names = None
+        self.explainer = None
+        self.feature_importance = None
+        self.compiled = None
+        self.version = None
+        self.reference_histograms = None
+        self.manifest = None
+        self.shap_approximation = None  # approximate-vs-exact SHAP error, measured at warm-up
+        self.in_flight = 0
+        self._lazy_lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Load the artifacts from disk; returns False if there is no trained model."""
+        if not os.path.exists(self.model_path):
+            print(f"⚠️  No trained model found in {self.directory} — run training pipeline first")
+            return False
+
+        if os.path.exists(self.scaler_path):
+            self.scaler = joblib.load(self.scaler_path)
+            print(f"✅ Scaler loaded from {self.scaler_path}")
+
+        self.metrics = _read_json(os.path.join(self.directory, "metrics.json"))
+        if self.metrics is not None:
+            print(f"✅ Metrics loaded: Accuracy={self.metrics.get('accuracy')}, F1={self.metrics.get('f1_score')}, ROC-AUC={self.metrics.get('roc_auc')}")
+        self.feature_names = _read_json(os.path.join(self.directory, "feature_names.json"))
+        self.reference_histograms = _read_json(os.path.join(self.directory, "reference_histograms.json"))
+
+        if MMAP_ARTIFACTS and self.scaler is not None:
+            compiled_backend = INFERENCE_BACKEND == "compiled"
+            self.manifest = read_manifest(self.shared_dir, self.model_path, self.scaler_path, need_forest=compiled_backend)
+            if self.manifest is None:
+                self.model = self._load_estimator()
+                self.manifest = export_shared_arrays(
+                    self.model,
+                    self.scaler,
+                    self.feature_names,
+                    self.model_path,
+                    self.scaler_path,
+                    self.shared_dir,
+                    compile_forest=compiled_backend,
+                )
+                print(f"💾 Shared arrays exported to {self.shared_dir}")
+
+            self.version = self.name or self.manifest["model_version"]
+            self.feature_importance = self.manifest["feature_importance"]
+            forest = self.manifest.get("forest") or {}
+            if compiled_backend and "error" not in forest:
+                # Parity with sklearn was verified when the arrays were exported
+                self.compiled = load_shared_forest(self.shared_dir, self.manifest)
+                print(f"✅ Compiled forest memory-mapped: {self.compiled.n_trees} trees, depth {self.compiled.max_depth}")
+            else:
+                if compiled_backend:
+                    print(f"⚠️  {forest['error']} — falling back to sklearn inference")
+                if self.model is None:
+                    self.model = self._load_estimator()
+            print("✅ SHAP explainer arrays memory-mapped (explainer built on first use)")
+            return True
+
+        self.model = self._load_estimator()
+        self.version = self.name or artifact_digest(self.model_path, self.scaler_path)
+
+        # Imported here: shap (and its plotting stack) takes seconds to import
+        import shap
+
+        # TreeExplainer walks every tree of the forest when constructed — do it once
+        self.explainer = shap.TreeExplainer(self.model)
+        print("✅ SHAP explainer built")
+
+        self.feature_importance = {
+            name: round(float(imp), 4)
+            for name, imp in zip(self.feature_names, self.model.feature_importances_)
+        }
+
+        if INFERENCE_BACKEND == "compiled" and self.scaler is not None:
+            try:
+                compiled = CompiledForest.from_sklearn(self.model, self.scaler)
+                max_diff = verify_parity(compiled, self.model)
+                self.compiled = compiled
+                print(f"✅ Compiled forest ready: {compiled.n_trees} trees, depth {compiled.max_depth}, parity diff {max_diff:.2g}")
+            except ValueError as e:
+                print(f"⚠️  {e} — falling back to sklearn inference")
+
+        return True
+
+    def get_model(self):
+        """Fitted estimator; unpickled on first use when artifacts are memory-mapped."""
+        if self.model is None and self.manifest is not None:
+            with self._lazy_lock:
+                if self.model is None:
+                    self.model = self._load_estimator()
+        return self.model
+
+    def get_explainer(self):
+        """SHAP TreeExplainer; built over the memory-mapped arrays on first use."""
+        if self.explainer is None and self.manifest is not None:
+            with self._lazy_lock:
+                if self.explainer is None:
+                    with stage_timer.stage("explainer_build"):
+                        self.explainer = load_shared_explainer(self.shared_dir, self.manifest)
+        return self.explainer
+
+    def score(self, X_raw):
+        """Scale a raw feature matrix and return (X_scaled, failure probabilities)."""
+        if self.compiled is not None:
+            with stage_timer.stage("scale"):
+                X_scaled = self.compiled.transform(X_raw)
+            with stage_timer.stage("predict_proba"):
+                return X_scaled, self.compiled.predict_proba(X_scaled)[:, 1]
+
+        with stage_timer.stage("scale"):
+            X_scaled = self.scaler.transform(X_raw)
+        with stage_timer.stage("predict_proba"):
+            return X_scaled, self.get_model().predict_proba(X_scaled)[:, 1]
+
+    def resident_bytes(self) -> int:
+        """
+        Approximate memory held by the loaded artifacts: the unpickled
+        estimator (counted at its pickle size) plus the compiled forest and
+        SHAP explainer arrays, memory-mapped or not.
+        """
+        total = 0
+        if self.model is not None:
+            total += self.model_bytes
+        if self.compiled is not None:
+            total += sum(getattr(self.compiled, name).nbytes for name in FOREST_ARRAYS)
+        if self.explainer is not None:
+            total += sum(getattr(self.explainer.model, name).nbytes for name in SHAP_ARRAYS)
+        return total
+
+    def release(self):
+        """Drop every loaded artifact so the memory can be reclaimed."""
+        self.model = self.explainer = self.compiled = self.manifest = None
+
+    def _load_estimator(self):
+        # Sized from the open file, so a retrain swapping the directory later cannot change or break it
+        with open(self.model_path, "rb") as f:
+            self.model_bytes = os.fstat(f.fileno()).st_size
+            model = joblib.load(f)
+        print(f"✅ Model loaded from {self.model_path}")
+        return model
+
+
+def _read_json(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# ─── Versions ────────────────────────────────────────────────────────
+def version_dir(version: str) -> str:
+    """Directory of a named model version (names are validated, never paths)."""
+    if not _VERSION_PATTERN.match(version or ""):
+        raise ValueError(f"Invalid model version name: {version!r}")
+    return os.path.join(VERSIONS_DIR, version)
+
+
+def list_versions() -> list:
+    """Names of the versioned artifact directories that contain a trained model."""
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(VERSIONS_DIR)
+        if _VERSION_PATTERN.match(name) and os.path.exists(os.path.join(VERSIONS_DIR, name, "rf_model.pkl"))
+    )
+
+
+def model_key_dir(model_key: str) -> str:
+    """Directory of a per-equipment-type model (keys are validated like version names)."""
+    if not _VERSION_PATTERN.match(model_key or ""):
+        raise ValueError(f"Invalid model key: {model_key!r}")
+    return os.path.join(TYPES_DIR, model_key)
+
+
+def list_model_keys() -> list:
+    """Model keys under artifacts/types/ that contain a trained model."""
+    if not os.path.isdir(TYPES_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(TYPES_DIR)
+        if _VERSION_PATTERN.match(name) and os.path.exists(os.path.join(TYPES_DIR, name, "rf_model.pkl"))
+    )
+
+
+def read_active_version():
+    """Version recorded by the last activation, or None for the default layout."""
+    if not os.path.exists(ACTIVE_VERSION_PATH):
+        return None
+    with open(ACTIVE_VERSION_PATH, "r") as f:
+        return f.read().strip() or None
+
+
+def write_active_version(version: str):
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    tmp_path = ACTIVE_VERSION_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, ACTIVE_VERSION_PATH)
+
+
+# ─── Active bundle ───────────────────────────────────────────────────
+_active = None
+# Guards the active bundle and every bundle's in-flight count
+_bundles = threading.Condition()
 
 
 def load_model():
-    """Load all ML artifacts from disk."""
-    global _model, _scaler, _metrics, _feature_names
-
-    if os.path.exists(MODEL_PATH):
-        _model = joblib.load(MODEL_PATH)
-        print(f"✅ Model loaded from {MODEL_PATH}")
-    else:
-        print("⚠️  No trained model found — run training pipeline first")
+    """Load the startup version (ACTIVE pointer, else the default layout) and make it active."""
+    version = read_active_version()
+    bundle = ModelBundle(version_dir(version), version) if version else ModelBundle(ARTIFACTS_DIR)
+    if not bundle.load():
         return False
+    activate_bundle(bundle)
+    return True
 
-    if os.path.exists(SCALER_PATH):
-        _scaler = joblib.load(SCALER_PATH)
-        print(f"✅ Scaler loaded from {SCALER_PATH}")
 
-    if os.path.exists(METRICS_PATH):
-        with open(METRICS_PATH, "r") as f:
-            _metrics = json.load(f)
-        print(f"✅ Metrics loaded: Accuracy={_metrics.get('accuracy')}, F1={_metrics.get('f1_score')}, ROC-AUC={_metrics.get('roc_auc')}")
+def activate_bundle(bundle: ModelBundle):
+    """Atomically make `bundle` the one new requests use; returns the previous bundle."""
+    global _active
+    with _bundles:
+        previous, _active = _active, bundle
+    return previous
 
-    if os.path.exists(FEATURE_NAMES_PATH):
-        with open(FEATURE_NAMES_PATH, "r") as f:
-            _feature_names = json.load(f)
 
-    return True
+@contextmanager
+def use_bundle():
+    """Pin the active bundle for the duration of a request."""
+    with _bundles:
+        bundle = _active
+        if bundle is None:
+            raise RuntimeError("Model not loaded. Run the training pipeline first.")
+        bundle.in_flight += 1
+    try:
+        yield bundle
+    finally:
+        with _bundles:
+            bundle.in_flight -= 1
+            _bundles.notify_all()
+
+
+def wait_until_idle(bundle: ModelBundle, timeout: float = None) -> bool:
+    """Block until no request is using `bundle`; returns False on timeout."""
+    with _bundles:
+        return _bundles.wait_for(lambda: bundle.in_flight == 0, timeout)
+
+
+def get_active_bundle():
+    return _active
+
+
+def is_model_loaded() -> bool:
+    """True once artifacts are available for scoring (without forcing lazy loads)."""
+    return _active is not None and _active.scaler is not None
 
 
 def get_model():
-    return _model
+    return _active.get_model() if _active else None
 
 
 def get_scaler():
-    return _scaler
+    return _active.scaler if _active else None
 
 
 def get_metrics():
-    return _metrics
+    return _active.metrics if _active else None
 
 
 def get_feature_names():
-    return _feature_names
+    return _active.feature_names if _active else None
+
+
+def get_explainer():
+    return _active.get_explainer() if _active else None
+
+
+def get_feature_importance():
+    return _active.feature_importance if _active else None
+
+
+def get_compiled_forest():
+    """Compiled inference engine, or None when the sklearn backend is active."""
+    return _active.compiled if _active else None
+
+
+def get_model_version():
+    return _active.version if _active else None
+
+
+def get_reference_histograms():
+    """Training-time feature histograms for drift monitoring, if they were saved."""
+    return _active.reference_histograms if _active else None
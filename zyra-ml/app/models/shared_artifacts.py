@@ -0,0 +1,219 @@
+"""
+Shared Artifacts — raw .npy copies of the forest, memory-mapped read-only.
+
+When the service runs with several uvicorn workers, every process that
+unpickles rf_model.pkl and builds a TreeExplainer holds a private copy of
+the same node arrays. Exporting those arrays once as raw .npy files and
+opening them with np.load(mmap_mode="r") lets all workers share the OS page
+cache instead, and nothing is deserialized at startup.
+
+Layout (artifacts/shared/):
+    manifest.json          model identity, tree metadata, feature importance
+    forest_<name>.npy      CompiledForest arrays (used for inference)
+    shap_<name>.npy        TreeExplainer dense arrays (used for explanations)
+
+The manifest records the size and mtime of the rf_model.pkl / scaler.pkl
+pair it was exported from, so a retrained model is detected and re-exported.
+The forest arrays are only compiled (and checked for parity with sklearn)
+for INFERENCE_BACKEND=compiled; the manifest's `forest` entry says whether
+they were exported, or why parity failed. Workers that start together take
+an exclusive lock (.<shared dir name>.lock next to it) around the export,
+so one exports and the others use its result.
+"""
+
+import os
+import json
+import fcntl
+import hashlib
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.models.compiled_forest import CompiledForest, verify_parity
+
+MANIFEST_NAME = "manifest.json"
+FOREST_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots", "mean", "scale"]
+SHAP_ARRAYS = [
+    "children_left",
+    "children_right",
+    "children_default",
+    "features",
+    "thresholds",
+    "values",
+    "node_sample_weight",
+    "num_nodes",
+]
+
+
+def artifact_digest(*paths) -> str:
+    """Short content hash identifying a model + scaler pair."""
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def artifact_identity(model_path: str, scaler_path: str) -> dict:
+    """Size and mtime of the pickles — cheap to check on every startup."""
+    identity = {}
+    for prefix, path in (("model", model_path), ("scaler", scaler_path)):
+        stat = os.stat(path)
+        identity[f"{prefix}_size"] = stat.st_size
+        identity[f"{prefix}_mtime_ns"] = stat.st_mtime_ns
+    return identity
+
+
+def read_manifest(shared_dir: str, model_path: str, scaler_path: str, need_forest: bool = False):
+    """
+    Return the manifest if it matches the current model and scaler, else
+    None. With `need_forest`, an export that skipped the forest arrays does
+    not match either (one whose parity check failed does).
+    """
+    path = os.path.join(shared_dir, MANIFEST_NAME)
+    if not all(os.path.exists(p) for p in (path, model_path, scaler_path)):
+        return None
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    identity = artifact_identity(model_path, scaler_path)
+    if any(manifest.get(key) != value for key, value in identity.items()):
+        return None
+    if need_forest and manifest.get("forest") is None:
+        return None
+    return manifest
+
+
+def export_shared_arrays(
+    model,
+    scaler,
+    feature_names: list,
+    model_path: str,
+    scaler_path: str,
+    shared_dir: str,
+    compile_forest: bool = False,
+) -> dict:
+    """
+    Write the explainer arrays (and with `compile_forest` the compiled
+    forest arrays) for memory-mapping; returns the manifest.
+
+    Files are written to a temporary directory and swapped in with a rename,
+    so concurrently starting workers never see a half-written export. If
+    another worker finished a matching export while this one waited for the
+    lock, that export is used as is.
+    """
+    import shap
+
+    with _export_lock(shared_dir):
+        manifest = read_manifest(shared_dir, model_path, scaler_path, need_forest=compile_forest)
+        if manifest is not None:
+            return manifest
+
+        compiled, forest = None, None
+        if compile_forest:
+            try:
+                compiled = CompiledForest.from_sklearn(model, scaler)
+                forest = {"parity_max_diff": verify_parity(compiled, model)}
+            except ValueError as e:
+                compiled, forest = None, {"error": str(e)}
+        explainer = shap.TreeExplainer(model)
+
+        parent = os.path.dirname(os.path.abspath(shared_dir))
+        tmp_dir = tempfile.mkdtemp(prefix=".shared-", dir=parent)
+
+        if compiled is not None:
+            for name in FOREST_ARRAYS:
+                np.save(os.path.join(tmp_dir, f"forest_{name}.npy"), getattr(compiled, name))
+        for name in SHAP_ARRAYS:
+            np.save(os.path.join(tmp_dir, f"shap_{name}.npy"), getattr(explainer.model, name))
+
+        manifest = {
+            **artifact_identity(model_path, scaler_path),
+            "model_version": artifact_digest(model_path, scaler_path),
+            "n_trees": len(model.estimators_),
+            "max_depth": max(tree.tree_.max_depth for tree in model.estimators_),
+            "forest": forest,
+            "feature_importance": {
+                name: round(float(imp), 4) for name, imp in zip(feature_names, model.feature_importances_)
+            },
+            "shap": {
+                "max_depth": int(explainer.model.max_depth),
+                "base_offset": np.asarray(explainer.model.base_offset).tolist(),
+                "tree_output": explainer.model.tree_output,
+                "objective": explainer.model.objective,
+            },
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_dir = None
+        if os.path.exists(shared_dir):
+            old_dir = tempfile.mkdtemp(prefix=".shared-old-", dir=parent)
+            os.replace(shared_dir, os.path.join(old_dir, "shared"))
+        os.replace(tmp_dir, shared_dir)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    return manifest
+
+
+@contextmanager
+def _export_lock(shared_dir: str):
+    """Exclusive advisory lock serializing exports to `shared_dir` across processes."""
+    parent = os.path.dirname(os.path.abspath(shared_dir))
+    os.makedirs(parent, exist_ok=True)
+    with open(os.path.join(parent, f".{os.path.basename(shared_dir)}.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_shared_forest(shared_dir: str, manifest: dict) -> CompiledForest:
+    """Open the compiled forest arrays memory-mapped (read-only, zero copy)."""
+    arrays = {
+        name: np.load(os.path.join(shared_dir, f"forest_{name}.npy"), mmap_mode="r")
+        for name in FOREST_ARRAYS
+    }
+    return CompiledForest(max_depth=manifest["max_depth"], **arrays)
+
+
+def load_shared_explainer(shared_dir: str, manifest: dict):
+    """
+    Build a TreeExplainer whose dense tree arrays are memory-mapped.
+
+    The explainer is constructed from a one-tree dict model (cheap), then its
+    dense arrays are replaced by the exported ones — the same arrays shap
+    builds from the fitted forest, so the explanations are identical.
+    """
+    import shap
+
+    arrays = {
+        name: np.load(os.path.join(shared_dir, f"shap_{name}.npy"), mmap_mode="r")
+        for name in SHAP_ARRAYS
+    }
+    meta = manifest["shap"]
+
+    n_first = int(arrays["num_nodes"][0])
+    first_tree = {name: np.asarray(arrays[name][0, :n_first]) for name in SHAP_ARRAYS if name != "num_nodes"}
+    explainer = shap.TreeExplainer({
+        "trees": [first_tree],
+        "base_offset": np.asarray(meta["base_offset"]),
+        "tree_output": meta["tree_output"],
+        "objective": meta["objective"],
+        "input_dtype": np.float32,
+        "internal_dtype": np.float64,
+    })
+
+    ensemble = explainer.model
+    for name in SHAP_ARRAYS:
+        setattr(ensemble, name, arrays[name])
+    ensemble.max_depth = meta["max_depth"]
+
+    # Same expected value TreeExplainer derives for tree_path_dependent models
+    explainer.expected_value = ensemble.values[:, 0].sum(0) + ensemble.base_offset
+    return explainer
@@ -0,0 +1,24 @@
+"""Input drift monitoring endpoint."""
+
+from fastapi import APIRouter, HTTPException
+from app.services.drift_monitor import drift_monitor
+
+router = APIRouter()
+
+
+@router.get("/drift")
+async def get_drift_report():
+    """
+    Report drift of live inputs from the training distribution, per feature.
+
+    - psi: Population Stability Index (< 0.1 stable, 0.1–0.25 moderate, ≥ 0.25 significant)
+    - ks: max CDF distance between live and reference histograms
+    Reported for the long window (all buckets) and short window (two newest buckets).
+    """
+    report = drift_monitor.report()
+    if report is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No reference histograms available. Retrain the model to create them.",
+        )
+    return {"success": True, "drift": report}
@@ -0,0 +1,34 @@
+"""Rolling-window feature store endpoints."""
+
+from fastapi import APIRouter, HTTPException
+from app.schemas.request_schemas import TelemetryIngestRequest
+from app.services.feature_store import feature_store, TREND_BASE_FEATURES
+
+router = APIRouter()
+
+
+@router.post("/features/ingest")
+async def ingest_readings(request: TelemetryIngestRequest):
+    """Append telemetry readings to each equipment's rolling window (O(1) per reading)."""
+    stored = 0
+    for reading in request.readings:
+        stored += feature_store.ingest(
+            reading.equipment_id,
+            [getattr(reading, name) for name in TREND_BASE_FEATURES],
+        )
+    return {"success": True, "ingested": stored}
+
+
+@router.get("/features/stats")
+async def get_feature_store_stats():
+    """Return feature store occupancy, memory footprint and counters."""
+    return {"success": True, "store": feature_store.stats()}
+
+
+@router.get("/features/{equipment_id}")
+async def get_equipment_trends(equipment_id: str):
+    """Return rolling mean, EWMA, slope and max per tracked feature for one equipment."""
+    trends = feature_store.trend_features(equipment_id)
+    if trends is None:
+        raise HTTPException(status_code=404, detail=f"No readings recorded for {equipment_id}")
+    return {"success": True, **trends}
@@ -0,0 +1,55 @@
+"""Fleet-wide risk scan endpoint."""
+
+import tempfile
+import threading
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.services.fleet_scan import scan_fleet
+from app.utils.config import FLEET_SCAN_MAX_TOP_K, FLEET_SCAN_MAX_UPLOAD_MB, FLEET_SCAN_TOP_K
+
+router = APIRouter()
+
+# One scan at a time: each one already uses every core
+_scan_lock = threading.Lock()
+
+
+@router.post("/fleet/scan")
+async def scan_fleet_risk(request: Request, top_k: int = Query(default=FLEET_SCAN_TOP_K, ge=1)):
+    """
+    Rank a whole fleet export by failure risk.
+
+    The request body is the raw CSV (e.g. `curl --data-binary @fleet.csv`):
+    an equipment_id column plus the model's feature columns (optional ones
+    default as in /predict). The upload is spooled to a temporary file, then
+    scored in chunks across cores. Returns row / invalid counts, risk-level
+    counts and the `top_k` riskiest machines with full SHAP explanations.
+    """
+    if top_k > FLEET_SCAN_MAX_TOP_K:
+        raise HTTPException(status_code=422, detail=f"top_k must be at most {FLEET_SCAN_MAX_TOP_K}")
+    if not _scan_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A fleet scan is already running", headers={"Retry-After": "30"})
+
+    limit = FLEET_SCAN_MAX_UPLOAD_MB * 2**20
+    try:
+        with tempfile.NamedTemporaryFile(prefix="zyra-fleet-", suffix=".csv") as upload:
+            received = 0
+            async for data in request.stream():
+                received += len(data)
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=f"Fleet file exceeds {FLEET_SCAN_MAX_UPLOAD_MB} MB")
+                upload.write(data)
+            upload.flush()
+            if not received:
+                raise HTTPException(status_code=422, detail="Empty fleet file")
+
+            report = await run_in_threadpool(scan_fleet, upload.name, top_k)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        _scan_lock.release()
+
+    return {"success": True, "scan": report}
@@ -1,6 +1,9 @@
-"""Health check endpoint."""
+"""Health, readiness and startup timing endpoints."""
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.models.model_loader import get_model_version
+from app.utils.startup_report import startup_report
 
 router = APIRouter()
 
@@ -11,3 +14,25 @@ async def health_check():
         "service": "zyra-ml",
         "version": "1.0.0",
     }
+
+
+@router.get("/ready")
+async def readiness_check():
+    """503 until a model is loaded and warmed up (training may still be running)."""
+    report = startup_report.report()
+    ready = report["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "state": report["state"],
+            "model_version": get_model_version(),
+            "error": report["error"],
+        },
+    )
+
+
+@router.get("/startup")
+async def startup_timing():
+    """Time spent in each startup phase and whether start-up met STARTUP_BUDGET_SECONDS."""
+    return {"success": True, "startup": startup_report.report()}
@@ -0,0 +1,112 @@
+"""Model version administration and background training endpoints."""
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Header
+from app.schemas.request_schemas import TrainingJobRequest
+from app.services.model_pool import model_pool
+from app.services.model_registry import model_registry
+from app.services.training_jobs import training_jobs
+from app.utils.config import ADMIN_TOKEN
+
+router = APIRouter()
+
+
+def _check_admin(token: Optional[str]):
+    # Without a configured token nobody may swap, train or cancel models
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: ADMIN_TOKEN is not configured")
+    if not hmac.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
+
+@router.get("/models")
+async def get_model_versions():
+    """
+    Return the active model version, available versions, the last activation,
+    draining bundles and the measured error of the approximate SHAP mode.
+    """
+    return {"success": True, "models": model_registry.status()}
+
+
+@router.get("/models/pool")
+async def get_model_pool():
+    """
+    Return the per-equipment-type model pool: memory budget and resident
+    size, loaded models (most recently used first) with their approximate
+    memory and in-flight requests, available model keys, and load / hit /
+    eviction counters.
+    """
+    return {"success": True, "pool": model_pool.stats()}
+
+
+@router.post("/models/{version}/activate", status_code=202)
+async def activate_model_version(version: str, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Load artifacts/versions/<version>/ in the background, warm it up, then swap it in.
+
+    In-flight requests finish on the previous version, which is evicted after
+    the drain period. Poll GET /models for progress.
+    """
+    _check_admin(x_admin_token)
+    try:
+        job = model_registry.activate(version)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"success": True, "activation": job}
+
+
+@router.post("/models/train", status_code=202)
+async def start_training_job(request: TrainingJobRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Train a new model version (or one equipment type's model) in a separate
+    low-priority process with a bounded number of cores.
+
+    Artifacts are staged and renamed into place, so serving never sees a
+    partial model; with `activate` the new version is activated once
+    training succeeds. Poll GET /models/train/{job_id} for the phase and
+    the trees fitted so far.
+    """
+    _check_admin(x_admin_token)
+    try:
+        job = training_jobs.start(request)
+    except (FileExistsError, RuntimeError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"success": True, "job": job}
+
+
+@router.get("/models/train")
+async def list_training_jobs():
+    """Return the running and recent training jobs, newest first."""
+    return {"success": True, "jobs": training_jobs.list()}
+
+
+@router.get("/models/train/{job_id}")
+async def get_training_job(job_id: str):
+    """
+    Return one training job: state, current phase (load, scale, fit,
+    evaluate, compress, save), trees fitted, seconds per finished phase and,
+    once it succeeded, its evaluation metrics.
+    """
+    try:
+        return {"success": True, "job": training_jobs.get(job_id)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Training job '{job_id}' not found")
+
+
+@router.post("/models/train/{job_id}/cancel", status_code=202)
+async def cancel_training_job(job_id: str, x_admin_token: Optional[str] = Header(default=None)):
+    """Terminate a running training job; its partially written artifacts are deleted."""
+    _check_admin(x_admin_token)
+    try:
+        job = training_jobs.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Training job '{job_id}' not found")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"success": True, "job": job}
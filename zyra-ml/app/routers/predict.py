@@ -1,16 +1,71 @@
-"""Failure prediction endpoint."""
+"""Failure prediction endpoints."""
 
-from fastapi import APIRouter, HTTPException
-from app.schemas.request_schemas import FailurePredictionRequest
-from app.schemas.response_schemas import FailurePredictionResponse
-from app.services.prediction_service import predict_failure
-from app.models.model_loader import get_metrics
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from app.schemas.request_schemas import FailurePredictionRequest, BatchPredictionRequest, WhatIfRequest
+from app.schemas.response_schemas import FailurePredictionResponse, BatchPredictionResponse
+from app.services.prediction_service import predict_failure, predict_failure_batch
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_batcher import prediction_batcher, BatcherSaturated
+from app.services.stream_scoring import score_ndjson_stream
+from app.services.what_if import score_grid
+from app.services.binary_scoring import (
+    ARROW_MEDIA_TYPE,
+    MATRIX_MEDIA_TYPE,
+    RESULT_MEDIA_TYPE,
+    UnsupportedPayload,
+    check_content_type,
+    score_binary,
+)
+from app.services.response_encoding import MEDIA_TYPES, UnsupportedFormat, encode, negotiate
+from app.utils.config import BINARY_BATCH_MAX_MB, MICRO_BATCHING_ENABLED
+from app.models.model_loader import get_metrics, is_model_loaded
+from app.utils.stage_timing import stage_timer
 
 router = APIRouter()
 
 
-@router.post("/predict", response_model=FailurePredictionResponse)
-async def predict_equipment_failure(request: FailurePredictionRequest):
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request body itself.
+
+    The stock class listens for client disconnects on `receive` while
+    streaming, which would steal the request body messages.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+# Alternative representations, listed in the OpenAPI schema next to the JSON model
+_ENCODED_RESPONSES = {200: {"content": {MEDIA_TYPES["compact"]: {}, MEDIA_TYPES["msgpack"]: {}}}}
+
+
+def _response_format(format_param: Optional[str], accept: Optional[str]) -> str:
+    try:
+        return negotiate(format_param, accept)
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
+def _encoded_response(model: BaseModel, fmt: str, include_static: bool) -> Response:
+    """Serialize a response model directly (timed), skipping FastAPI's re-validation."""
+    with stage_timer.stage("serialize"):
+        body = encode(model, fmt, include_static)
+    return Response(content=body, media_type=MEDIA_TYPES[fmt], headers={"Vary": "Accept"})
+
+
+@router.post("/predict", response_model=FailurePredictionResponse, responses=_ENCODED_RESPONSES)
+async def predict_equipment_failure(
+    request: FailurePredictionRequest,
+    format: Optional[str] = Query(default=None, description="json (default), compact or msgpack"),
+    include_static: bool = Query(default=False, description="compact/msgpack: add feature_importance and model_metrics"),
+    accept: Optional[str] = Header(default=None),
+):
     """
     Predict the probability of equipment failure.
 
@@ -19,17 +74,157 @@ async def predict_equipment_failure(request: FailurePredictionRequest):
     - health_score (100 - probability × 100)
     - risk_level (low / medium / high / critical)
     - feature_importance (global RandomForest importance)
-    - shap_explanation (per-prediction SHAP values)
+    - shap_explanation (per-prediction SHAP values; controlled by `explain`:
+      none = probability only, top_k = top `top_k` contributors, full = all features)
     - recommended_actions (SHAP-driven recommendations)
     - model_metrics (accuracy, f1_score, roc_auc)
+
+    Concurrent calls are coalesced into micro-batches and scored off the
+    event loop; a full queue answers 503 with Retry-After.
+
+    `format=compact` (or Accept: application/vnd.zyra.compact+json) returns
+    SHAP values as parallel arrays without descriptions or static metadata;
+    `format=msgpack` (or Accept: application/msgpack) the same as MessagePack.
     """
+    stage_timer.mark("parse")
+    fmt = _response_format(format, accept)
     try:
-        result = predict_failure(request)
-        return result
+        if MICRO_BATCHING_ENABLED:
+            result = await prediction_batcher.submit(request)
+        else:
+            result = await run_in_threadpool(predict_failure, request)
+    except BatcherSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    return _encoded_response(result, fmt, include_static)
+
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse, responses=_ENCODED_RESPONSES)
+async def predict_equipment_failure_batch(
+    request: BatchPredictionRequest,
+    format: Optional[str] = Query(default=None, description="json (default), compact or msgpack"),
+    include_static: bool = Query(default=False, description="compact/msgpack: add feature_importance and model_metrics"),
+    accept: Optional[str] = Header(default=None),
+):
+    """
+    Predict failure for many machines in one call.
+
+    All valid items are scored together as one matrix. Each result carries
+    either a prediction or a per-item error, in the same order as the input.
+
+    In the compact formats each field is one array over the scored items
+    (`index` maps them back to the request) and failures are listed in `errors`.
+    """
+    stage_timer.mark("parse")
+    fmt = _response_format(format, accept)
+    try:
+        result = await run_in_threadpool(predict_failure_batch, request.items)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+    return _encoded_response(result, fmt, include_static)
+
+
+@router.post("/predict/what-if")
+async def predict_what_if(request: WhatIfRequest):
+    """
+    Failure probability over a grid of hypothetical variations of one reading.
+
+    `sweep` varies one or two features of `base`, either over explicit
+    `values` or over `start`/`stop`/`steps`. With `relative=true` these are
+    offsets from the base value, e.g. 0–500 more operating_hours. The whole
+    grid is scored in one vectorized pass. The response holds:
+    - failure_probability: nested as [first feature][second feature]
+    - crossings: every point where the probability crosses a risk-level
+      bound between neighbouring grid points, with the interpolated feature
+      value
+    """
+    try:
+        result = await run_in_threadpool(score_grid, request)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"success": True, "what_if": result}
+
+
+@router.post(
+    "/predict/binary",
+    openapi_extra={"requestBody": {"content": {MATRIX_MEDIA_TYPE: {}, ARROW_MEDIA_TYPE: {}}}},
+    responses={200: {"content": {RESULT_MEDIA_TYPE: {}, ARROW_MEDIA_TYPE: {}}}},
+)
+async def predict_binary(
+    request: Request,
+    model_key: Optional[str] = Query(default=None, pattern=r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$"),
+):
+    """
+    Score a bulk matrix without JSON parsing or per-row validation models.
+
+    Body: a typed little-endian float32/float64 matrix in FEATURE_COLUMNS
+    order behind a 20-byte header with optional equipment IDs
+    (Content-Type: application/vnd.zyra.matrix; layout in
+    app/services/binary_scoring.py), or an Arrow IPC stream with one column
+    per feature (application/vnd.apache.arrow.stream, needs pyarrow).
+
+    Returns the failure probabilities as little-endian float32 in row order
+    (an Arrow stream for Arrow input). Rows outside the schema bounds score
+    NaN; X-Invalid-Rows counts them and X-First-Invalid names the first.
+    """
+    content_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    try:
+        check_content_type(content_type)
+    except UnsupportedPayload as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    limit = BINARY_BATCH_MAX_MB * 2**20
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise HTTPException(status_code=413, detail=f"Payload exceeds {BINARY_BATCH_MAX_MB} MB")
+    body = bytearray()
+    async for data in request.stream():
+        body += data
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail=f"Payload exceeds {BINARY_BATCH_MAX_MB} MB")
+    stage_timer.mark("parse")
+
+    try:
+        result = await run_in_threadpool(score_binary, body, content_type, model_key)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    headers = {
+        "X-Model-Version": str(result["model_version"]),
+        "X-Rows": str(result["rows"]),
+        "X-Invalid-Rows": str(result["invalid"]),
+    }
+    if result["first_invalid"] is not None:
+        headers["X-First-Invalid"] = result["first_invalid"]
+    return Response(content=result["content"], media_type=result["media_type"], headers=headers)
+
+
+@router.post("/predict/stream")
+async def predict_equipment_failure_stream(request: Request, changes_only: bool = False):
+    """
+    Score a newline-delimited JSON stream of readings (FailurePredictionRequest shape).
+
+    Results are streamed back as NDJSON, one line per reading with `index` set
+    to the reading's line number. With `changes_only=true`, a result is only
+    emitted when an equipment's risk_level differs from its previous reading.
+    """
+    if not is_model_loaded():
+        raise HTTPException(status_code=503, detail="Model not loaded. Run the training pipeline first.")
+
+    return _DuplexStreamingResponse(
+        score_ndjson_stream(request.stream(), changes_only=changes_only),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get("/metrics")
@@ -39,3 +234,15 @@ async def get_model_metrics():
     if metrics is None:
         raise HTTPException(status_code=404, detail="No model metrics available. Train the model first.")
     return {"success": True, "metrics": metrics}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Return prediction cache size, limits and hit/miss/eviction counters."""
+    return {"success": True, "cache": prediction_cache.stats()}
+
+
+@router.get("/predict/queue")
+async def get_queue_stats():
+    """Return micro-batching queue depth, batch counts and rejections."""
+    return {"success": True, "enabled": MICRO_BATCHING_ENABLED, "queue": prediction_batcher.stats()}
@@ -0,0 +1,22 @@
+"""Per-stage latency telemetry endpoint (Prometheus text format)."""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.utils.stage_timing import stage_timer
+
+router = APIRouter()
+
+
+@router.get("/telemetry", response_class=PlainTextResponse)
+async def get_stage_telemetry():
+    """
+    Latency histograms for scraping, separate from the model-quality /metrics.
+
+    - zyra_stage_duration_seconds{stage=...}: parse, validation, scale,
+      predict_proba, explainer_build, shap, recommendations, serialize
+    - zyra_http_request_duration_seconds{route=...}: time until the response starts
+    """
+    if not stage_timer.enabled:
+        raise HTTPException(status_code=404, detail="Stage timing is disabled (STAGE_TIMING_ENABLED=false)")
+    return PlainTextResponse(stage_timer.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
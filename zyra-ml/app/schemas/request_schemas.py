@@ -1,10 +1,21 @@
 """Pydantic request schemas."""
 
-from pydantic import BaseModel, Field
+import os
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from app.utils.config import COMPRESSION_MAX_AUC_LOSS, MAX_BATCH_SIZE, TRAINING_JOB_DATA_DIR, WHAT_IF_MAX_POINTS
 
 
 class FailurePredictionRequest(BaseModel):
     equipment_id: str = Field(..., description="Unique equipment identifier")
+    model_key: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$",
+        description="Equipment type whose model scores the reading (artifacts/types/<model_key>/); default model if omitted",
+    )
     operating_hours: float = Field(..., ge=0, description="Total operating hours")
     temperature: float = Field(..., description="Current temperature in Celsius")
     vibration: float = Field(default=0.0, ge=0, description="Vibration level (mm/s)")
@@ -15,6 +26,13 @@ class FailurePredictionRequest(BaseModel):
     rpm: float = Field(default=2500.0, ge=0, description="Rotations per minute")
     humidity: float = Field(default=50.0, ge=0, le=100, description="Ambient humidity %")
     power_consumption: float = Field(default=500.0, ge=0, description="Power consumption (kW)")
+    explain: Literal["none", "top_k", "full"] = Field(
+        default="full", description="SHAP detail: none (probability only), top_k contributors, or full"
+    )
+    top_k: int = Field(default=3, ge=1, description="Number of contributors returned when explain=top_k")
+    shap_mode: Literal["exact", "approximate"] = Field(
+        default="exact", description="exact TreeSHAP, or a faster approximation (error reported by GET /models)"
+    )
 
     class Config:
         json_schema_extra = {
@@ -32,3 +50,166 @@ class FailurePredictionRequest(BaseModel):
                 "power_consumption": 1450.0,
             }
         }
+
+
+def numeric_field_specs(model: type = FailurePredictionRequest) -> Dict[str, dict]:
+    """
+    Default, bounds and integer-ness of each numeric field of `model`, read
+    from its Field() constraints, for validating whole columns at once
+    without building one model per row. `default` is None for required fields.
+    """
+    specs = {}
+    for name, field in model.model_fields.items():
+        if field.annotation not in (int, float):
+            continue
+        spec = {"default": None if field.is_required() else field.default, "integer": field.annotation is int}
+        for constraint in field.metadata:
+            for key in ("ge", "gt", "le", "lt"):
+                if getattr(constraint, key, None) is not None:
+                    spec[key] = getattr(constraint, key)
+        specs[name] = spec
+    return specs
+
+
+def within_field_bounds(values: np.ndarray, spec: dict) -> np.ndarray:
+    """Mask of `values` that are finite and satisfy one numeric_field_specs() entry."""
+    ok = np.isfinite(values)
+    if "ge" in spec:
+        ok &= values >= spec["ge"]
+    if "gt" in spec:
+        ok &= values > spec["gt"]
+    if "le" in spec:
+        ok &= values <= spec["le"]
+    if "lt" in spec:
+        ok &= values < spec["lt"]
+    if spec.get("integer"):
+        ok &= np.mod(values, 1) == 0
+    return ok
+
+
+class BatchPredictionRequest(BaseModel):
+    # Items are validated one by one so a bad item does not reject the whole batch
+    items: List[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description="FailurePredictionRequest payloads"
+    )
+
+
+class SweepAxis(BaseModel):
+    feature: str = Field(..., description="Numeric FailurePredictionRequest field to vary")
+    values: Optional[List[float]] = Field(
+        default=None, min_length=1, description="Explicit values (instead of start/stop/steps)"
+    )
+    start: Optional[float] = Field(default=None, description="First value of an evenly spaced range")
+    stop: Optional[float] = Field(default=None, description="Last value of the range (inclusive)")
+    steps: Optional[int] = Field(default=None, ge=2, description="Number of values in the range")
+    relative: bool = Field(default=False, description="Values are offsets added to the base request's value")
+
+    @model_validator(mode="after")
+    def _values_or_range(self):
+        has_range = (self.start, self.stop, self.steps) != (None, None, None)
+        if (self.values is None) == (not has_range):
+            raise ValueError("Give either values or start/stop/steps")
+        if has_range and None in (self.start, self.stop, self.steps):
+            raise ValueError("A range needs start, stop and steps")
+        return self
+
+    def points(self) -> int:
+        return len(self.values) if self.values is not None else self.steps
+
+
+class WhatIfRequest(BaseModel):
+    base: FailurePredictionRequest = Field(..., description="Reading the hypothetical points start from")
+    sweep: List[SweepAxis] = Field(..., min_length=1, max_length=2, description="One or two features to vary")
+
+    @model_validator(mode="after")
+    def _grid_size(self):
+        features = [axis.feature for axis in self.sweep]
+        if len(set(features)) != len(features):
+            raise ValueError("Each feature can be swept only once")
+        points = 1
+        for axis in self.sweep:
+            points *= axis.points()
+        if points > WHAT_IF_MAX_POINTS:
+            raise ValueError(f"Grid has {points} points; at most {WHAT_IF_MAX_POINTS} are allowed")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "base": FailurePredictionRequest.model_config["json_schema_extra"]["example"],
+                "sweep": [
+                    {"feature": "load_percentage", "start": 40, "stop": 100, "steps": 61},
+                    {"feature": "operating_hours", "start": 0, "stop": 2000, "steps": 41, "relative": True},
+                ],
+            }
+        }
+
+
+class ForestParams(BaseModel):
+    """Forest parameters a training job may override; n_jobs follows the job's cpus."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    n_estimators: int = Field(default=None, ge=1, le=2000, strict=True, description="Trees in the forest")
+    max_depth: Optional[int] = Field(default=None, ge=1, le=64, strict=True, description="Tree depth limit (null: unlimited)")
+    min_samples_split: int = Field(default=None, ge=2, le=10_000, strict=True)
+    min_samples_leaf: int = Field(default=None, ge=1, le=10_000, strict=True)
+    max_features: Union[Literal["sqrt", "log2"], Annotated[float, Field(gt=0, le=1)]] = Field(
+        default=None, description="Features tried per split: sqrt, log2 or a fraction"
+    )
+    random_state: int = Field(default=None, ge=0, le=2**32 - 1, strict=True)
+
+
+class TrainingJobRequest(BaseModel):
+    version: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$",
+        description="New version to train into artifacts/versions/<version>/ (default: train-<timestamp>)",
+    )
+    model_key: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$",
+        description="Retrain this equipment type's model (artifacts/types/<model_key>/) instead of a version",
+    )
+    data_path: Optional[str] = Field(
+        default=None,
+        description="CSV or sharded_generator directory inside TRAINING_JOB_DATA_DIR (default: machine_data.csv)",
+    )
+    trend_features: bool = Field(default=False, description="Add rolling trend features")
+    model_params: Optional[ForestParams] = Field(default=None, description="Overrides of the forest parameters")
+    compress: bool = Field(default=False, description="Also save a compact serving model")
+    max_auc_loss: float = Field(default=COMPRESSION_MAX_AUC_LOSS, ge=0, description="Largest ROC AUC drop of the compact model")
+    cpus: Optional[int] = Field(default=None, ge=1, description="Cores for the forest fit (default: TRAINING_JOB_CPUS)")
+    nice: Optional[int] = Field(default=None, ge=0, le=19, description="Niceness of the training process (default: TRAINING_JOB_NICE)")
+    activate: bool = Field(default=False, description="Activate the new version once training succeeds")
+
+    @field_validator("data_path")
+    @classmethod
+    def _inside_data_dir(cls, value):
+        if value is None:
+            return None
+        root = os.path.realpath(TRAINING_JOB_DATA_DIR)
+        path = os.path.realpath(os.path.join(root, value))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"data_path must be inside the training data directory ({TRAINING_JOB_DATA_DIR})")
+        return path
+
+    @model_validator(mode="after")
+    def _target(self):
+        if self.version and self.model_key:
+            raise ValueError("Give either version or model_key, not both")
+        if self.activate and self.model_key:
+            raise ValueError("activate applies to versions; a model_key's model is served as soon as it is saved")
+        return self
+
+
+class TelemetryReading(BaseModel):
+    equipment_id: str = Field(..., description="Unique equipment identifier")
+    temperature: float = Field(..., allow_inf_nan=False, description="Temperature in Celsius")
+    vibration: float = Field(..., ge=0, allow_inf_nan=False, description="Vibration level (mm/s)")
+    pressure: float = Field(..., ge=0, allow_inf_nan=False, description="Operating pressure (PSI)")
+    power_consumption: float = Field(..., ge=0, allow_inf_nan=False, description="Power consumption (kW)")
+
+
+class TelemetryIngestRequest(BaseModel):
+    readings: List[TelemetryReading] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
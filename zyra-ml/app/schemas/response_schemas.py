@@ -1,7 +1,7 @@
 """Pydantic response schemas."""
 
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 class FeatureExplanation(BaseModel):
@@ -22,6 +22,7 @@ class FailurePredictionResponse(BaseModel):
     shap_explanation: List[FeatureExplanation]  # per-prediction SHAP
     recommended_actions: List[str]
     model_metrics: Dict  # accuracy, f1, roc_auc
+    model_version: Optional[str] = None  # artifact version that produced the prediction
 
     class Config:
         json_schema_extra = {
@@ -54,5 +55,21 @@ class FailurePredictionResponse(BaseModel):
                     "f1_score": 0.88,
                     "roc_auc": 0.94,
                 },
+                "model_version": "2024-06-01",
             }
         }
+
+
+class BatchPredictionItem(BaseModel):
+    index: int  # position in the submitted batch
+    equipment_id: Optional[str] = None
+    success: bool
+    prediction: Optional[FailurePredictionResponse] = None
+    error: Optional[str] = None
+
+
+class BatchPredictionResponse(BaseModel):
+    success: bool  # True only if every item was scored
+    count: int
+    failed: int
+    results: List[BatchPredictionItem]  # same order as the request items
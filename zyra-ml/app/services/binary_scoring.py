@@ -0,0 +1,204 @@
+"""
+Binary Batch Scoring
+─────────────────────
+Bulk scoring without JSON: the request body is wrapped as a NumPy matrix
+in place (np.frombuffer, no per-row objects), checked column-wise against
+the FailurePredictionRequest constraints, scored in one pass and answered
+with the probabilities as a binary array.
+
+Matrix payload (application/vnd.zyra.matrix), little-endian:
+
+    offset  bytes  field
+    0       4      magic b"ZYRM"
+    4       1      format version (1)
+    5       1      value width: 4 = float32, 8 = float64
+    6       2      reserved (0)
+    8       4      rows (uint32)
+    12      4      columns (uint32), equal to the model's feature count
+    16      4      byte length of the equipment ID block (0 = no IDs)
+    20      …      equipment IDs: UTF-8, one per row, newline-separated
+    …       …      zero padding to a multiple of 8 bytes
+    …       …      rows × columns values, row-major, in FEATURE_COLUMNS order
+
+The response is `rows` little-endian float32 failure probabilities in
+request order (application/octet-stream). A row that violates the schema
+bounds, including NaN in any column, gets NaN instead. Missing optional
+fields are not filled with defaults.
+
+Arrow IPC streams (application/vnd.apache.arrow.stream) carry one column per
+feature, by name, plus an optional equipment_id column. The response is an
+Arrow stream with equipment_id (when given) and failure_probability. Arrow
+needs pyarrow (listed in requirements.txt); an install without it refuses
+the format (415).
+
+float32 values are widened to float64 before scaling, so a row scores
+exactly as the same values do through /predict. Bulk scores do not feed the
+drift monitor, the prediction cache or the feature store.
+"""
+
+import json
+import struct
+import importlib.util
+
+import numpy as np
+
+from app.schemas.request_schemas import numeric_field_specs, within_field_bounds
+from app.services.feature_store import TREND_FEATURE_COLUMNS
+from app.services.prediction_service import use_model
+from app.utils.stage_timing import stage_timer
+
+# pyarrow is imported on the first Arrow request: it adds ~0.3 s to service startup
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+MATRIX_MEDIA_TYPE = "application/vnd.zyra.matrix"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+RESULT_MEDIA_TYPE = "application/octet-stream"
+
+MAGIC = b"ZYRM"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBBHIII")
+VALUE_DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+ID_COLUMN = "equipment_id"
+
+
+class UnsupportedPayload(Exception):
+    """Raised for a content type this endpoint cannot decode (or whose package is not installed)."""
+
+
+def check_content_type(content_type: str):
+    """Raise UnsupportedPayload unless `content_type` can be decoded here."""
+    if content_type not in (MATRIX_MEDIA_TYPE, ARROW_MEDIA_TYPE):
+        raise UnsupportedPayload(f"Content-Type must be {MATRIX_MEDIA_TYPE} or {ARROW_MEDIA_TYPE}")
+    if content_type == ARROW_MEDIA_TYPE and not HAS_PYARROW:
+        raise UnsupportedPayload("Arrow input needs the pyarrow package, which is not installed")
+
+
+def encode_matrix(X: np.ndarray, equipment_ids: list = None) -> bytes:
+    """Build a matrix payload from an (n_rows, n_features) float32 or float64 array (clients, benchmarks)."""
+    X = np.ascontiguousarray(X, dtype=VALUE_DTYPES[8 if X.dtype == np.float64 else 4])
+    ids = "\n".join(equipment_ids).encode("utf-8") if equipment_ids else b""
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, X.dtype.itemsize, 0, X.shape[0], X.shape[1], len(ids))
+    padding = b"\0" * (-(len(header) + len(ids)) % 8)
+    return header + ids + padding + X.tobytes()
+
+
+def decode_matrix(body, n_features: int) -> tuple:
+    """
+    (matrix view over `body`, equipment IDs or None). Raises ValueError for
+    a malformed payload. The matrix is not a copy and is read-only when
+    `body` is bytes.
+    """
+    if len(body) < HEADER.size:
+        raise ValueError(f"Payload is shorter than the {HEADER.size}-byte header")
+    magic, version, width, _, rows, columns, ids_length = HEADER.unpack_from(body)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} matrix payload (expected magic {MAGIC!r})")
+    if width not in VALUE_DTYPES:
+        raise ValueError(f"Value width must be 4 (float32) or 8 (float64), got {width}")
+    if columns != n_features:
+        raise ValueError(f"Matrix has {columns} columns; the model expects {n_features}")
+
+    offset = HEADER.size + ids_length
+    offset += -offset % 8
+    expected = offset + rows * columns * width
+    if len(body) != expected:
+        raise ValueError(f"Payload is {len(body)} bytes; the header describes {expected}")
+
+    equipment_ids = None
+    if ids_length:
+        equipment_ids = bytes(body[HEADER.size : HEADER.size + ids_length]).decode("utf-8").split("\n")
+        if len(equipment_ids) != rows:
+            raise ValueError(f"ID block holds {len(equipment_ids)} equipment IDs for {rows} rows")
+
+    X = np.frombuffer(body, dtype=VALUE_DTYPES[width], count=rows * columns, offset=offset)
+    return X.reshape(rows, columns), equipment_ids
+
+
+def decode_arrow(body, feature_names: list) -> tuple:
+    """(n_rows, n_features) matrix and equipment IDs (or None) from an Arrow IPC stream."""
+    import pyarrow
+    import pyarrow.ipc
+
+    try:
+        table = pyarrow.ipc.open_stream(pyarrow.py_buffer(body)).read_all()
+    except pyarrow.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow stream: {e}")
+
+    missing = [name for name in feature_names if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Arrow stream is missing feature columns: {', '.join(missing)}")
+    # Columns are contiguous per feature; the row-major matrix needs one copy. Nulls become NaN.
+    X = np.empty((table.num_rows, len(feature_names)))
+    for j, name in enumerate(feature_names):
+        X[:, j] = table.column(name).to_numpy(zero_copy_only=False)
+    equipment_ids = table.column(ID_COLUMN).to_pylist() if ID_COLUMN in table.column_names else None
+    return X, equipment_ids
+
+
+def encode_arrow(probabilities: np.ndarray, equipment_ids: list = None) -> bytes:
+    import pyarrow
+    import pyarrow.ipc
+
+    columns = {"failure_probability": pyarrow.array(probabilities)}
+    if equipment_ids is not None:
+        columns = {ID_COLUMN: pyarrow.array(equipment_ids, pyarrow.string()), **columns}
+    table = pyarrow.table(columns)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def score_binary(body, content_type: str, model_key: str = None) -> dict:
+    """
+    Decode, validate and score a matrix or Arrow payload.
+
+    Returns the encoded response body and its media type, the model version,
+    the row count and the invalid rows (count and the first one).
+    """
+    with use_model(model_key) as bundle:
+        feature_names = bundle.feature_names
+        if any(name in TREND_FEATURE_COLUMNS for name in feature_names):
+            raise ValueError("Binary scoring needs a model without trend features (rows carry no reading history)")
+
+        check_content_type(content_type)
+        with stage_timer.stage("decode"):
+            if content_type == MATRIX_MEDIA_TYPE:
+                X, equipment_ids = decode_matrix(body, len(feature_names))
+            else:
+                X, equipment_ids = decode_arrow(body, feature_names)
+            if not X.shape[0]:
+                raise ValueError("Payload has no rows")
+
+            specs = numeric_field_specs()
+            valid = np.ones(X.shape[0], dtype=bool)
+            for j, name in enumerate(feature_names):
+                valid &= within_field_bounds(X[:, j], specs.get(name, {}))
+
+        probabilities = np.full(X.shape[0], np.nan, dtype="<f4")
+        if valid.all():
+            _, probabilities[:] = bundle.score(X.astype(np.float64, copy=False))
+        elif valid.any():
+            _, probabilities[valid] = bundle.score(X[valid].astype(np.float64, copy=False))
+
+        invalid_rows = np.flatnonzero(~valid)
+        first_invalid = None
+        if len(invalid_rows):
+            row = int(invalid_rows[0])
+            # JSON-quoted, so any equipment ID fits an ASCII response header
+            first_invalid = f"{row} {json.dumps(str(equipment_ids[row]))}" if equipment_ids else str(row)
+
+        with stage_timer.stage("serialize"):
+            if content_type == ARROW_MEDIA_TYPE:
+                content, media_type = encode_arrow(probabilities, equipment_ids), ARROW_MEDIA_TYPE
+            else:
+                content, media_type = probabilities.tobytes(), RESULT_MEDIA_TYPE
+
+        return {
+            "content": content,
+            "media_type": media_type,
+            "model_version": bundle.version,
+            "rows": int(X.shape[0]),
+            "invalid": int(len(invalid_rows)),
+            "first_invalid": first_invalid,
+        }
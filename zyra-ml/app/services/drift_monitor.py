@@ -0,0 +1,154 @@
+"""
+Drift Monitor
+──────────────
+Compares live prediction inputs with the training distribution.
+
+- The reference is the per-feature quantile histogram saved by the training
+  pipeline (reference_histograms.json)
+- Live inputs are binned on the same edges and counted into a ring of
+  `n_buckets` sub-windows of `bucket_size` observations each; nothing but
+  counts is stored, and each observation costs one broadcast comparison
+- Drift is reported per feature as PSI and a binned KS statistic over the
+  long window (all buckets) and the short window (the two newest buckets)
+"""
+
+import threading
+
+import numpy as np
+
+from app.models.model_loader import get_model_version, get_reference_histograms
+from app.utils.config import DRIFT_BUCKET_SIZE, DRIFT_BUCKETS
+
+# Smoothing so empty bins do not produce infinite PSI
+_EPSILON = 1e-4
+
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+class DriftMonitor:
+    """Sliding-window live histograms against the training reference."""
+
+    def __init__(self, bucket_size: int, n_buckets: int):
+        self.bucket_size = max(1, bucket_size)
+        self.n_buckets = max(2, n_buckets)
+        self._lock = threading.Lock()
+        self._version = None
+        self._reset(None)
+
+    def observe(self, X_raw: np.ndarray, feature_names: list):
+        """Add a batch of raw feature rows (columns in `feature_names` order)."""
+        with self._lock:
+            self._check_version()
+            if self.features is None or len(X_raw) == 0:
+                return
+
+            columns = self._columns.get(tuple(feature_names))
+            if columns is None:
+                columns = np.array([feature_names.index(name) for name in self.features])
+                self._columns[tuple(feature_names)] = columns
+
+            X = np.asarray(X_raw, dtype=float)[:, columns]
+            start = 0
+            while start < len(X):
+                room = self.bucket_size - self._filled
+                chunk = X[start:start + room]
+                # Bin every feature at once: count edges <= value (padded edges are +inf)
+                bins = (chunk[:, :, None] >= self._edges[None, :, :]).sum(axis=2)
+                flat = (bins + self._offsets).ravel()
+                self._counts[self._current] += np.bincount(flat, minlength=self._counts[0].size).reshape(
+                    self._counts[0].shape
+                )
+                self._filled += len(chunk)
+                self.observed += len(chunk)
+                start += len(chunk)
+
+                if self._filled == self.bucket_size:
+                    self._current = (self._current + 1) % self.n_buckets
+                    self._counts[self._current] = 0
+                    self._filled = 0
+
+    def report(self) -> dict:
+        """Return PSI / KS drift per feature for the long and short windows."""
+        with self._lock:
+            self._check_version()
+            if self.features is None:
+                return None
+
+            previous = (self._current - 1) % self.n_buckets
+            windows = {
+                "long": self._counts.sum(axis=0),
+                "short": self._counts[self._current] + self._counts[previous],
+            }
+            observed = self.observed
+
+        report = {
+            "model_version": self._version,
+            "observed": observed,
+            "bucket_size": self.bucket_size,
+            "buckets": self.n_buckets,
+            "windows": {},
+        }
+        for window, counts in windows.items():
+            features = {}
+            for i, name in enumerate(self.features):
+                n_bins = self._n_bins[i]
+                live = counts[i, :n_bins]
+                features[name] = _compare(self._reference[i, :n_bins], live)
+            report["windows"][window] = {
+                "samples": int(counts[0].sum()),
+                "features": features,
+            }
+        return report
+
+    def _check_version(self):
+        # A reloaded model comes with its own reference distribution
+        version = get_model_version()
+        if version != self._version:
+            self._version = version
+            self._reset(get_reference_histograms())
+
+    def _reset(self, reference):
+        self.observed = 0
+        self._columns = {}
+        self._current = 0
+        self._filled = 0
+        if not reference:
+            self.features = None
+            return
+
+        self.features = list(reference["features"])
+        n_features = len(self.features)
+        edges = [reference["features"][name]["edges"] for name in self.features]
+        max_bins = max(len(e) for e in edges) + 1
+
+        self._n_bins = [len(e) + 1 for e in edges]
+        self._edges = np.full((n_features, max_bins - 1), np.inf)
+        self._reference = np.zeros((n_features, max_bins))
+        for i, name in enumerate(self.features):
+            self._edges[i, :len(edges[i])] = edges[i]
+            self._reference[i, :self._n_bins[i]] = reference["features"][name]["counts"]
+        self._offsets = np.arange(n_features) * max_bins
+        self._counts = np.zeros((self.n_buckets, n_features, max_bins), dtype=np.int64)
+
+
+def _compare(reference: np.ndarray, live: np.ndarray) -> dict:
+    total = live.sum()
+    if total == 0:
+        return {"psi": None, "ks": None, "status": "no_data"}
+
+    expected = reference / reference.sum()
+    actual = live / total
+    psi = float(np.sum((actual - expected) * np.log((actual + _EPSILON) / (expected + _EPSILON))))
+    ks = float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected))))
+
+    if psi >= PSI_SIGNIFICANT:
+        status = "significant"
+    elif psi >= PSI_MODERATE:
+        status = "moderate"
+    else:
+        status = "stable"
+    return {"psi": round(psi, 4), "ks": round(ks, 4), "status": status}
+
+
+drift_monitor = DriftMonitor(bucket_size=DRIFT_BUCKET_SIZE, n_buckets=DRIFT_BUCKETS)
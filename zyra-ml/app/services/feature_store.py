@@ -0,0 +1,226 @@
+"""
+Feature Store
+──────────────
+In-memory rolling-window statistics per equipment_id.
+
+All state lives in preallocated NumPy arrays indexed by an equipment slot, so
+memory per equipment is fixed (`window` float32 readings plus a handful of
+float64 running sums per tracked feature) and independent of history length.
+
+Each reading is ingested in O(1):
+- rolling mean  — running window sum
+- EWMA          — ewma = α·x + (1 − α)·ewma  (pandas ewm(adjust=False))
+- slope         — least-squares slope over the window, from running Σy and Σt·y
+                  with t re-based to the window start on every shift
+- max           — running max, rescanned over the window (not the history)
+                  only when the current max leaves the window
+
+When more equipment reports than `capacity` slots, the least recently
+updated equipment is evicted. Readings with a value that is not finite as
+float32 (NaN, ±inf, or beyond float32 range) are rejected: one would poison
+the running sums and EWMA of that equipment for good.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from app.utils.config import (
+    FEATURE_STORE_CAPACITY,
+    FEATURE_STORE_WINDOW,
+    FEATURE_STORE_EWMA_ALPHA,
+)
+
+TREND_BASE_FEATURES = ["temperature", "vibration", "pressure", "power_consumption"]
+TREND_STATS = ["mean", "ewma", "slope", "max"]
+TREND_FEATURE_COLUMNS = [f"{feature}_{stat}" for feature in TREND_BASE_FEATURES for stat in TREND_STATS]
+
+# Running sums are rebuilt from the ring after this many full window turns to cancel float drift
+_RESYNC_TURNS = 256
+
+
+class FeatureStore:
+    """Fixed-memory ring buffers with incremental trend statistics per equipment."""
+
+    def __init__(self, capacity: int, window: int, alpha: float, features: list = None):
+        self.features = list(features or TREND_BASE_FEATURES)
+        self.capacity = capacity
+        self.window = window
+        self.alpha = alpha
+
+        n_features = len(self.features)
+        self._ring = np.zeros((capacity, window, n_features), dtype=np.float32)
+        self._count = np.zeros(capacity, dtype=np.int64)  # readings ever ingested per slot
+        self._sum_y = np.zeros((capacity, n_features))
+        self._sum_ty = np.zeros((capacity, n_features))
+        self._ewma = np.zeros((capacity, n_features))
+        self._max = np.zeros((capacity, n_features))
+        self._last_seen = np.zeros(capacity)
+
+        self._slots = {}  # equipment_id -> slot
+        self._ids = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        self.ingested = 0
+        self.skipped_duplicates = 0
+        self.rejected_non_finite = 0
+        self.evictions = 0
+
+    # ─── Ingestion ───────────────────────────────────────────────────
+    def ingest(self, equipment_id: str, values, skip_duplicates: bool = False) -> bool:
+        """
+        Add one reading (values in `self.features` order).
+
+        With `skip_duplicates`, a reading identical to the equipment's previous
+        one is ignored (pollers resend unchanged readings). Returns True if the
+        reading was stored; non-finite readings are not.
+        """
+        with np.errstate(over="ignore"):
+            y = np.asarray(values, dtype=np.float32)
+        if not np.isfinite(y).all():
+            with self._lock:
+                self.rejected_non_finite += 1
+            return False
+        with self._lock:
+            slot = self._slot_for(equipment_id)
+            count = int(self._count[slot])
+            window = self.window
+
+            if skip_duplicates and count and np.array_equal(self._ring[slot, (count - 1) % window], y):
+                self.skipped_duplicates += 1
+                return False
+
+            y64 = y.astype(np.float64)
+            n = min(count, window)
+            position = count % window
+
+            if count == 0:
+                self._ewma[slot] = y64
+                self._max[slot] = y64
+            else:
+                self._ewma[slot] += self.alpha * (y64 - self._ewma[slot])
+                np.maximum(self._max[slot], y64, out=self._max[slot])
+
+            if n == window:
+                # Drop the oldest reading (t = 0), then shift remaining t down by one
+                oldest = self._ring[slot, position].astype(np.float64)
+                self._sum_y[slot] -= oldest
+                self._sum_ty[slot] -= self._sum_y[slot]
+                n -= 1
+                max_evicted = (oldest >= self._max[slot]) & (oldest > y64)
+            else:
+                max_evicted = None
+
+            self._ring[slot, position] = y
+            self._sum_y[slot] += y64
+            self._sum_ty[slot] += n * y64
+            self._count[slot] = count + 1
+            self._last_seen[slot] = time.monotonic()
+
+            if max_evicted is not None and max_evicted.any():
+                self._max[slot] = self._ring[slot].max(axis=0)
+            if count and count % (window * _RESYNC_TURNS) == 0:
+                self._resync(slot)
+
+            self.ingested += 1
+            return True
+
+    # ─── Queries ─────────────────────────────────────────────────────
+    def trend_vector(self, equipment_id: str):
+        """Return the statistics in TREND_FEATURE_COLUMNS order, or None if unknown."""
+        with self._lock:
+            slot = self._slots.get(equipment_id)
+            if slot is None:
+                return None
+            return self._stats(slot).reshape(-1)
+
+    def trend_features(self, equipment_id: str):
+        """Return {feature: {mean, ewma, slope, max}} plus reading counts, or None if unknown."""
+        with self._lock:
+            slot = self._slots.get(equipment_id)
+            if slot is None:
+                return None
+            stats = self._stats(slot)
+            count = int(self._count[slot])
+
+        return {
+            "equipment_id": equipment_id,
+            "readings": count,
+            "window_size": min(count, self.window),
+            "features": {
+                feature: {stat: round(float(stats[i, j]), 6) for j, stat in enumerate(TREND_STATS)}
+                for i, feature in enumerate(self.features)
+            },
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "equipment": len(self._slots),
+                "capacity": self.capacity,
+                "window": self.window,
+                "ewma_alpha": self.alpha,
+                "features": self.features,
+                "memory_bytes": self.memory_bytes,
+                "bytes_per_equipment": self.memory_bytes // self.capacity if self.capacity else 0,
+                "ingested": self.ingested,
+                "skipped_duplicates": self.skipped_duplicates,
+                "rejected_non_finite": self.rejected_non_finite,
+                "evictions": self.evictions,
+            }
+
+    @property
+    def memory_bytes(self) -> int:
+        arrays = (self._ring, self._count, self._sum_y, self._sum_ty, self._ewma, self._max, self._last_seen)
+        return int(sum(a.nbytes for a in arrays))
+
+    # ─── Internals (caller holds the lock) ───────────────────────────
+    def _stats(self, slot: int) -> np.ndarray:
+        """(n_features, len(TREND_STATS)) matrix for one slot."""
+        n = min(int(self._count[slot]), self.window)
+        mean = self._sum_y[slot] / n
+        if n > 1:
+            sum_t = n * (n - 1) / 2
+            sum_tt = (n - 1) * n * (2 * n - 1) / 6
+            slope = (n * self._sum_ty[slot] - sum_t * self._sum_y[slot]) / (n * sum_tt - sum_t ** 2)
+        else:
+            slope = np.zeros(len(self.features))
+        return np.stack([mean, self._ewma[slot], slope, self._max[slot]], axis=1)
+
+    def _slot_for(self, equipment_id: str) -> int:
+        slot = self._slots.get(equipment_id)
+        if slot is not None:
+            return slot
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            # Evict the least recently updated equipment
+            slot = int(np.argmin(self._last_seen))
+            del self._slots[self._ids[slot]]
+            self.evictions += 1
+
+        self._slots[equipment_id] = slot
+        self._ids[slot] = equipment_id
+        self._count[slot] = 0
+        self._sum_y[slot] = 0.0
+        self._sum_ty[slot] = 0.0
+        return slot
+
+    def _resync(self, slot: int):
+        count = int(self._count[slot])
+        n = min(count, self.window)
+        # Ring positions ordered oldest → newest
+        order = (np.arange(count - n, count)) % self.window
+        window_values = self._ring[slot, order].astype(np.float64)
+        self._sum_y[slot] = window_values.sum(axis=0)
+        self._sum_ty[slot] = (np.arange(n)[:, None] * window_values).sum(axis=0)
+
+
+feature_store = FeatureStore(
+    capacity=FEATURE_STORE_CAPACITY,
+    window=FEATURE_STORE_WINDOW,
+    alpha=FEATURE_STORE_EWMA_ALPHA,
+)
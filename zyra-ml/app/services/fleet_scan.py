@@ -0,0 +1,237 @@
+"""
+Fleet Scan
+───────────
+Ranks a whole fleet export (CSV, one row per machine) by failure risk.
+
+- The CSV is read in chunks of `chunk_size` rows; chunks are scored in
+  parallel by a process pool whose workers load the same model version as
+  the caller (cheap with memory-mapped artifacts)
+- At most two chunks per worker are in flight, and only a bounded top-K heap
+  plus risk-level counts are kept, so memory stays flat however large the
+  file is
+- Rows are validated column-wise against the FailurePredictionRequest
+  constraints (missing optional columns take the schema defaults); invalid
+  rows are counted and skipped
+- Full SHAP explanations are computed only for the final top-K machines
+
+Fleet scans do not feed the drift monitor or the prediction cache.
+
+    python -m app.services.fleet_scan fleet.csv [--top-k 50] [--workers 4] [--out report.json]
+"""
+
+import os
+import time
+import heapq
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from app.models.model_loader import ModelBundle, use_bundle
+from app.schemas.request_schemas import FailurePredictionRequest, numeric_field_specs, within_field_bounds
+from app.services.feature_store import TREND_FEATURE_COLUMNS
+from app.services.prediction_service import classify_risk, predict_matrix
+from app.utils.config import FLEET_SCAN_CHUNK_SIZE, FLEET_SCAN_TOP_K, FLEET_SCAN_WORKERS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ID_COLUMN = "equipment_id"
+RISK_LEVELS = ("low", "medium", "high", "critical")
+# Line numbers of invalid rows reported back (the count is always exact)
+MAX_REPORTED_INVALID = 20
+
+# Worker-side model bundle, loaded by _init_worker
+_worker_bundle = None
+
+
+def scan_fleet(
+    path: str,
+    top_k: int = FLEET_SCAN_TOP_K,
+    chunk_size: int = FLEET_SCAN_CHUNK_SIZE,
+    workers: int = FLEET_SCAN_WORKERS,
+) -> dict:
+    """Score every machine in the CSV at `path`; return counts and the top-K with full SHAP."""
+    start = time.perf_counter()
+    workers = workers or os.cpu_count()
+
+    with use_bundle() as bundle:
+        if any(name in TREND_FEATURE_COLUMNS for name in bundle.feature_names):
+            raise ValueError("Fleet scans need a model without trend features (rows carry no reading history)")
+        # Imported here: pandas adds ~0.4 s to service startup, and only scans need it
+        import pandas as pd
+
+        header = pd.read_csv(path, nrows=0).columns
+        _check_columns(header, bundle.feature_names)
+
+        heap = []  # (probability, -line, equipment_id, raw feature row) — smallest first
+        totals = {"rows": 0, "invalid": 0, "risk_counts": dict.fromkeys(RISK_LEVELS, 0)}
+        invalid_lines = []
+
+        def merge(result):
+            totals["rows"] += result["rows"]
+            totals["invalid"] += len(result["invalid_lines"])
+            invalid_lines.extend(result["invalid_lines"][: MAX_REPORTED_INVALID - len(invalid_lines)])
+            for level, count in result["risk_counts"].items():
+                totals["risk_counts"][level] += count
+            for entry in result["top"]:
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        chunks = _numbered_chunks(path, chunk_size)
+        if workers <= 1:
+            for first_line, df in chunks:
+                merge(_score_chunk(bundle, df, first_line, top_k))
+        else:
+            # spawn: the API process is multi-threaded, which fork does not mix well with
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(bundle.directory, bundle.name),
+            ) as pool:
+                in_flight = []
+                for first_line, df in chunks:
+                    in_flight.append(pool.submit(_score_chunk_in_worker, df, first_line, top_k))
+                    if len(in_flight) >= 2 * workers:
+                        merge(in_flight.pop(0).result())
+                for future in in_flight:
+                    merge(future.result())
+
+        # ─── Full SHAP for the top-K only ─────────────────────────────
+        ranked = sorted(heap, reverse=True)
+        requests = [
+            FailurePredictionRequest(
+                equipment_id=equipment_id,
+                explain="full",
+                **{name: float(value) for name, value in zip(bundle.feature_names, row)},
+            )
+            for _, _, equipment_id, row in ranked
+        ]
+        top = predict_matrix(bundle, requests, np.array([row for *_, row in ranked])) if ranked else []
+
+        return {
+            "model_version": bundle.version,
+            "rows": totals["rows"],
+            "scored": totals["rows"] - totals["invalid"],
+            "invalid": totals["invalid"],
+            "invalid_lines": invalid_lines,
+            "risk_counts": totals["risk_counts"],
+            "top_k": top,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+
+def _check_columns(header, feature_names: list):
+    specs = numeric_field_specs()
+    missing = [ID_COLUMN] if ID_COLUMN not in header else []
+    missing += [name for name in feature_names if name not in header and specs.get(name, {}).get("default") is None]
+    if missing:
+        raise ValueError(f"Fleet file is missing required columns: {', '.join(missing)}")
+
+
+def _numbered_chunks(path: str, chunk_size: int):
+    """(line number of the chunk's first row, DataFrame) — line 1 is the header."""
+    import pandas as pd
+
+    first_line = 2
+    for df in pd.read_csv(path, chunksize=chunk_size, dtype={ID_COLUMN: str}):
+        yield first_line, df
+        first_line += len(df)
+
+
+def _init_worker(directory: str, name: str):
+    global _worker_bundle
+    bundle = ModelBundle(directory, name)
+    if not bundle.load():
+        raise RuntimeError(f"No trained model in {directory}")
+    _worker_bundle = bundle
+
+
+def _score_chunk_in_worker(df: "pd.DataFrame", first_line: int, top_k: int) -> dict:
+    return _score_chunk(_worker_bundle, df, first_line, top_k)
+
+
+def _score_chunk(bundle: ModelBundle, df: "pd.DataFrame", first_line: int, top_k: int) -> dict:
+    """Validate and score one chunk; return its counts and its own top-K candidates."""
+    X_raw, valid = _feature_matrix(df, bundle.feature_names)
+    lines = first_line + np.arange(len(df))
+    result = {
+        "rows": len(df),
+        "invalid_lines": lines[~valid].tolist(),
+        "risk_counts": dict.fromkeys(RISK_LEVELS, 0),
+        "top": [],
+    }
+    if not valid.any():
+        return result
+
+    X_raw, lines = X_raw[valid], lines[valid]
+    equipment_ids = df[ID_COLUMN].to_numpy()[valid]
+    _, probabilities = bundle.score(X_raw)
+    levels, counts = np.unique(classify_risk(probabilities), return_counts=True)
+    result["risk_counts"].update({str(level): int(count) for level, count in zip(levels, counts)})
+
+    k = min(top_k, len(probabilities))
+    best = np.argpartition(-probabilities, k - 1)[:k] if k else []
+    result["top"] = [
+        (round(float(probabilities[i]), 6), -int(lines[i]), str(equipment_ids[i]), X_raw[i].tolist()) for i in best
+    ]
+    return result
+
+
+def _feature_matrix(df: "pd.DataFrame", feature_names: list) -> tuple:
+    """(n_rows, n_features) float matrix and a mask of rows that satisfy the request schema."""
+    import pandas as pd
+
+    specs = numeric_field_specs()
+    X = np.empty((len(df), len(feature_names)))
+    valid = df[ID_COLUMN].notna().to_numpy()
+
+    for j, name in enumerate(feature_names):
+        spec = specs.get(name, {})
+        if name in df.columns:
+            column = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+            if spec.get("default") is not None:
+                column = np.where(np.isnan(column), spec["default"], column)
+        else:
+            column = np.full(len(df), spec["default"], dtype=float)
+
+        valid &= within_field_bounds(column, spec)
+        X[:, j] = column
+    return X, valid
+
+
+# Run standalone
+if __name__ == "__main__":
+    import json
+
+    from app.models.model_loader import load_model
+    # Through the imported module, so spawned workers can find the worker functions
+    from app.services import fleet_scan
+
+    parser = argparse.ArgumentParser(description="Rank a fleet export by failure risk")
+    parser.add_argument("path", help="CSV with equipment_id and the model's feature columns")
+    parser.add_argument("--top-k", type=int, default=FLEET_SCAN_TOP_K)
+    parser.add_argument("--chunk-size", type=int, default=FLEET_SCAN_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=FLEET_SCAN_WORKERS, help="processes (0 = CPU count)")
+    parser.add_argument("--out", help="write the full report (with SHAP) as JSON")
+    args = parser.parse_args()
+
+    if not load_model():
+        raise SystemExit("Train the model first: python -m app.ml.training_pipeline")
+    report = fleet_scan.scan_fleet(args.path, top_k=args.top_k, chunk_size=args.chunk_size, workers=args.workers)
+
+    print(f"\n📊 {report['scored']} machines scored ({report['invalid']} invalid rows) in {report['seconds']}s")
+    print(f"   Risk levels: {report['risk_counts']}")
+    for rank, prediction in enumerate(report["top_k"], 1):
+        drivers = ", ".join(e.feature for e in prediction.shap_explanation[:3])
+        print(f"   {rank:>3}. {prediction.equipment_id:<20} p={prediction.failure_probability:.3f}  {prediction.risk_level:<8} {drivers}")
+    if args.out:
+        report["top_k"] = [prediction.model_dump() for prediction in report["top_k"]]
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.out}")
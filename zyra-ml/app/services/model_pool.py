@@ -0,0 +1,168 @@
+"""
+Model Pool
+───────────
+Per-equipment-type models (artifacts/types/<model_key>/), served next to the
+default model for requests that carry a `model_key`.
+
+- A key's bundle is loaded on its first request; concurrent first requests
+  wait for the one load instead of loading it twice
+- Bundles are kept in least-recently-used order; after each use, the least
+  recently used idle bundles are released until the resident total fits
+  MODEL_POOL_MAX_MB (the most recently used bundle always stays, even alone
+  over the budget)
+- A bundle is never evicted while a request is using it
+- Resident size is ModelBundle.resident_bytes(), so lazily loaded SHAP
+  explainers count once they are built
+
+The default model (no model_key) stays outside the pool and is never evicted.
+Pool models skip the prediction cache and the drift monitor, whose state
+belongs to the default model.
+"""
+
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.models.model_loader import ModelBundle, list_model_keys, model_key_dir
+from app.utils.config import MODEL_POOL_MAX_MB
+
+
+class UnknownModelKey(ValueError):
+    """Raised when no trained model exists for a requested model_key."""
+
+
+class ModelPool:
+    """Lazily loaded per-type model bundles under a memory budget, evicted LRU."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bundles = OrderedDict()  # model_key -> bundle, least recently used first
+        self._loading = {}  # model_key -> Event set when its load finishes
+        self.loads = 0
+        self.load_failures = 0
+        self.hits = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    @contextmanager
+    def use(self, model_key: str):
+        """Pin the bundle of `model_key` (loading it if needed) for the duration of a request."""
+        bundle = self._acquire(model_key)
+        try:
+            yield bundle
+        finally:
+            with self._lock:
+                bundle.in_flight -= 1
+            self._enforce_budget()
+
+    def invalidate(self, model_key: str):
+        """Drop the pooled bundle of `model_key` (retrained), so its next request loads the new model."""
+        with self._lock:
+            bundle = self._bundles.pop(model_key, None)
+            busy = bundle is not None and bundle.in_flight > 0
+        if bundle is None:
+            return
+        if not busy:
+            # Requests still using a busy bundle finish on it; it is freed with its last reference
+            bundle.release()
+            gc.collect()
+        print(f"🔄 Model '{model_key}' dropped from the pool for reloading")
+
+    def stats(self) -> dict:
+        with self._lock:
+            loaded = [
+                {
+                    "model_key": key,
+                    "version": bundle.version,
+                    "resident_mb": round(bundle.resident_bytes() / 2**20, 2),
+                    "in_flight": bundle.in_flight,
+                }
+                for key, bundle in reversed(self._bundles.items())
+            ]
+            counters = {
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "avg_load_ms": round(self.load_seconds * 1000 / self.loads, 1) if self.loads else 0.0,
+            }
+        return {
+            "max_mb": round(self.max_bytes / 2**20, 2),
+            "resident_mb": round(sum(b["resident_mb"] for b in loaded), 2),
+            "loaded": loaded,  # most recently used first
+            "available": list_model_keys(),
+            **counters,
+        }
+
+    def _acquire(self, model_key: str) -> ModelBundle:
+        directory = model_key_dir(model_key)
+        if not os.path.exists(os.path.join(directory, "rf_model.pkl")):
+            raise UnknownModelKey(f"No trained model for model_key '{model_key}'")
+
+        while True:
+            with self._lock:
+                bundle = self._bundles.get(model_key)
+                if bundle is not None:
+                    self._bundles.move_to_end(model_key)
+                    bundle.in_flight += 1
+                    self.hits += 1
+                    return bundle
+                loading = self._loading.get(model_key)
+                if loading is None:
+                    loading = self._loading[model_key] = threading.Event()
+                    break
+            # Another request is loading this key — wait for it, then take the cached bundle
+            loading.wait()
+
+        try:
+            start = time.perf_counter()
+            bundle = ModelBundle(directory, model_key)
+            if not bundle.load():
+                raise UnknownModelKey(f"No trained model for model_key '{model_key}'")
+            seconds = time.perf_counter() - start
+        except Exception:
+            with self._lock:
+                self.load_failures += 1
+                del self._loading[model_key]
+            loading.set()
+            raise
+
+        with self._lock:
+            bundle.in_flight = 1
+            self._bundles[model_key] = bundle
+            self.loads += 1
+            self.load_seconds += seconds
+            del self._loading[model_key]
+        loading.set()
+        print(f"📦 Model '{model_key}' loaded into the pool in {seconds * 1000:.0f} ms")
+        self._enforce_budget()
+        return bundle
+
+    def _enforce_budget(self):
+        evicted = []
+        with self._lock:
+            sizes = {key: bundle.resident_bytes() for key, bundle in self._bundles.items()}
+            total = sum(sizes.values())
+            for key in list(self._bundles)[:-1]:
+                if total <= self.max_bytes:
+                    break
+                bundle = self._bundles[key]
+                if bundle.in_flight:
+                    continue
+                del self._bundles[key]
+                total -= sizes[key]
+                self.evictions += 1
+                evicted.append(bundle)
+
+        for bundle in evicted:
+            bundle.release()
+            print(f"🗑️  Model '{bundle.name}' evicted from the pool")
+        if evicted:
+            gc.collect()
+
+
+model_pool = ModelPool(max_bytes=int(MODEL_POOL_MAX_MB * 2**20))
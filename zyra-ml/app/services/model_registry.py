@@ -0,0 +1,195 @@
+"""
+Model Registry
+───────────────
+Zero-downtime switching between versioned model artifacts.
+
+- activate(version) loads artifacts/versions/<version>/ on a background
+  thread while the current bundle keeps serving
+- The new bundle is warmed up with a synthetic batch (scoring plus a SHAP
+  call, which also pages in memory-mapped arrays) and rejected if its
+  outputs are not valid probabilities; the warm-up rows also measure the
+  approximate SHAP mode against exact SHAP (reported by GET /models)
+- The swap is a single pointer assignment; requests already running finish
+  on the bundle they pinned
+- The replaced bundle is kept for `drain_seconds`, then released once its
+  last in-flight request completes
+"""
+
+import gc
+import threading
+import time
+
+import numpy as np
+
+from app.models.approximate_shap import approximate_shap_values, measure_agreement
+from app.models.model_loader import (
+    ModelBundle,
+    activate_bundle,
+    get_active_bundle,
+    list_versions,
+    read_active_version,
+    version_dir,
+    wait_until_idle,
+    write_active_version,
+)
+from app.services.prediction_service import failure_shap_matrix
+from app.utils.config import (
+    MODEL_DRAIN_SECONDS,
+    MODEL_WARMUP_ROWS,
+    SHAP_APPROX_METHOD,
+    SHAP_APPROX_TREES,
+    SHAP_APPROX_VALIDATION_ROWS,
+)
+
+
+class ModelRegistry:
+    """Background loading, warm-up, swap and drain of model versions."""
+
+    def __init__(self, drain_seconds: float, warmup_rows: int):
+        self.drain_seconds = drain_seconds
+        self.warmup_rows = max(1, warmup_rows)
+        self._lock = threading.Lock()
+        self._job = None  # the current or most recent activation
+        self._retired = []  # bundles still draining
+
+    def activate(self, version: str) -> dict:
+        """
+        Start loading `version` in the background.
+
+        Raises FileNotFoundError for an unknown version and RuntimeError if it
+        is already active or another activation is still running.
+        """
+        directory = version_dir(version)
+        if version not in list_versions():
+            raise FileNotFoundError(f"Model version '{version}' not found in artifacts/versions")
+
+        with self._lock:
+            active = get_active_bundle()
+            if active is not None and active.name == version:
+                raise RuntimeError(f"Model version '{version}' is already active")
+            if self._job and self._job["state"] in ("loading", "warming_up"):
+                raise RuntimeError(f"Activation of '{self._job['version']}' is still in progress")
+
+            self._job = {
+                "version": version,
+                "state": "loading",
+                "started_at": time.time(),
+                "finished_at": None,
+                "load_ms": None,
+                "warmup_ms": None,
+                "error": None,
+            }
+            job = dict(self._job)
+
+        threading.Thread(target=self._run, args=(version, directory), daemon=True, name=f"activate-{version}").start()
+        return job
+
+    def status(self) -> dict:
+        active = get_active_bundle()
+        with self._lock:
+            retired = [
+                {"version": bundle.version, "in_flight": bundle.in_flight, "retired_at": retired_at}
+                for bundle, retired_at in self._retired
+            ]
+            job = dict(self._job) if self._job else None
+        return {
+            "active": active.version if active else None,
+            "startup_version": read_active_version(),
+            "available": list_versions(),
+            "activation": job,
+            "draining": retired,
+            "drain_seconds": self.drain_seconds,
+            "shap_approximation": active.shap_approximation if active else None,
+        }
+
+    def _run(self, version: str, directory: str):
+        try:
+            start = time.perf_counter()
+            bundle = ModelBundle(directory, version)
+            if not bundle.load():
+                raise RuntimeError(f"No trained model in {directory}")
+            self._update(state="warming_up", load_ms=round((time.perf_counter() - start) * 1000, 1))
+
+            start = time.perf_counter()
+            self.warm_up(bundle)
+            self._update(warmup_ms=round((time.perf_counter() - start) * 1000, 1))
+        except Exception as e:
+            self._update(state="failed", error=str(e), finished_at=time.time())
+            print(f"❌ Activation of model version '{version}' failed: {e}")
+            return
+
+        previous = activate_bundle(bundle)
+        write_active_version(version)
+        self._update(state="active", finished_at=time.time())
+        print(f"🔁 Model version '{version}' is now active")
+
+        if previous is not None:
+            self._retire(previous)
+
+    def warm_up(self, bundle: ModelBundle):
+        """Score a synthetic batch and explain a few rows; raises ValueError on invalid output."""
+        # Synthetic rows around the training distribution, in raw feature units
+        rng = np.random.default_rng(0)
+        scaler = bundle.scaler
+        X_raw = scaler.mean_ + scaler.scale_ * rng.standard_normal((self.warmup_rows, len(bundle.feature_names)))
+
+        X_scaled, probabilities = bundle.score(X_raw)
+        if not (np.isfinite(probabilities).all() and ((probabilities >= 0) & (probabilities <= 1)).all()):
+            raise ValueError("Warm-up produced invalid probabilities")
+
+        explainer = bundle.get_explainer()
+        rows = min(SHAP_APPROX_VALIDATION_ROWS, len(X_scaled))
+        if not rows:
+            explainer.shap_values(X_scaled[: min(8, len(X_scaled))])
+            return
+        bundle.shap_approximation = self._validate_shap_approximation(explainer, X_scaled[:rows])
+        report = bundle.shap_approximation
+        print(
+            f"📐 Approximate SHAP ({report['method']}): top-{report['top_k']} agreement "
+            f"{report['top_k_set_agreement']:.0%}, max deviation {report['max_abs_deviation']}, "
+            f"{report['speedup']}× faster than exact"
+        )
+
+    @staticmethod
+    def _validate_shap_approximation(explainer, X_scaled: np.ndarray) -> dict:
+        """Explain `X_scaled` exactly and approximately; return the agreement and per-row timings."""
+        start = time.perf_counter()
+        exact = failure_shap_matrix(explainer.shap_values(X_scaled))
+        exact_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        approximate = failure_shap_matrix(approximate_shap_values(explainer, X_scaled))
+        approximate_seconds = time.perf_counter() - start
+
+        report = {"method": SHAP_APPROX_METHOD}
+        if SHAP_APPROX_METHOD == "tree_subset":
+            report["trees"] = min(SHAP_APPROX_TREES, explainer.model.values.shape[0])
+        report.update(measure_agreement(exact, approximate))
+        report.update({
+            "exact_ms_per_row": round(exact_seconds * 1000 / len(X_scaled), 3),
+            "approximate_ms_per_row": round(approximate_seconds * 1000 / len(X_scaled), 3),
+            "speedup": round(exact_seconds / max(approximate_seconds, 1e-9), 1),
+        })
+        return report
+
+    def _retire(self, bundle: ModelBundle):
+        with self._lock:
+            self._retired.append((bundle, time.time()))
+        threading.Thread(target=self._drain, args=(bundle,), daemon=True, name=f"drain-{bundle.version}").start()
+
+    def _drain(self, bundle: ModelBundle):
+        time.sleep(self.drain_seconds)
+        wait_until_idle(bundle)
+
+        with self._lock:
+            self._retired = [(b, t) for b, t in self._retired if b is not bundle]
+        bundle.release()
+        gc.collect()
+        print(f"🗑️  Model version '{bundle.version}' evicted after draining")
+
+    def _update(self, **fields):
+        with self._lock:
+            self._job.update(fields)
+
+
+model_registry = ModelRegistry(drain_seconds=MODEL_DRAIN_SECONDS, warmup_rows=MODEL_WARMUP_ROWS)
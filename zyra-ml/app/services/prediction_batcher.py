@@ -0,0 +1,174 @@
+"""
+Prediction Batcher
+───────────────────
+Dynamic micro-batching for single /predict calls.
+
+- Incoming requests wait in a bounded queue for at most `max_wait_ms`
+- Up to `max_batch_size` queued requests are scored together through
+  predict_failure_batch, on a worker thread instead of the event loop
+- At most `workers` batches run at once; each caller's future is resolved
+  with its own result or error
+- When the queue is full, submit() raises BatcherSaturated immediately so the
+  API can shed load instead of letting latency grow without bound
+- Stage timings of a batch are added to the timings of every request in it
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.schemas.request_schemas import FailurePredictionRequest
+from app.schemas.response_schemas import FailurePredictionResponse
+from app.services.prediction_service import predict_failure_batch
+from app.utils.stage_timing import stage_timer
+from app.utils.config import (
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCH_MAX_WAIT_MS,
+    MICRO_BATCH_QUEUE_SIZE,
+    MICRO_BATCH_WORKERS,
+)
+
+
+class BatcherSaturated(Exception):
+    """Raised when the prediction queue is full."""
+
+
+class PredictionBatcher:
+    """Coalesces concurrent prediction requests into batches scored off the event loop."""
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, max_queue: int, workers: int):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_queue = max_queue
+        self.workers = max(1, workers)
+
+        self._queue = None
+        self._collector = None
+        self._executor = None
+        self._slots = None
+        self._arrived = None
+        self._running = set()
+
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+
+    async def start(self):
+        if self._collector is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._arrived = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="predict")
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+        # Fail anything still queued rather than leaving callers hanging
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction service is shutting down"))
+
+        self._executor.shutdown(wait=False)
+        self._collector = None
+
+    async def submit(self, request: FailurePredictionRequest) -> FailurePredictionResponse:
+        """Queue a request and wait for its prediction."""
+        await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((request, future, stage_timer.current()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise BatcherSaturated("Prediction queue is full — retry shortly")
+        self._arrived.set()
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running_batches": len(self._running),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "rejected": self.rejected,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue": self.max_queue,
+            "workers": self.workers,
+        }
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # Gather more requests until the batch is full or the wait expires.
+            # Waiting on an event (not on queue.get) means a timeout never drops an item.
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list):
+        try:
+            requests = [request for request, _, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                response, stages = await loop.run_in_executor(
+                    self._executor, stage_timer.collect, predict_failure_batch, requests
+                )
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future, timings), item in zip(batch, response.results):
+                if future.done():  # caller went away
+                    continue
+                if timings is not None:
+                    for name, seconds in stages.items():
+                        timings.add(name, seconds)
+                if item.success:
+                    future.set_result(item.prediction)
+                else:
+                    future.set_exception(ValueError(item.error))
+        finally:
+            self._slots.release()
+
+
+prediction_batcher = PredictionBatcher(
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+    max_queue=MICRO_BATCH_QUEUE_SIZE,
+    workers=MICRO_BATCH_WORKERS,
+)
@@ -0,0 +1,168 @@
+"""
+Prediction Cache
+─────────────────
+Bounded in-process LRU/TTL cache of prediction responses.
+
+- Key: loaded model version + feature vector (optionally quantized to sensor
+  precision) + requested explanation detail. A quantized hit keeps the
+  cached probability and SHAP values; the caller restates the raw values in
+  explanations and recommendations from its own request
+- Bounded by entry count and by an estimate of retained bytes
+- Entries expire after a TTL; the whole cache is dropped when the model
+  version changes, so reloaded artifacts never serve stale predictions
+- Shared by the single and batch prediction paths
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils.config import (
+    PREDICTION_CACHE_ENABLED,
+    PREDICTION_CACHE_MAX_ENTRIES,
+    PREDICTION_CACHE_MAX_BYTES,
+    PREDICTION_CACHE_TTL_SECONDS,
+    PREDICTION_CACHE_QUANTIZE,
+)
+
+# Decimal places reported by the plant sensors (matches dataset_generator rounding)
+SENSOR_PRECISION = {
+    "operating_hours": 1,
+    "temperature": 1,
+    "vibration": 2,
+    "pressure": 1,
+    "age_months": 0,
+    "maintenance_count": 0,
+    "load_percentage": 1,
+    "rpm": 1,
+    "humidity": 1,
+    "power_consumption": 1,
+}
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with TTL, entry and byte limits."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float, quantize: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.quantize = quantize
+
+        self._entries = OrderedDict()  # key -> (expires_at, size, response)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, model_version: str, feature_names: list, raw_values, request) -> tuple:
+        """Build a cache key from a request's feature vector and explanation options."""
+        if self.quantize:
+            values = tuple(
+                round(float(v), SENSOR_PRECISION.get(name, 6)) for name, v in zip(feature_names, raw_values)
+            )
+        else:
+            values = tuple(float(v) for v in raw_values)
+        top_k = request.top_k if request.explain == "top_k" else None
+        shap_mode = request.shap_mode if request.explain != "none" else None
+        return (model_version, values, request.explain, top_k, shap_mode)
+
+    def get(self, key):
+        """Return the cached response for `key`, or None."""
+        with self._lock:
+            self._check_version(key[0])
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, size, response = entry
+            if expires_at < time.monotonic():
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        """Insert a response, evicting least-recently-used entries to stay within limits."""
+        size = _estimate_size(response)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._check_version(key[0])
+            if key in self._entries:
+                self._remove(key, self._entries[key][1])
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, response)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, (_, old_size, _) = next(iter(self._entries.items()))
+                self._remove(old_key, old_size)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": PREDICTION_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "quantize": self.quantize,
+                "model_version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _check_version(self, version):
+        # Artifacts were reloaded — everything cached belongs to the old model
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def _remove(self, key, size):
+        del self._entries[key]
+        self._bytes -= size
+
+
+def _estimate_size(response) -> int:
+    """Rough retained size of a cached response (shared metadata dicts excluded)."""
+    size = 400 + len(response.equipment_id)
+    for explanation in response.shap_explanation:
+        size += 350 + len(explanation.description)
+    for action in response.recommended_actions:
+        size += 60 + 2 * len(action)
+    return size
+
+
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+    max_bytes=PREDICTION_CACHE_MAX_BYTES,
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+    quantize=PREDICTION_CACHE_QUANTIZE,
+)
@@ -3,109 +3,379 @@ Prediction Service
 ───────────────────
 - Scales input features using the persisted StandardScaler
 - Runs inference through the RandomForestClassifier
-- Computes SHAP values for per-prediction explainability
+- Computes SHAP values for per-prediction explainability (none / top_k / full),
+  exact or approximate per request
 - Returns failure_probability, health_score, feature importance, and SHAP explanation
+- Scores whole batches as single matrix operations (scale, predict_proba, SHAP)
+- Serves repeated feature vectors from the shared prediction cache
+- Feeds readings into the rolling feature store and, for models trained with
+  trend features, appends the equipment's rolling statistics to each row
+- Records every scored input in the drift monitor's live histograms
+- Pins the active model bundle per call, so a hot swap never changes the
+  model under a request that is already being scored
+- Routes requests with a `model_key` to that equipment type's model from the
+  model pool; mixed batches are scored in one matrix pass per model
+- Times validation, SHAP and recommendation building with the stage timer
+- Shares its scoring steps (build_feature_matrix, predict_matrix,
+  classify_risk, failure_shap_matrix) with the fleet scan, what-if grids and
+  the model registry's SHAP check
 """
 
+import time
+
 import numpy as np
-import shap
+from pydantic import ValidationError
 
-from app.models.model_loader import get_model, get_scaler, get_metrics, get_feature_names
+from app.models.approximate_shap import approximate_shap_values
+from app.models.model_loader import ModelBundle, use_bundle, get_active_bundle
+from app.services.model_pool import UnknownModelKey, model_pool
+from app.services.prediction_cache import prediction_cache
+from app.services.drift_monitor import drift_monitor
+from app.services.feature_store import feature_store, TREND_BASE_FEATURES, TREND_FEATURE_COLUMNS
 from app.schemas.request_schemas import FailurePredictionRequest
-from app.schemas.response_schemas import FailurePredictionResponse, FeatureExplanation
+from app.utils.stage_timing import stage_timer
+from app.utils.config import (
+    PREDICTION_CACHE_ENABLED,
+    FEATURE_STORE_INGEST_ON_PREDICT,
+    DRIFT_MONITOR_ENABLED,
+)
+from app.schemas.response_schemas import (
+    FailurePredictionResponse,
+    FeatureExplanation,
+    BatchPredictionItem,
+    BatchPredictionResponse,
+)
+
+
+# Lower probability bound of each risk level above "low"
+RISK_BANDS = [(0.25, "medium"), (0.50, "high"), (0.75, "critical")]
 
 
 def predict_failure(request: FailurePredictionRequest) -> FailurePredictionResponse:
     """Run failure prediction with SHAP explanation."""
+    with use_model(request.model_key) as bundle:
+        X_raw = build_feature_matrix(bundle, [request])
+        if not np.isfinite(X_raw).all():
+            raise ValueError("Feature values must be finite numbers")
+
+        if DRIFT_MONITOR_ENABLED and request.model_key is None:
+            drift_monitor.observe(X_raw, bundle.feature_names)
+        return _predict_cached(bundle, [request], X_raw)[0]
+
+
+def predict_failure_batch(items: list) -> BatchPredictionResponse:
+    """
+    Run failure prediction for a batch of raw request payloads.
+
+    Valid items are grouped by model_key and every group is scored in one
+    pass (a single scaler.transform, predict_proba and SHAP call over its
+    matrix). Items that fail validation, or name an unknown model_key, are
+    reported individually instead of failing the batch. Results are
+    returned in input order.
+    """
+    results = [None] * len(items)
+    requests, positions = [], []
+
+    # ─── 1. Validate each item independently ──────────────────────────
+    validation_seconds = 0.0
+    for index, item in enumerate(items):
+        if isinstance(item, FailurePredictionRequest):
+            request = item
+        else:
+            start = time.perf_counter()
+            try:
+                request = FailurePredictionRequest.model_validate(item)
+            except ValidationError as e:
+                results[index] = _failed_item(index, item, _format_validation_error(e))
+                continue
+            finally:
+                validation_seconds += time.perf_counter() - start
+        requests.append(request)
+        positions.append(index)
+    if validation_seconds:
+        stage_timer.record("validation", validation_seconds)
+
+    # ─── 2. One group per model ───────────────────────────────────────
+    groups = {}
+    for request, index in zip(requests, positions):
+        group = groups.setdefault(request.model_key, ([], []))
+        group[0].append(request)
+        group[1].append(index)
+
+    for model_key, (group_requests, group_positions) in groups.items():
+        try:
+            with use_model(model_key) as bundle:
+                _predict_group(bundle, items, group_requests, group_positions, results, model_key is None)
+        except UnknownModelKey as e:
+            for index in group_positions:
+                results[index] = _failed_item(index, items[index], str(e))
+
+    failed = sum(1 for r in results if not r.success)
+    return BatchPredictionResponse(
+        success=failed == 0,
+        count=len(results),
+        failed=failed,
+        results=results,
+    )
+
+
+def use_model(model_key: str = None):
+    """Pin the default model's active bundle, or the pool bundle of `model_key`."""
+    return use_bundle() if model_key is None else model_pool.use(model_key)
 
-    model = get_model()
-    scaler = get_scaler()
-    metrics = get_metrics()
-    feature_names = get_feature_names()
-
-    if model is None or scaler is None:
-        raise RuntimeError("Model not loaded. Run the training pipeline first.")
-
-    # ─── 1. Build feature vector ──────────────────────────────────────
-    raw_values = [
-        request.operating_hours,
-        request.temperature,
-        request.vibration,
-        request.pressure,
-        request.age_months,
-        request.maintenance_count,
-        request.load_percentage,
-        request.rpm,
-        request.humidity,
-        request.power_consumption,
-    ]
-    X_raw = np.array([raw_values])
-
-    # ─── 2. Scale features ───────────────────────────────────────────
-    X_scaled = scaler.transform(X_raw)
-
-    # ─── 3. Predict failure probability ──────────────────────────────
-    failure_probability = float(model.predict_proba(X_scaled)[0][1])
-    health_score = round(100 - (failure_probability * 100), 2)
-
-    # ─── 4. Risk classification ──────────────────────────────────────
-    if failure_probability >= 0.75:
-        risk_level = "critical"
-    elif failure_probability >= 0.50:
-        risk_level = "high"
-    elif failure_probability >= 0.25:
-        risk_level = "medium"
-    else:
-        risk_level = "low"
 
-    # ─── 5. Random Forest feature importance (global) ────────────────
-    global_importance = {
-        name: round(float(imp), 4)
-        for name, imp in zip(feature_names, model.feature_importances_)
-    }
+def _predict_group(
+    bundle: ModelBundle,
+    items: list,
+    requests: list,
+    positions: list,
+    results: list,
+    observe_drift: bool = True,
+):
+    """Score the validated requests of one model into `results` (indexed like `items`)."""
 
-    # ─── 6. SHAP explanations (per-prediction) ──────────────────────
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X_scaled)
+    # ─── 3. Reject rows with non-finite values ────────────────────────
+    X_raw = build_feature_matrix(bundle, requests)
+    finite = np.isfinite(X_raw).all(axis=1)
+    for row in np.flatnonzero(~finite):
+        index = positions[row]
+        results[index] = _failed_item(index, items[index], "Feature values must be finite numbers")
 
-    # Extract SHAP values for class 1 (failure)
+    requests = [r for r, ok in zip(requests, finite) if ok]
+    positions = [p for p, ok in zip(positions, finite) if ok]
+    X_raw = X_raw[finite]
+
+    # ─── 4. Score all valid rows as one matrix ────────────────────────
+    if requests:
+        if DRIFT_MONITOR_ENABLED and observe_drift:
+            drift_monitor.observe(X_raw, bundle.feature_names)
+        for index, prediction in zip(positions, _predict_cached(bundle, requests, X_raw)):
+            results[index] = BatchPredictionItem(
+                index=index,
+                equipment_id=prediction.equipment_id,
+                success=True,
+                prediction=prediction,
+            )
+
+
+def build_feature_matrix(bundle: ModelBundle, requests: list) -> np.ndarray:
+    """Stack request feature values into an (n_samples, n_features) matrix."""
+    feature_names = bundle.feature_names
+    uses_trends = any(name in TREND_FEATURE_COLUMNS for name in feature_names)
+
+    if not (uses_trends or FEATURE_STORE_INGEST_ON_PREDICT):
+        return np.array(
+            [[getattr(request, name) for name in feature_names] for request in requests],
+            dtype=float,
+        )
+
+    rows = []
+    for request in requests:
+        with np.errstate(over="ignore"):
+            reading = np.asarray([getattr(request, name) for name in TREND_BASE_FEATURES], dtype=np.float32)
+        if not np.isfinite(reading).all():
+            # Never stored (see FeatureStore.ingest); a NaN row is rejected by the caller's finiteness check
+            rows.append([np.nan] * len(feature_names))
+            continue
+        # Rows are ingested in order, so each sees the trend as of its own reading
+        feature_store.ingest(request.equipment_id, reading, skip_duplicates=True)
+        values = {}
+        if uses_trends:
+            values = dict(zip(TREND_FEATURE_COLUMNS, feature_store.trend_vector(request.equipment_id)))
+        rows.append([values[name] if name in values else getattr(request, name) for name in feature_names])
+    return np.array(rows, dtype=float)
+
+
+def classify_risk(probabilities: np.ndarray) -> np.ndarray:
+    """Map failure probabilities to risk levels."""
+    return np.select(
+        [probabilities >= bound for bound, _ in reversed(RISK_BANDS)],
+        [level for _, level in reversed(RISK_BANDS)],
+        default="low",
+    )
+
+
+def failure_shap_matrix(shap_values) -> np.ndarray:
+    """Extract the (n_samples, n_features) SHAP values for class 1 (failure)."""
     if isinstance(shap_values, list):
-        failure_shap = shap_values[1][0]
-    elif len(shap_values.shape) == 3:
-        failure_shap = shap_values[0, :, 1]
-    else:
-        failure_shap = shap_values[0]
+        return shap_values[1]
+    if len(shap_values.shape) == 3:
+        return shap_values[:, :, 1]
+    return shap_values
+
+
+def _predict_cached(bundle: ModelBundle, requests: list, X_raw: np.ndarray) -> list:
+    """Answer rows from the prediction cache and score only the misses."""
+    # Requests draining on a replaced bundle bypass the cache instead of resetting it
+    if not PREDICTION_CACHE_ENABLED or bundle is not get_active_bundle():
+        return predict_matrix(bundle, requests, X_raw)
+
+    feature_names = bundle.feature_names
+    responses = [None] * len(requests)
+    keys = [
+        prediction_cache.make_key(bundle.version, feature_names, X_raw[row], r)
+        for row, r in enumerate(requests)
+    ]
+
+    misses = []
+    for row, key in enumerate(keys):
+        cached = prediction_cache.get(key)
+        if cached is None:
+            misses.append(row)
+        elif prediction_cache.quantize:
+            # The hit may come from a request with nearby values: restate this request's own
+            responses[row] = _rebind_cached(cached, requests[row], X_raw[row], feature_names)
+        elif cached.equipment_id == requests[row].equipment_id:
+            responses[row] = cached
+        else:
+            responses[row] = cached.model_copy(update={"equipment_id": requests[row].equipment_id})
+
+    if misses:
+        fresh = predict_matrix(bundle, [requests[row] for row in misses], X_raw[misses])
+        for row, response in zip(misses, fresh):
+            prediction_cache.put(keys[row], response)
+            responses[row] = response
+
+    return responses
+
+
+def _rebind_cached(cached, request, raw_values: np.ndarray, feature_names: list):
+    """A cached response with the raw-value fields (explanations, recommendations) rebuilt for `request`."""
+    column = {name: i for i, name in enumerate(feature_names)}
+    explanations = []
+    for explanation in cached.shap_explanation:
+        raw_val = float(raw_values[column[explanation.feature]])
+        explanations.append(
+            explanation.model_copy(
+                update={
+                    "value": round(raw_val, 2),
+                    "description": _describe(explanation.feature, raw_val, explanation.direction, explanation.impact),
+                }
+            )
+        )
+    return cached.model_copy(
+        update={
+            "equipment_id": request.equipment_id,
+            "shap_explanation": explanations,
+            "recommended_actions": _generate_recommendations(cached.risk_level, explanations, request),
+        }
+    )
+
+
+def predict_matrix(bundle: ModelBundle, requests: list, X_raw: np.ndarray) -> list:
+    """
+    Score a validated feature matrix and build one response per row. Skips
+    the cache, drift monitor and feature store; predict_failure_batch uses them.
+    """
+
+    metrics = bundle.metrics
+    feature_names = bundle.feature_names
+
+    # ─── 1–2. Scale features and predict failure probability ─────────
+    X_scaled, probabilities = bundle.score(X_raw)
+    health_scores = np.round(100 - (probabilities * 100), 2)
+
+    # ─── 3. Risk classification ──────────────────────────────────────
+    risk_levels = classify_risk(probabilities)
+
+    # ─── 4. Random Forest feature importance (global, precomputed) ───
+    global_importance = bundle.feature_importance
+
+    # ─── 5. SHAP explanations, only for rows that asked for them ─────
+    failure_shap = {}
+    for mode in ("exact", "approximate"):
+        explained = [row for row, r in enumerate(requests) if r.explain != "none" and r.shap_mode == mode]
+        if not explained:
+            continue
+        explainer = bundle.get_explainer()
+        if mode == "exact":
+            with stage_timer.stage("shap"):
+                shap_matrix = failure_shap_matrix(explainer.shap_values(X_scaled[explained]))
+        else:
+            with stage_timer.stage("shap_approximate"):
+                shap_matrix = failure_shap_matrix(approximate_shap_values(explainer, X_scaled[explained]))
+        failure_shap.update(zip(explained, shap_matrix))
+
+    responses = []
+    recommendation_seconds = 0.0
+    for row, request in enumerate(requests):
+        start = time.perf_counter()
+        shap_explanations = []
+        if row in failure_shap:
+            limit = request.top_k if request.explain == "top_k" else None
+            shap_explanations = _build_explanations(feature_names, failure_shap[row], X_raw[row], limit)
+        risk_level = str(risk_levels[row])
+
+        # ─── 6. Recommended actions ──────────────────────────────────
+        actions = _generate_recommendations(risk_level, shap_explanations, request)
+        recommendation_seconds += time.perf_counter() - start
+
+        responses.append(
+            FailurePredictionResponse(
+                equipment_id=request.equipment_id,
+                failure_probability=round(float(probabilities[row]), 4),
+                health_score=float(health_scores[row]),
+                risk_level=risk_level,
+                feature_importance=global_importance,
+                shap_explanation=shap_explanations,
+                recommended_actions=actions,
+                model_metrics=metrics or {},
+                model_version=bundle.version,
+            )
+        )
+
+    if requests:
+        stage_timer.record("recommendations", recommendation_seconds)
+    return responses
+
+
+def _build_explanations(
+    feature_names: list,
+    failure_shap: np.ndarray,
+    raw_values: np.ndarray,
+    limit: int = None,
+) -> list:
+    """Build per-feature SHAP explanations sorted by absolute impact (optionally top `limit` only)."""
+    # Most important first
+    order = np.argsort(-np.abs(failure_shap), kind="stable")[:limit]
 
     shap_explanations = []
-    for name, shap_val, raw_val in zip(feature_names, failure_shap, raw_values):
+    for i in order:
+        name, shap_val, raw_val = feature_names[i], float(failure_shap[i]), float(raw_values[i])
         direction = "increases" if shap_val > 0 else "decreases"
-        impact = abs(float(shap_val))
+        impact = abs(shap_val)
         shap_explanations.append(
             FeatureExplanation(
                 feature=name,
                 value=round(raw_val, 2),
-                shap_value=round(float(shap_val), 4),
+                shap_value=round(shap_val, 4),
                 impact=round(impact, 4),
                 direction=direction,
-                description=f"{name}={round(raw_val, 1)} {direction} failure risk by {round(impact * 100, 1)}%",
+                description=_describe(name, raw_val, direction, impact),
             )
         )
 
-    # Sort by absolute SHAP impact (most important first)
-    shap_explanations.sort(key=lambda x: x.impact, reverse=True)
-
-    # ─── 7. Recommended actions ──────────────────────────────────────
-    actions = _generate_recommendations(risk_level, shap_explanations, request)
-
-    return FailurePredictionResponse(
-        equipment_id=request.equipment_id,
-        failure_probability=round(failure_probability, 4),
-        health_score=health_score,
-        risk_level=risk_level,
-        feature_importance=global_importance,
-        shap_explanation=shap_explanations,
-        recommended_actions=actions,
-        model_metrics=metrics or {},
+    return shap_explanations
+
+
+def _describe(name: str, raw_val: float, direction: str, impact: float) -> str:
+    return f"{name}={round(raw_val, 1)} {direction} failure risk by {round(impact * 100, 1)}%"
+
+
+def _failed_item(index: int, item, error: str) -> BatchPredictionItem:
+    equipment_id = item.get("equipment_id") if isinstance(item, dict) else None
+    return BatchPredictionItem(
+        index=index,
+        equipment_id=equipment_id if isinstance(equipment_id, str) else None,
+        success=False,
+        error=error,
+    )
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}"
+        for e in error.errors()
     )
 
 
@@ -0,0 +1,177 @@
+"""
+Response Encoding
+──────────────────
+Negotiates how prediction responses are represented on the wire.
+
+- json     (default) the full FailurePredictionResponse / BatchPredictionResponse
+- compact  columnar JSON: SHAP explanations as parallel arrays (feature,
+           value, shap_value — impact, direction and description follow from
+           them), batch results as one array per field, and the static
+           feature_importance / model_metrics left out unless requested
+- msgpack  the compact structure as MessagePack
+
+The format comes from the `format` query parameter or else the Accept
+header (application/vnd.zyra.compact+json, application/msgpack). Compact
+JSON is encoded with orjson and MessagePack with msgpack, both listed in
+requirements.txt. In an install without them, compact JSON falls back to
+the stdlib encoder and MessagePack is refused (406).
+"""
+
+import json
+
+from app.schemas.response_schemas import BatchPredictionResponse, FailurePredictionResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMATS = ("json", "compact", "msgpack")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "compact": "application/vnd.zyra.compact+json",
+    "msgpack": "application/msgpack",
+}
+
+_ACCEPTED = {
+    **{media_type: fmt for fmt, media_type in MEDIA_TYPES.items()},
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+}
+
+
+class UnsupportedFormat(Exception):
+    """Raised when the requested encoding is unknown or its package is not installed."""
+
+
+def negotiate(format_param: str = None, accept: str = None) -> str:
+    """
+    Pick the response format: the query parameter wins, then the best Accept
+    match, then json. Only an explicit format=msgpack fails without msgpack;
+    an Accept header falls back to the next acceptable type.
+    """
+    if format_param:
+        fmt = format_param.lower()
+        if fmt not in FORMATS:
+            raise UnsupportedFormat(f"Unknown format '{format_param}' — expected one of {', '.join(FORMATS)}")
+    else:
+        fmt = _from_accept(accept) or "json"
+    if fmt == "msgpack" and msgpack is None:
+        raise UnsupportedFormat("MessagePack responses need the msgpack package")
+    return fmt
+
+
+def encode(response, fmt: str, include_static: bool = False) -> bytes:
+    """Serialize a prediction or batch response in `fmt`."""
+    if fmt == "json":
+        return response.model_dump_json().encode()
+
+    if isinstance(response, BatchPredictionResponse):
+        payload = compact_batch(response, include_static)
+    else:
+        payload = compact_prediction(response, include_static)
+
+    if fmt == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def compact_prediction(prediction: FailurePredictionResponse, include_static: bool = False) -> dict:
+    """Scalar fields plus `shap` as parallel feature-name / value / shap_value arrays."""
+    payload = {
+        "equipment_id": prediction.equipment_id,
+        "failure_probability": prediction.failure_probability,
+        "health_score": prediction.health_score,
+        "risk_level": prediction.risk_level,
+        "model_version": prediction.model_version,
+        "recommended_actions": prediction.recommended_actions,
+    }
+    if prediction.shap_explanation:
+        explanation = prediction.shap_explanation
+        payload["shap"] = {
+            "feature": [e.feature for e in explanation],
+            "value": [e.value for e in explanation],
+            "shap_value": [e.shap_value for e in explanation],
+        }
+    if include_static:
+        payload["feature_importance"] = prediction.feature_importance
+        payload["model_metrics"] = prediction.model_metrics
+    return payload
+
+
+def compact_batch(batch: BatchPredictionResponse, include_static: bool = False) -> dict:
+    """
+    One array per field over the successful items (in input order), with
+    `index` mapping them back to the request. Explanations reference a shared
+    `shap.features` list by position; rows without one hold null.
+    """
+    scored = [item for item in batch.results if item.success]
+    predictions = [item.prediction for item in scored]
+
+    payload = {
+        "success": batch.success,
+        "count": batch.count,
+        "failed": batch.failed,
+        "model_version": predictions[0].model_version if predictions else None,
+        "index": [item.index for item in scored],
+        "equipment_id": [p.equipment_id for p in predictions],
+        "failure_probability": [p.failure_probability for p in predictions],
+        "health_score": [p.health_score for p in predictions],
+        "risk_level": [p.risk_level for p in predictions],
+        "recommended_actions": [p.recommended_actions for p in predictions],
+        "errors": [
+            {"index": item.index, "equipment_id": item.equipment_id, "error": item.error}
+            for item in batch.results
+            if not item.success
+        ],
+    }
+
+    if any(p.shap_explanation for p in predictions):
+        positions = {}
+        feature, value, shap_value = [], [], []
+        for p in predictions:
+            if not p.shap_explanation:
+                feature.append(None)
+                value.append(None)
+                shap_value.append(None)
+                continue
+            feature.append([positions.setdefault(e.feature, len(positions)) for e in p.shap_explanation])
+            value.append([e.value for e in p.shap_explanation])
+            shap_value.append([e.shap_value for e in p.shap_explanation])
+        payload["shap"] = {"features": list(positions), "feature": feature, "value": value, "shap_value": shap_value}
+
+    if include_static and predictions:
+        payload["feature_importance"] = predictions[0].feature_importance
+        payload["model_metrics"] = predictions[0].model_metrics
+    return payload
+
+
+def _from_accept(accept: str):
+    """Best supported media type of an Accept header (by q-value, then order), or None."""
+    if not accept:
+        return None
+    best, best_q = None, 0.0
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        fmt = _ACCEPTED.get(media_type.lower())
+        if fmt is None or (fmt == "msgpack" and msgpack is None):
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
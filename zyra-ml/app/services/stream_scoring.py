@@ -0,0 +1,131 @@
+"""
+Stream Scoring
+───────────────
+Scores a newline-delimited JSON stream of FailurePredictionRequest readings.
+
+- Readings are parsed as they arrive and scored in chunks of at most
+  `chunk_size` through predict_failure_batch (one matrix pass per chunk)
+- Each chunk is scored as soon as the bytes received so far allow it, so a
+  slow gateway still gets prompt answers
+- Results are emitted as NDJSON lines, one per reading, tagged with the
+  reading's line number; malformed or overlong lines produce an error line
+  and the stream goes on with the next line
+- If the model cannot score (e.g. not loaded yet), the chunk's readings
+  get error lines too; the response has already started, so errors are
+  reported in-band rather than as an HTTP status
+- Memory is bounded by one chunk, one partial line and (in changes-only
+  mode) an LRU map of the last risk level per equipment_id
+"""
+
+import json
+from collections import OrderedDict
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas.response_schemas import BatchPredictionItem
+from app.services.prediction_service import predict_failure_batch
+from app.utils.config import (
+    STREAM_CHUNK_SIZE,
+    STREAM_MAX_LINE_BYTES,
+    STREAM_MAX_TRACKED_EQUIPMENT,
+)
+
+
+class _RiskLevelTracker:
+    """Remembers the last risk level per equipment, bounded by LRU eviction."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._levels = OrderedDict()
+
+    def changed(self, equipment_id: str, risk_level: str) -> bool:
+        previous = self._levels.get(equipment_id)
+        self._levels[equipment_id] = risk_level
+        self._levels.move_to_end(equipment_id)
+        if len(self._levels) > self.max_entries:
+            self._levels.popitem(last=False)
+        return previous != risk_level
+
+
+async def score_ndjson_stream(
+    body: AsyncIterator[bytes],
+    changes_only: bool = False,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Consume NDJSON readings from `body` and yield NDJSON results in input order."""
+    tracker = _RiskLevelTracker(STREAM_MAX_TRACKED_EQUIPMENT) if changes_only else None
+    pending = b""
+    skipping = False  # inside an overlong line already reported, discarding up to its newline
+    line_no = 0
+    chunk = []  # (line number, parsed reading or None, parse error)
+
+    async for data in body:
+        if skipping:
+            newline = data.find(b"\n")
+            if newline < 0:
+                continue
+            data, skipping = data[newline + 1 :], False
+        pending += data
+        *lines, pending = pending.split(b"\n")
+
+        for line in lines:
+            line_no += 1
+            if len(line) > STREAM_MAX_LINE_BYTES:
+                chunk.append((line_no, None, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes"))
+            elif line.strip():
+                chunk.append((line_no, *_parse(line)))
+            if len(chunk) >= chunk_size:
+                async for out in _score_chunk(chunk, tracker):
+                    yield out
+                chunk = []
+
+        if len(pending) > STREAM_MAX_LINE_BYTES:
+            # Report the line now and drop the rest of it as it arrives
+            line_no += 1
+            chunk.append((line_no, None, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes"))
+            pending, skipping = b"", True
+
+        # Score what has arrived so far instead of waiting for a full chunk
+        if chunk:
+            async for out in _score_chunk(chunk, tracker):
+                yield out
+            chunk = []
+
+    # Last line without a trailing newline
+    if pending.strip():
+        chunk.append((line_no + 1, *_parse(pending)))
+    if chunk:
+        async for out in _score_chunk(chunk, tracker):
+            yield out
+
+
+def _parse(line: bytes) -> tuple:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+
+async def _score_chunk(chunk: list, tracker) -> AsyncIterator[bytes]:
+    readings = [reading for _, reading, error in chunk if error is None]
+    scored = iter([])
+    if readings:
+        try:
+            scored = iter((await run_in_threadpool(predict_failure_batch, readings)).results)
+        except RuntimeError as e:
+            chunk = [(line_no, reading, error or str(e)) for line_no, reading, error in chunk]
+
+    lines = []
+    for line_no, _, error in chunk:
+        if error is not None:
+            result = BatchPredictionItem(index=line_no, success=False, error=error)
+        else:
+            result = next(scored)
+            if tracker is not None and result.success:
+                if not tracker.changed(result.equipment_id, result.prediction.risk_level):
+                    continue
+            result.index = line_no
+        lines.append(result.model_dump_json().encode() + b"\n")
+    if lines:
+        yield b"".join(lines)
@@ -0,0 +1,270 @@
+"""
+Training Jobs
+──────────────
+Runs the training pipeline in a separate process, launched from the admin
+API, so a retrain does not compete with serving for the GIL or memory.
+
+- One job at a time. The child process lowers its priority to
+  TRAINING_JOB_NICE, fits the forest with TRAINING_JOB_CPUS cores and, on
+  Linux, is pinned to that many cores
+- The child reports each phase (load, scale, fit, evaluate, compress, save)
+  and the trees fitted so far over a queue; GET /models/train/{job_id}
+  shows them with the time spent per phase
+- Cancelling terminates the child (SIGTERM, SIGKILL after
+  CANCEL_GRACE_SECONDS) and deletes its staged artifacts
+- Jobs train a new version (artifacts/versions/<version>/) or one
+  equipment type's model (artifacts/types/<model_key>/), never the default
+  artifacts directory. save_artifacts stages the files and renames the
+  directory into place, so serving never sees a partial model. With
+  `activate`, a finished version is handed to ModelRegistry.activate; a
+  retrained type model replaces the pooled one on its next request
+"""
+
+import os
+import time
+import queue
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict
+
+from app.models.model_loader import list_versions
+from app.schemas.request_schemas import TrainingJobRequest
+from app.services.model_pool import model_pool
+from app.services.model_registry import model_registry
+from app.utils.config import TRAINING_JOB_CPUS, TRAINING_JOB_HISTORY, TRAINING_JOB_NICE
+
+# Seconds between SIGTERM and SIGKILL when a job is cancelled
+CANCEL_GRACE_SECONDS = 10
+POLL_SECONDS = 0.5
+
+
+class TrainingJobs:
+    """Launches, tracks and cancels training processes."""
+
+    def __init__(self, history: int):
+        self.history = max(1, history)
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id -> job, oldest first
+        self._processes = {}  # job_id -> Process while it runs
+
+    def start(self, request: TrainingJobRequest) -> dict:
+        """
+        Launch a training process for `request`.
+
+        Raises FileExistsError if the version already exists and
+        RuntimeError while another job runs.
+        """
+        version = None
+        if not request.model_key:
+            version = request.version or time.strftime("train-%Y%m%d-%H%M%S")
+            # A version is immutable once trained: the active or a draining bundle may be serving it
+            if version in list_versions():
+                raise FileExistsError(f"Model version '{version}' already exists")
+
+        cpus = request.cpus or TRAINING_JOB_CPUS
+        nice = TRAINING_JOB_NICE if request.nice is None else request.nice
+        train_kwargs = {
+            "use_trend_features": request.trend_features,
+            "version": version,
+            "data_path": request.data_path,
+            "model_params": {**_overrides(request.model_params), "n_jobs": cpus},
+            "compress": request.compress,
+            "max_auc_loss": request.max_auc_loss,
+            "model_key": request.model_key,
+        }
+
+        with self._lock:
+            if self._processes:
+                running = next(iter(self._processes))
+                raise RuntimeError(f"Training job '{running}' is still running")
+
+            job_id = uuid.uuid4().hex[:12]
+            # spawn: the API process is multi-threaded, which fork does not mix well with
+            context = multiprocessing.get_context("spawn")
+            events = context.Queue()
+            process = context.Process(
+                target=_run_job, args=(train_kwargs, cpus, nice, events), daemon=True, name=f"train-{job_id}"
+            )
+            process.start()
+
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "state": "running",
+                "version": version,
+                "model_key": request.model_key,
+                "pid": process.pid,
+                "cpus": cpus,
+                "nice": nice,
+                "phase": None,
+                "rows": None,
+                "trees_fitted": None,
+                "n_estimators": None,
+                "phase_seconds": {},
+                "started_at": time.time(),
+                "finished_at": None,
+                "metrics": None,
+                "error": None,
+                "activate": request.activate,
+                "activation": None,
+                "cancel_requested_at": None,
+            }
+            self._processes[job_id] = process
+            while len(self._jobs) > self.history:
+                oldest = next(iter(self._jobs))
+                if oldest in self._processes:
+                    break
+                del self._jobs[oldest]
+            job = dict(self._jobs[job_id])
+
+        threading.Thread(
+            target=self._watch, args=(job_id, process, events), daemon=True, name=f"watch-train-{job_id}"
+        ).start()
+        print(f"🏋️  Training job '{job_id}' started (pid {process.pid}, {cpus} cores, nice {nice})")
+        return job
+
+    def get(self, job_id: str) -> dict:
+        """Raises KeyError for an unknown job."""
+        with self._lock:
+            return dict(self._jobs[job_id])
+
+    def list(self) -> list:
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]  # newest first
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Terminate a running job. Raises KeyError for an unknown job and
+        RuntimeError if it is not running.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            process = self._processes.get(job_id)
+            if process is None:
+                raise RuntimeError(f"Training job '{job_id}' is not running (state: {job['state']})")
+            if job["cancel_requested_at"] is None:
+                job["cancel_requested_at"] = time.time()
+                process.terminate()
+            return dict(job)
+
+    def shutdown(self):
+        """Cancel the running job and wait for it to exit (service shutdown)."""
+        with self._lock:
+            running = list(self._processes.items())
+        if not running:
+            return
+        # Imported here: the pipeline pulls in pandas and scikit-learn, which service startup avoids
+        from app.ml.training_pipeline import remove_staged_artifacts
+
+        for job_id, process in running:
+            try:
+                self.cancel(job_id)
+            except RuntimeError:
+                continue  # finished meanwhile
+            process.join(CANCEL_GRACE_SECONDS)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            remove_staged_artifacts(process.pid)
+
+    def _watch(self, job_id: str, process, events):
+        phase_started = None
+        result = None
+        while True:
+            alive = process.is_alive()
+            try:
+                event = events.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if not alive:
+                    break
+                self._escalate(job_id, process)
+                continue
+
+            kind, payload = event
+            if kind == "progress":
+                phase, detail = payload
+                now = time.time()
+                with self._lock:
+                    job = self._jobs[job_id]
+                    if phase != job["phase"]:
+                        if job["phase"] is not None:
+                            job["phase_seconds"][job["phase"]] = round(now - phase_started, 2)
+                        job["phase"], phase_started = phase, now
+                    job.update(detail)
+            else:
+                result = (kind, payload)
+
+        process.join()
+        from app.ml.training_pipeline import remove_staged_artifacts
+
+        remove_staged_artifacts(process.pid)
+        now = time.time()
+        with self._lock:
+            job = self._jobs[job_id]
+            if job["phase"] is not None and phase_started is not None:
+                job["phase_seconds"][job["phase"]] = round(now - phase_started, 2)
+            if job["cancel_requested_at"] is not None and (result is None or result[0] != "succeeded"):
+                job["state"] = "cancelled"
+            elif result is None:
+                job["state"], job["error"] = "failed", f"Training process exited with code {process.exitcode}"
+            else:
+                job["state"] = result[0]
+                job["metrics" if result[0] == "succeeded" else "error"] = result[1]
+            job["finished_at"] = now
+            del self._processes[job_id]
+            job = dict(job)
+
+        if job["state"] == "succeeded":
+            print(f"✅ Training job '{job_id}' finished in {job['finished_at'] - job['started_at']:.1f}s")
+            self._publish(job_id, job)
+        else:
+            print(f"❌ Training job '{job_id}' {job['state']}{': ' + job['error'] if job['error'] else ''}")
+
+    def _publish(self, job_id: str, job: dict):
+        if job["model_key"]:
+            model_pool.invalidate(job["model_key"])
+            return
+        if not job["activate"]:
+            return
+        try:
+            activation = model_registry.activate(job["version"])["state"]
+        except (FileNotFoundError, RuntimeError) as e:
+            activation = f"not started: {e}"
+        with self._lock:
+            self._jobs[job_id]["activation"] = activation
+
+    def _escalate(self, job_id: str, process):
+        with self._lock:
+            requested = self._jobs[job_id]["cancel_requested_at"]
+        if requested is not None and time.time() - requested > CANCEL_GRACE_SECONDS and process.is_alive():
+            process.kill()
+
+
+def _overrides(params) -> dict:
+    # Only the parameters the request set: an explicit max_depth null (unlimited) differs from leaving it out
+    return params.model_dump(exclude_unset=True) if params else {}
+
+
+def _run_job(train_kwargs: dict, cpus: int, nice: int, events):
+    """Training process entry point: apply the CPU budget, train, report the outcome."""
+    os.nice(nice)
+    if hasattr(os, "sched_setaffinity"):
+        allowed = sorted(os.sched_getaffinity(0))
+        if cpus < len(allowed):
+            # The highest-numbered cores, leaving the low ones to the serving process
+            os.sched_setaffinity(0, allowed[-cpus:])
+
+    def progress(phase: str, **detail):
+        events.put(("progress", (phase, detail)))
+
+    try:
+        from app.ml.training_pipeline import train_model
+
+        metrics = train_model(**train_kwargs, progress=progress)
+    except Exception as e:
+        events.put(("failed", f"{type(e).__name__}: {e}"))
+        return
+    events.put(("succeeded", metrics))
+
+
+training_jobs = TrainingJobs(history=TRAINING_JOB_HISTORY)
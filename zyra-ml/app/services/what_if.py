@@ -0,0 +1,108 @@
+"""
+What-If Grid
+─────────────
+Scores hypothetical variations of one reading, for example "load at 60%"
+or "after 500 more operating hours", without one /predict call per point.
+
+- One or two features of a base FailurePredictionRequest are swept over
+  explicit values or an evenly spaced range (absolute, or relative to the
+  base value)
+- The whole grid is built as one matrix and scored in a single scale +
+  predict_proba pass
+- Where the probability crosses a risk-level bound between neighbouring
+  grid points, the crossing is reported along that axis, at the linearly
+  interpolated feature value
+
+Swept values are checked against the request schema's bounds, and integer
+fields take integer values only. Grid points are hypothetical, so they do
+not feed the drift monitor, the prediction cache or the feature store.
+"""
+
+import numpy as np
+
+from app.schemas.request_schemas import WhatIfRequest, numeric_field_specs, within_field_bounds
+from app.services.feature_store import TREND_FEATURE_COLUMNS
+from app.services.prediction_service import RISK_BANDS, classify_risk, use_model
+
+
+def score_grid(request: WhatIfRequest) -> dict:
+    """Failure probability over the swept grid, plus the risk-level crossings along each axis."""
+    with use_model(request.base.model_key) as bundle:
+        feature_names = bundle.feature_names
+        if any(name in TREND_FEATURE_COLUMNS for name in feature_names):
+            raise ValueError("What-if grids need a model without trend features (a hypothetical point has no history)")
+
+        base_row = np.array([getattr(request.base, name) for name in feature_names], dtype=float)
+        axes = [(axis.feature, _axis_values(axis, request.base, feature_names)) for axis in request.sweep]
+
+        # Row-major grid: the last swept feature varies fastest
+        shape = tuple(len(values) for _, values in axes)
+        X_raw = np.repeat(base_row[np.newaxis, :], int(np.prod(shape)), axis=0)
+        for (feature, _), column in zip(axes, np.meshgrid(*[values for _, values in axes], indexing="ij")):
+            X_raw[:, feature_names.index(feature)] = column.ravel()
+
+        _, probabilities = bundle.score(np.vstack([base_row, X_raw]))
+        base_probability, surface = probabilities[0], probabilities[1:].reshape(shape)
+
+        return {
+            "model_version": bundle.version,
+            "base": {
+                "failure_probability": round(float(base_probability), 4),
+                "risk_level": str(classify_risk(np.array([base_probability]))[0]),
+            },
+            "axes": [{"feature": feature, "values": values.tolist()} for feature, values in axes],
+            "failure_probability": np.round(surface, 4).tolist(),
+            "crossings": _crossings(surface, axes),
+            "points": int(surface.size),
+        }
+
+
+def _axis_values(axis, base, feature_names: list) -> np.ndarray:
+    """Validated values of one swept feature."""
+    spec = numeric_field_specs().get(axis.feature)
+    if spec is None or axis.feature not in feature_names:
+        raise ValueError(f"'{axis.feature}' is not a numeric model feature")
+
+    if axis.values is not None:
+        values = np.array(axis.values, dtype=float)
+    else:
+        values = np.linspace(axis.start, axis.stop, axis.steps)
+        if spec["integer"]:
+            # A range over an integer field takes each whole number once
+            values = np.unique(np.round(values))
+    if axis.relative:
+        values = values + getattr(base, axis.feature)
+
+    bad = ~within_field_bounds(values, spec)
+    if bad.any():
+        raise ValueError(f"Swept value {values[bad][0]:g} is not allowed for '{axis.feature}'")
+    return values
+
+
+def _crossings(surface: np.ndarray, axes: list) -> list:
+    """Risk-level bound crossings between neighbouring points, per axis and bound."""
+    levels = ["low"] + [level for _, level in RISK_BANDS]
+    crossings = []
+    for axis, (feature, values) in enumerate(axes):
+        before = np.moveaxis(surface, axis, -1)[..., :-1]
+        after = np.moveaxis(surface, axis, -1)[..., 1:]
+        other = [(name, other_values) for i, (name, other_values) in enumerate(axes) if i != axis]
+
+        for band, (bound, _) in enumerate(RISK_BANDS):
+            below, above = levels[band], levels[band + 1]
+            crossed = (before < bound) != (after < bound)
+            for *at, step in zip(*np.nonzero(crossed)):
+                p0, p1 = before[(*at, step)], after[(*at, step)]
+                v0, v1 = values[step], values[step + 1]
+                crossing = {
+                    "feature": feature,
+                    "bound": bound,
+                    "from": below if p0 < bound else above,
+                    "to": above if p0 < bound else below,
+                    "between": [float(v0), float(v1)],
+                    "value": round(float(v0 + (bound - p0) / (p1 - p0) * (v1 - v0)), 4),
+                }
+                if other:
+                    crossing["at"] = {name: float(other_values[i]) for (name, other_values), i in zip(other, at)}
+                crossings.append(crossing)
+    return crossings
@@ -9,3 +9,95 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/zyra_erp")
 MODEL_PATH = os.getenv("MODEL_PATH", "app/models/failure_model.pkl")
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+# "compiled" serves predictions from flat NumPy arrays; "sklearn" uses the fitted estimator
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn").lower()
+
+# Prediction result cache (shared by /predict and /predict/batch)
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "10000"))
+PREDICTION_CACHE_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+# Round feature values to sensor precision before keying, so equal readings share an entry
+PREDICTION_CACHE_QUANTIZE = os.getenv("PREDICTION_CACHE_QUANTIZE", "true").lower() == "true"
+
+# Micro-batching of single /predict calls
+MICRO_BATCHING_ENABLED = os.getenv("MICRO_BATCHING_ENABLED", "true").lower() == "true"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+MICRO_BATCH_QUEUE_SIZE = int(os.getenv("MICRO_BATCH_QUEUE_SIZE", "1024"))
+MICRO_BATCH_WORKERS = int(os.getenv("MICRO_BATCH_WORKERS", "2"))
+
+# NDJSON streaming endpoint (POST /predict/stream)
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "256"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+STREAM_MAX_TRACKED_EQUIPMENT = int(os.getenv("STREAM_MAX_TRACKED_EQUIPMENT", "100000"))
+
+# Rolling-window feature store (per equipment_id)
+FEATURE_STORE_CAPACITY = int(os.getenv("FEATURE_STORE_CAPACITY", "50000"))
+FEATURE_STORE_WINDOW = int(os.getenv("FEATURE_STORE_WINDOW", "32"))
+FEATURE_STORE_EWMA_ALPHA = float(os.getenv("FEATURE_STORE_EWMA_ALPHA", "0.2"))
+# Also record /predict readings in the store when the model does not use trend features
+FEATURE_STORE_INGEST_ON_PREDICT = os.getenv("FEATURE_STORE_INGEST_ON_PREDICT", "false").lower() == "true"
+
+# Input drift monitoring against the training distribution
+DRIFT_MONITOR_ENABLED = os.getenv("DRIFT_MONITOR_ENABLED", "true").lower() == "true"
+DRIFT_BUCKET_SIZE = int(os.getenv("DRIFT_BUCKET_SIZE", "500"))
+DRIFT_BUCKETS = int(os.getenv("DRIFT_BUCKETS", "12"))
+
+# Memory-map forest / explainer arrays (artifacts/shared/) so uvicorn workers share pages
+MMAP_ARTIFACTS = os.getenv("MMAP_ARTIFACTS", "true").lower() == "true"
+
+# Versioned model registry (POST /models/{version}/activate)
+MODEL_DRAIN_SECONDS = float(os.getenv("MODEL_DRAIN_SECONDS", "30"))
+MODEL_WARMUP_ROWS = int(os.getenv("MODEL_WARMUP_ROWS", "64"))
+# Admin endpoints (activate, train, cancel) require a matching X-Admin-Token header; unset, they answer 403
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Target for process start → accepting traffic; exceeding it is logged and reported by GET /startup
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3"))
+
+# Rows per chunk for out-of-core training (python -m app.ml.training_pipeline --chunked)
+TRAINING_CHUNK_SIZE = int(os.getenv("TRAINING_CHUNK_SIZE", "100000"))
+
+# Keep a typed, memory-mapped binary copy next to dataset CSVs (<csv>.cache/) to skip re-parsing
+DATASET_CACHE_ENABLED = os.getenv("DATASET_CACHE_ENABLED", "true").lower() == "true"
+
+# Per-stage latency histograms (GET /telemetry) and the Server-Timing response header
+STAGE_TIMING_ENABLED = os.getenv("STAGE_TIMING_ENABLED", "true").lower() == "true"
+
+# Fleet risk scan (POST /fleet/scan, python -m app.services.fleet_scan)
+FLEET_SCAN_CHUNK_SIZE = int(os.getenv("FLEET_SCAN_CHUNK_SIZE", "50000"))
+# Scoring processes; 0 = one per CPU core (1 scores in-process)
+FLEET_SCAN_WORKERS = int(os.getenv("FLEET_SCAN_WORKERS", "0"))
+FLEET_SCAN_TOP_K = int(os.getenv("FLEET_SCAN_TOP_K", "50"))
+FLEET_SCAN_MAX_TOP_K = int(os.getenv("FLEET_SCAN_MAX_TOP_K", "1000"))
+FLEET_SCAN_MAX_UPLOAD_MB = int(os.getenv("FLEET_SCAN_MAX_UPLOAD_MB", "2048"))
+
+# Post-training forest compression (python -m app.ml.training_pipeline --compress)
+COMPRESSION_MAX_AUC_LOSS = float(os.getenv("COMPRESSION_MAX_AUC_LOSS", "0.005"))
+# Serve rf_model_compact.pkl instead of rf_model.pkl where a compressed model was saved
+SERVE_COMPACT_MODEL = os.getenv("SERVE_COMPACT_MODEL", "false").lower() == "true"
+
+# Largest what-if grid (POST /predict/what-if) scored in one call
+WHAT_IF_MAX_POINTS = int(os.getenv("WHAT_IF_MAX_POINTS", "40000"))
+
+# Approximate SHAP (shap_mode=approximate): "saabas" path attribution or exact TreeSHAP over a tree subset
+SHAP_APPROX_METHOD = os.getenv("SHAP_APPROX_METHOD", "saabas").lower()
+SHAP_APPROX_TREES = int(os.getenv("SHAP_APPROX_TREES", "25"))
+# Warm-up rows explained both ways to measure the approximation error (0 = skip)
+SHAP_APPROX_VALIDATION_ROWS = int(os.getenv("SHAP_APPROX_VALIDATION_ROWS", "16"))
+
+# Per-equipment-type models (artifacts/types/<model_key>/): memory budget of the lazily loaded pool
+MODEL_POOL_MAX_MB = float(os.getenv("MODEL_POOL_MAX_MB", "512"))
+
+# Background training jobs (POST /models/train): cores for the forest fit and niceness of the training process
+TRAINING_JOB_CPUS = int(os.getenv("TRAINING_JOB_CPUS", "1"))
+TRAINING_JOB_NICE = int(os.getenv("TRAINING_JOB_NICE", "10"))
+# Finished jobs kept for GET /models/train
+TRAINING_JOB_HISTORY = int(os.getenv("TRAINING_JOB_HISTORY", "20"))
+# The only directory a training job's data_path may point into (relative paths resolve against it)
+TRAINING_JOB_DATA_DIR = os.getenv("TRAINING_JOB_DATA_DIR", "app/data")
+
+# Binary bulk scoring (POST /predict/binary): largest accepted request body
+BINARY_BATCH_MAX_MB = int(os.getenv("BINARY_BATCH_MAX_MB", "256"))
@@ -0,0 +1,221 @@
+"""
+Per-stage latency timing for the prediction path.
+
+Code wraps each stage in `stage_timer.stage(name)`:
+  - parse            body read, JSON decoding and pydantic validation (/predict)
+  - validation       per-item validation of /predict/batch payloads
+  - decode           binary / Arrow payload decoding and column-wise validation (/predict/binary)
+  - scale            scaler transform
+  - predict_proba    forest inference
+  - explainer_build  SHAP explainer construction (first use of a memory-mapped bundle)
+  - shap             SHAP values
+  - shap_approximate approximate SHAP values (shap_mode=approximate)
+  - recommendations  explanation and recommendation building
+  - serialize        response serialization
+
+Durations go into in-process histograms (rendered in Prometheus text format
+by GET /telemetry) and into the current request's timings, which
+StageTimingMiddleware returns in a `Server-Timing` header together with the
+total. Stages scored in a micro-batch are attributed to every request of the
+batch. STAGE_TIMING_ENABLED=false makes all of it a no-op.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+
+from app.utils.config import STAGE_TIMING_ENABLED
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_current = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics: le is inclusive)."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class RequestTimings:
+    """Stage durations of one HTTP request."""
+
+    __slots__ = ("start", "stages")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+
+class _Stage:
+    __slots__ = ("_timer", "_name", "_start")
+
+    def __init__(self, timer, name: str):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._timer.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class StageTimer:
+    """Aggregates stage and request durations into histograms."""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._requests = {}
+
+    def stage(self, name: str):
+        """Context manager timing one stage."""
+        return _Stage(self, name) if self.enabled else _NO_STAGE
+
+    def record(self, name: str, seconds: float):
+        """Record a stage duration measured by the caller."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = Histogram()
+            histogram.observe(seconds)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(name, seconds)
+
+    def mark(self, name: str):
+        """Record the time from the start of the current request until now as stage `name`."""
+        timings = _current.get()
+        if self.enabled and timings is not None:
+            self.record(name, time.perf_counter() - timings.start)
+
+    def current(self):
+        """Timings of the request being handled in this context, if any."""
+        return _current.get()
+
+    def collect(self, fn, *args):
+        """
+        Run `fn(*args)` with its own timings and return (result, {stage: seconds}).
+
+        Used for work done on behalf of several requests (a micro-batch) in a
+        thread that does not carry the callers' context.
+        """
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            return fn(*args), timings.stages
+        finally:
+            _current.reset(token)
+
+    def observe_request(self, route: str, seconds: float):
+        with self._lock:
+            histogram = self._requests.get(route)
+            if histogram is None:
+                histogram = self._requests[route] = Histogram()
+            histogram.observe(seconds)
+
+    def render_prometheus(self) -> str:
+        """Histograms in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            stages = {name: _snapshot(h) for name, h in self._stages.items()}
+            requests = {route: _snapshot(h) for route, h in self._requests.items()}
+        lines = []
+        _render_histogram(
+            lines, "zyra_stage_duration_seconds", "Time spent in each prediction stage", "stage", stages
+        )
+        _render_histogram(
+            lines, "zyra_http_request_duration_seconds", "HTTP request time until the response starts", "route", requests
+        )
+        return "\n".join(lines) + "\n"
+
+
+class StageTimingMiddleware:
+    """ASGI middleware: per-request timings, request histograms and the Server-Timing header."""
+
+    def __init__(self, app, timer: StageTimer):
+        self.app = app
+        self.timer = timer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.timer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - timings.start
+                route = scope.get("route")
+                self.timer.observe_request(getattr(route, "path", "unmatched"), total)
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing(total))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+
+def _snapshot(histogram: Histogram) -> tuple:
+    return list(histogram.counts), histogram.sum, histogram.count
+
+
+def _render_histogram(lines: list, metric: str, help_text: str, label: str, series: dict):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for key in sorted(series):
+        counts, total, count = series[key]
+        value = key.replace("\\", "\\\\").replace('"', '\\"')
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS, counts):
+            cumulative += bucket
+            lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {count}')
+        lines.append(f'{metric}_sum{{{label}="{value}"}} {total:.6f}')
+        lines.append(f'{metric}_count{{{label}="{value}"}} {count}')
+
+
+stage_timer = StageTimer(enabled=STAGE_TIMING_ENABLED)
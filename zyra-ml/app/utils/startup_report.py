@@ -0,0 +1,106 @@
+"""
+Startup timing, broken down by phase.
+
+Phases are recorded in the order they finish:
+  - interpreter    process start → first app import (Python start-up)
+  - imports        first app import → lifespan start (fastapi, routers, services)
+  - lifespan       lifespan start → accepting traffic (/health answers)
+  - training       only when no model existed at startup (runs in the background)
+  - model_load     artifacts loaded and the active bundle set
+  - warmup         shap import, explainer construction and one scored batch
+
+`accepting_traffic_s` is compared against STARTUP_BUDGET_SECONDS; when the
+process start time is available (Linux /proc), times are measured from it
+so interpreter start-up is included.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app.utils.config import STARTUP_BUDGET_SECONDS
+
+
+def _process_age() -> float:
+    """Seconds since this process started, or 0.0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupReport:
+    """Collects phase durations from process start until the model is ready."""
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        # perf_counter value corresponding to process start
+        age = _process_age()
+        self._origin = time.perf_counter() - age
+        self._mark = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases = {"interpreter": round(age, 3)} if age else {}
+        self.accepting_traffic_s = None
+        self.ready_s = None
+        self.state = "starting"
+        self.error = None
+
+    def lap(self, name: str):
+        """Close a phase that started where the previous one ended."""
+        now = time.perf_counter()
+        with self._lock:
+            self.phases[name] = round(now - self._mark, 3)
+            self._mark = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block (may run on a background thread)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = round(time.perf_counter() - start, 3)
+
+    def accepting_traffic(self):
+        self.lap("lifespan")
+        self.accepting_traffic_s = round(time.perf_counter() - self._origin, 3)
+        self.state = "loading"
+        within = self.accepting_traffic_s <= self.budget_seconds
+        print(
+            f"{'⏱️ ' if within else '⚠️ '} Accepting traffic {self.accepting_traffic_s:.2f}s after process start "
+            f"(budget {self.budget_seconds:.1f}s){'' if within else ' — over budget'}: {self.phases}"
+        )
+
+    def ready(self):
+        self.ready_s = round(time.perf_counter() - self._origin, 3)
+        self.state = "ready"
+        print(f"⏱️  Model ready {self.ready_s:.2f}s after process start: {self.phases}")
+
+    def failed(self, error: str):
+        self.state = "failed"
+        self.error = error
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = dict(self.phases)
+        return {
+            "state": self.state,
+            "phases_s": phases,
+            "accepting_traffic_s": self.accepting_traffic_s,
+            "ready_s": self.ready_s,
+            "budget_s": self.budget_seconds,
+            "within_budget": (
+                self.accepting_traffic_s <= self.budget_seconds if self.accepting_traffic_s is not None else None
+            ),
+            "error": self.error,
+        }
+
+
+startup_report = StartupReport(budget_seconds=STARTUP_BUDGET_SECONDS)
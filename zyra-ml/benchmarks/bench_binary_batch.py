@@ -0,0 +1,101 @@
+"""
+Binary bulk scoring (POST /predict/binary) against the JSON batch path.
+
+For each batch size, the same rows go through:
+- json_batch    POST /predict/batch with explain=none (JSON decoding, one
+                pydantic model per item, JSON response); sizes up to MAX_BATCH_SIZE
+- binary_f64    POST /predict/binary with a float64 matrix payload
+- binary_f32    the same with a float32 payload (half the bytes)
+
+plus the in-process parts of the binary path: decoding + validation alone,
+and score_binary end to end. Throughput is rows per second.
+
+    python -m benchmarks.bench_binary_batch
+"""
+
+import contextlib
+import io
+import json
+import os
+import time
+
+os.environ.setdefault("PREDICTION_CACHE_ENABLED", "false")
+
+import numpy as np  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.ml.training_pipeline import FEATURE_COLUMNS  # noqa: E402
+from app.schemas.request_schemas import numeric_field_specs, within_field_bounds  # noqa: E402
+from app.services.binary_scoring import MATRIX_MEDIA_TYPE, decode_matrix, encode_matrix, score_binary  # noqa: E402
+from app.utils.config import MAX_BATCH_SIZE  # noqa: E402
+from benchmarks.common import random_requests, request_matrix, time_calls  # noqa: E402
+
+SIZES = [64, 1000, 100_000]
+READY_TIMEOUT_SECONDS = 300
+
+
+def main():
+    from main import app
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        deadline = time.time() + READY_TIMEOUT_SECONDS
+        while client.get("/ready").status_code != 200:
+            if time.time() > deadline:
+                raise SystemExit("Service not ready — train the model first: python -m app.ml.training_pipeline")
+            time.sleep(0.2)
+
+        for size in SIZES:
+            items = [{**item, "explain": "none"} for item in random_requests(size, seed=size)]
+            X = request_matrix(items, FEATURE_COLUMNS)
+            ids = [item["equipment_id"] for item in items]
+            payload_f64, payload_f32 = encode_matrix(X, ids), encode_matrix(X.astype(np.float32), ids)
+            iterations = max(5, 20_000 // size)
+
+            section = {"payload_bytes": {"binary_f64": len(payload_f64), "binary_f32": len(payload_f32)}}
+            if size <= MAX_BATCH_SIZE:
+                body = json.dumps({"items": items})
+                section["payload_bytes"]["json_batch"] = len(body)
+                section["json_batch"] = time_calls(
+                    _post(client, "/predict/batch", body, "application/json"),
+                    iterations=iterations, warmup=2, items_per_call=size,
+                )
+            for name, payload in (("binary_f64", payload_f64), ("binary_f32", payload_f32)):
+                section[name] = time_calls(
+                    _post(client, "/predict/binary", payload, MATRIX_MEDIA_TYPE),
+                    iterations=iterations, warmup=2, items_per_call=size,
+                )
+            section["decode_validate_f32"] = time_calls(
+                lambda: _decode_and_validate(payload_f32), iterations=iterations, warmup=2, items_per_call=size
+            )
+            section["score_binary_f32"] = time_calls(
+                lambda: score_binary(payload_f32, MATRIX_MEDIA_TYPE), iterations=iterations, warmup=2, items_per_call=size
+            )
+            if "json_batch" in section:
+                section["binary_f32_speedup"] = round(
+                    section["binary_f32"]["throughput_per_s"] / section["json_batch"]["throughput_per_s"], 1
+                )
+            results[f"rows_{size}"] = section
+
+    print(json.dumps(results, indent=2))
+
+
+def _post(client, path: str, content, content_type: str):
+    def call():
+        response = client.post(path, content=content, headers={"Content-Type": content_type})
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+    return call
+
+
+def _decode_and_validate(payload: bytes):
+    X, _ = decode_matrix(payload, len(FEATURE_COLUMNS))
+    specs = numeric_field_specs()
+    valid = np.ones(X.shape[0], dtype=bool)
+    for j, name in enumerate(FEATURE_COLUMNS):
+        valid &= within_field_bounds(X[:, j], specs[name])
+    return valid
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Peak memory and metrics of in-memory vs chunked training.
+
+Generates a synthetic CSV of --rows rows (cached in the temp directory), then
+trains on it once per mode, each in a fresh process so peak RSS is measured
+per mode. Artifacts go to throwaway versions that are removed afterwards.
+
+    python -m benchmarks.bench_chunked_training [--rows 1000000] [--chunk-size 100000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["memory", "chunked"]
+
+
+def _run_mode(mode: str, data_path: str, chunk_size: int):
+    """Child process: train once and print peak RSS and metrics as JSON."""
+    from app.models.model_loader import version_dir
+
+    version = f"bench-{mode}"
+    start = time.perf_counter()
+    if mode == "chunked":
+        from app.ml.chunked_training import train_model_chunked
+
+        metrics = train_model_chunked(data_path=data_path, chunk_size=chunk_size, version=version)
+    else:
+        from app.ml.training_pipeline import train_model
+
+        metrics = train_model(data_path=data_path, version=version)
+    seconds = time.perf_counter() - start
+    shutil.rmtree(version_dir(version), ignore_errors=True)
+
+    print(json.dumps({
+        "seconds": round(seconds, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "accuracy": metrics["accuracy"],
+        "f1_score": metrics["f1_score"],
+        "roc_auc": metrics["roc_auc"],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--run-mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        _run_mode(args.run_mode, args.data, args.chunk_size)
+        return
+
+    data_path = os.path.join(tempfile.gettempdir(), f"zyra_bench_{args.rows}.csv")
+    if not os.path.exists(data_path):
+        from app.data.dataset_generator import generate_dataset
+
+        generate_dataset(n_samples=args.rows).to_csv(data_path, index=False)
+
+    report = {"rows": args.rows, "csv_mb": round(os.path.getsize(data_path) / 2**20, 1), "chunk_size": args.chunk_size}
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_chunked_training", "--run-mode", mode,
+             "--data", data_path, "--chunk-size", str(args.chunk_size)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        report[mode] = json.loads(out.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
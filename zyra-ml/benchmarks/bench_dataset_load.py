@@ -0,0 +1,63 @@
+"""
+Dataset load time vs row count: CSV parsing against the binary column cache.
+
+For every row count a synthetic CSV is generated in the temp directory, then
+timed three ways:
+
+- csv         pd.read_csv
+- cache_build first load through dataset_cache (parse + write the cache)
+- cache_load  later loads (memory-map the cached columns)
+
+    python -m benchmarks.bench_dataset_load [--rows 5000,50000,500000,2000000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from app.data.dataset_cache import cache_dir_for, load_dataset
+from benchmarks.common import time_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="5000,50000,500000,2000000", help="comma-separated row counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from app.data.dataset_generator import generate_dataset
+
+    report = []
+    for rows in (int(r) for r in args.rows.split(",")):
+        data_path = os.path.join(tempfile.gettempdir(), f"zyra_bench_{rows}.csv")
+        if not os.path.exists(data_path):
+            generate_dataset(n_samples=rows).to_csv(data_path, index=False)
+        cache_dir = cache_dir_for(data_path)
+
+        def build():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            load_dataset(data_path)
+
+        csv = time_calls(lambda: pd.read_csv(data_path), iterations=args.repeat, warmup=0)
+        cache_build = time_calls(build, iterations=max(1, args.repeat // 2), warmup=0)
+        cache_load = time_calls(lambda: load_dataset(data_path), iterations=args.repeat, warmup=1)
+        cache_mb = sum(entry.stat().st_size for entry in os.scandir(cache_dir)) / 2**20
+
+        report.append({
+            "rows": rows,
+            "csv_mb": round(os.path.getsize(data_path) / 2**20, 1),
+            "cache_mb": round(cache_mb, 1),
+            "csv_p50_ms": csv["p50_ms"],
+            "cache_build_p50_ms": cache_build["p50_ms"],
+            "cache_load_p50_ms": cache_load["p50_ms"],
+            "speedup": round(csv["p50_ms"] / cache_load["p50_ms"], 1),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
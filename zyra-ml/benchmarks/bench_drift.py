@@ -0,0 +1,48 @@
+"""
+Drift monitor overhead on the /predict hot path.
+
+Measures DriftMonitor.observe() for a single row and for a 256-row batch and
+compares it with predict_failure (probability only, cache disabled) so the
+relative overhead is visible.
+
+    python -m benchmarks.bench_drift
+"""
+
+import json
+import os
+
+os.environ.setdefault("PREDICTION_CACHE_ENABLED", "false")
+
+from app.models.model_loader import load_model, get_active_bundle  # noqa: E402
+from app.schemas.request_schemas import FailurePredictionRequest  # noqa: E402
+from app.services.drift_monitor import DriftMonitor  # noqa: E402
+from app.services.prediction_service import predict_failure, build_feature_matrix  # noqa: E402
+from benchmarks.common import EXAMPLE_REQUEST, random_requests, time_calls  # noqa: E402
+
+
+def main():
+    if not load_model():
+        raise SystemExit("Train the model first: python -m app.ml.training_pipeline")
+
+    monitor = DriftMonitor(bucket_size=500, n_buckets=12)
+    bundle = get_active_bundle()
+    feature_names = bundle.feature_names
+    request = FailurePredictionRequest(**EXAMPLE_REQUEST, explain="none")
+    row = build_feature_matrix(bundle, [request])
+    batch = build_feature_matrix(bundle, [FailurePredictionRequest(**r) for r in random_requests(256)])
+
+    results = {
+        "observe_1_row": time_calls(lambda: monitor.observe(row, feature_names), iterations=5000),
+        "observe_256_rows": time_calls(
+            lambda: monitor.observe(batch, feature_names), iterations=1000, items_per_call=256
+        ),
+        "predict_failure_explain_none": time_calls(lambda: predict_failure(request), iterations=500),
+    }
+    overhead = results["observe_1_row"]["p50_ms"] / results["predict_failure_explain_none"]["p50_ms"]
+    results["observe_overhead_pct_of_predict_p50"] = round(100 * overhead, 2)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
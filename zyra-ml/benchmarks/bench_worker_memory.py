@@ -0,0 +1,100 @@
+"""
+Per-worker memory and startup time with and without memory-mapped artifacts.
+
+Starts N worker processes (like `uvicorn main:app --workers N`) in each mode,
+loads the artifacts, scores one request with a full SHAP explanation, then
+reads RSS and PSS from /proc/self/smaps_rollup while all workers are alive.
+PSS splits shared pages between the processes mapping them, so it is the
+number that shows page-cache sharing; RSS counts shared pages in full.
+
+    python -m benchmarks.bench_worker_memory [--workers 4]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+
+def _memory_kb() -> dict:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Private_Dirty:"):
+                fields[parts[0].rstrip(":").lower()] = int(parts[1])
+    return fields
+
+
+def _worker(mmap_artifacts: bool, backend: str, barrier, results):
+    os.environ["MMAP_ARTIFACTS"] = "true" if mmap_artifacts else "false"
+    os.environ["INFERENCE_BACKEND"] = backend
+    os.environ["PREDICTION_CACHE_ENABLED"] = "false"
+
+    from app.models.model_loader import load_model
+    from app.schemas.request_schemas import FailurePredictionRequest
+    from app.services.prediction_service import predict_failure
+    from benchmarks.common import EXAMPLE_REQUEST
+
+    before = _memory_kb()
+    start = time.perf_counter()
+    load_model()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    predict_failure(FailurePredictionRequest(**EXAMPLE_REQUEST, explain="full"))
+    first_predict_ms = (time.perf_counter() - start) * 1000
+
+    # Measure only once every worker has mapped its artifacts
+    barrier.wait()
+    after = _memory_kb()
+    results.put({
+        "load_ms": load_ms,
+        "first_predict_ms": first_predict_ms,
+        "rss_mb": after["rss"] / 1024,
+        "pss_mb": after["pss"] / 1024,
+        "artifact_rss_mb": (after["rss"] - before["rss"]) / 1024,
+        "artifact_pss_mb": (after["pss"] - before["pss"]) / 1024,
+    })
+    barrier.wait()
+
+
+def run_mode(mmap_artifacts: bool, backend: str, workers: int) -> dict:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(mmap_artifacts, backend, barrier, results)) for _ in range(workers)]
+    for p in processes:
+        p.start()
+    samples = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    def mean(key):
+        return round(sum(s[key] for s in samples) / len(samples), 1)
+
+    return {key: mean(key) for key in samples[0]} | {"total_pss_mb": round(sum(s["pss_mb"] for s in samples), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backend", choices=["sklearn", "compiled"], default="compiled")
+    args = parser.parse_args()
+
+    # Make sure the shared export exists so the mmap workers measure a warm start
+    os.environ["MMAP_ARTIFACTS"] = "true"
+    from app.models.model_loader import load_model
+
+    if not load_model():
+        raise SystemExit("Train the model first: python -m app.ml.training_pipeline")
+
+    report = {"workers": args.workers, "backend": args.backend}
+    report["eager"] = run_mode(False, args.backend, args.workers)
+    report["mmap"] = run_mode(True, args.backend, args.workers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
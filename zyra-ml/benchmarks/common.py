@@ -0,0 +1,66 @@
+"""Shared timing helpers for the benchmark scripts (run from zyra-ml/: python -m benchmarks.<name>)."""
+
+import time
+
+import numpy as np
+
+EXAMPLE_REQUEST = {
+    "equipment_id": "EQUIP-001",
+    "operating_hours": 8500,
+    "temperature": 92.5,
+    "vibration": 4.8,
+    "pressure": 165.0,
+    "age_months": 48,
+    "maintenance_count": 3,
+    "load_percentage": 88.0,
+    "rpm": 3200,
+    "humidity": 72.0,
+    "power_consumption": 1450.0,
+}
+
+
+def time_calls(fn, iterations: int = 1000, warmup: int = 50, items_per_call: int = 1) -> dict:
+    """Call `fn` repeatedly and return latency percentiles (ms) and throughput (items/s)."""
+    for _ in range(warmup):
+        fn()
+
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+
+    return {
+        "iterations": iterations,
+        "mean_ms": round(float(samples.mean()) * 1e3, 4),
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1e3, 4),
+        "p95_ms": round(float(np.percentile(samples, 95)) * 1e3, 4),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1e3, 4),
+        "throughput_per_s": round(items_per_call * iterations / float(samples.sum()), 1),
+    }
+
+
+def random_requests(n: int, seed: int = 0) -> list:
+    """Plausible FailurePredictionRequest payloads spread over the training ranges."""
+    rng = np.random.RandomState(seed)
+    return [
+        {
+            "equipment_id": f"EQUIP-{i:05d}",
+            "operating_hours": round(float(rng.uniform(0, 12000)), 1),
+            "temperature": round(float(rng.uniform(40, 120)), 1),
+            "vibration": round(float(rng.uniform(0, 8)), 2),
+            "pressure": round(float(rng.uniform(50, 200)), 1),
+            "age_months": int(rng.randint(1, 121)),
+            "maintenance_count": int(rng.randint(0, 21)),
+            "load_percentage": round(float(rng.uniform(10, 100)), 1),
+            "rpm": round(float(rng.uniform(500, 5000)), 1),
+            "humidity": round(float(rng.uniform(20, 95)), 1),
+            "power_consumption": round(float(rng.uniform(100, 2000)), 1),
+        }
+        for i in range(n)
+    ]
+
+
+def request_matrix(requests: list, feature_names: list) -> np.ndarray:
+    """(n_requests, n_features) float matrix of request payloads, columns in `feature_names` order."""
+    return np.array([[request[name] for name in feature_names] for request in requests], dtype=float)
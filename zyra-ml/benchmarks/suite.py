@@ -0,0 +1,344 @@
+"""
+Benchmark suite for the service hot paths, with JSON output and a regression check.
+
+Sections (everything runs in-process, no network):
+- predict     predict_failure with explain=none / top_k / full
+- batch       predict_failure_batch (probability only) at several batch sizes
+- shap        the SHAP explanation alone (exact and approximate), for one row and a 64-row batch
+- http        POST /predict, /predict/batch (JSON and compact) and /predict/binary round trips through FastAPI's TestClient
+- training    train_model time against dataset size (into a throwaway version)
+- cold_start  fresh processes: process start → accepting traffic → /ready
+
+Latency sections report mean/p50/p95/p99 (ms) and throughput; the prediction
+cache is disabled so repeated requests measure real work. Requests are drawn
+from a fixed seed, so two runs on the same machine see the same inputs.
+
+    python -m benchmarks.suite [--quick] [--sections predict,http] [--out results.json]
+    python -m benchmarks.suite --save-baseline              # store as benchmarks/baseline.json
+    python -m benchmarks.suite --compare [--tolerance 0.15] # run, then flag regressions (exit 1)
+    python -m benchmarks.suite --compare --input results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("PREDICTION_CACHE_ENABLED", "false")
+
+from benchmarks.common import EXAMPLE_REQUEST, random_requests, request_matrix, time_calls  # noqa: E402
+
+SECTIONS = ["predict", "batch", "shap", "http", "training", "cold_start"]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+BATCH_SIZES = [1, 16, 64, 256]
+TRAINING_ROWS = [5_000, 20_000, 50_000]
+QUICK_TRAINING_ROWS = [2_000, 5_000]
+COLD_START_RUNS = 3
+READY_TIMEOUT_SECONDS = 300
+
+# Metric names compared against the baseline: lower is better, except throughput
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "seconds", "accepting_traffic_s", "ready_s")
+HIGHER_IS_BETTER = ("throughput_per_s",)
+
+
+def run_suite(sections: list, quick: bool = False) -> dict:
+    from app.models.model_loader import load_model
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded = load_model()
+    if not loaded and set(sections) & {"predict", "batch", "shap"}:
+        raise SystemExit("Train the model first: python -m app.ml.training_pipeline")
+
+    scale = 0.2 if quick else 1.0
+    results = {"meta": _environment()}
+    for section in sections:
+        print(f"⏱️  {section}", file=sys.stderr)
+        results[section] = SECTION_RUNNERS[section](scale, quick)
+    return results
+
+
+def bench_predict(scale: float, quick: bool) -> dict:
+    from app.schemas.request_schemas import FailurePredictionRequest
+    from app.services.prediction_service import predict_failure
+
+    results = {}
+    for explain, iterations in (("none", 500), ("top_k", 200), ("full", 200)):
+        request = FailurePredictionRequest(**EXAMPLE_REQUEST, explain=explain)
+        results[f"explain_{explain}"] = time_calls(
+            lambda: predict_failure(request), iterations=_n(iterations, scale), warmup=10
+        )
+    return results
+
+
+def bench_batch(scale: float, quick: bool) -> dict:
+    from app.services.prediction_service import predict_failure_batch
+
+    results = {}
+    for size in BATCH_SIZES:
+        items = [{**item, "explain": "none"} for item in random_requests(size, seed=size)]
+        results[f"size_{size}"] = time_calls(
+            lambda: predict_failure_batch(items),
+            iterations=_n(max(10, 2000 // size), scale),
+            warmup=3,
+            items_per_call=size,
+        )
+    return results
+
+
+def bench_shap(scale: float, quick: bool) -> dict:
+    from app.models.approximate_shap import approximate_shap_values
+    from app.models.model_loader import get_active_bundle
+    from app.schemas.request_schemas import FailurePredictionRequest
+    from app.services.prediction_service import build_feature_matrix
+
+    bundle = get_active_bundle()
+    explainer = bundle.get_explainer()
+    requests = [FailurePredictionRequest(**r) for r in random_requests(64)]
+    X_scaled, _ = bundle.score(build_feature_matrix(bundle, requests))
+    return {
+        "rows_1": time_calls(lambda: explainer.shap_values(X_scaled[:1]), iterations=_n(200, scale), warmup=5),
+        "rows_64": time_calls(
+            lambda: explainer.shap_values(X_scaled), iterations=_n(20, scale), warmup=1, items_per_call=64
+        ),
+        "approximate_rows_1": time_calls(
+            lambda: approximate_shap_values(explainer, X_scaled[:1]), iterations=_n(500, scale), warmup=5
+        ),
+        "approximate_rows_64": time_calls(
+            lambda: approximate_shap_values(explainer, X_scaled), iterations=_n(100, scale), warmup=2, items_per_call=64
+        ),
+    }
+
+
+def bench_http(scale: float, quick: bool) -> dict:
+    from fastapi.testclient import TestClient
+
+    from app.ml.training_pipeline import FEATURE_COLUMNS
+    from app.services.binary_scoring import MATRIX_MEDIA_TYPE, encode_matrix
+    from main import app
+
+    single = {**EXAMPLE_REQUEST, "explain": "none"}
+    explained = {**EXAMPLE_REQUEST, "explain": "full"}
+    batch = {"items": [{**item, "explain": "none"} for item in random_requests(64)]}
+    matrix = encode_matrix(
+        request_matrix(batch["items"], FEATURE_COLUMNS),
+        [item["equipment_id"] for item in batch["items"]],
+    )
+
+    def post(client, path, payload):
+        def call():
+            response = client.post(path, json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+        return call
+
+    def post_binary(client):
+        def call():
+            response = client.post("/predict/binary", content=matrix, headers={"Content-Type": MATRIX_MEDIA_TYPE})
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict/binary returned {response.status_code}: {response.text[:200]}")
+        return call
+
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        _wait_ready(client)
+        return {
+            "predict_explain_none": time_calls(post(client, "/predict", single), iterations=_n(300, scale), warmup=10),
+            "predict_explain_full": time_calls(post(client, "/predict", explained), iterations=_n(200, scale), warmup=5),
+            "predict_batch_64": time_calls(
+                post(client, "/predict/batch", batch), iterations=_n(50, scale), warmup=2, items_per_call=64
+            ),
+            "predict_batch_64_compact": time_calls(
+                post(client, "/predict/batch?format=compact", batch), iterations=_n(50, scale), warmup=2, items_per_call=64
+            ),
+            "predict_binary_64": time_calls(post_binary(client), iterations=_n(200, scale), warmup=5, items_per_call=64),
+        }
+
+
+def bench_training(scale: float, quick: bool) -> dict:
+    from app.data.dataset_generator import generate_dataset
+    from app.ml.training_pipeline import train_model
+    from app.models.model_loader import version_dir
+
+    version = "bench-suite"
+    results = {}
+    try:
+        for rows in QUICK_TRAINING_ROWS if quick else TRAINING_ROWS:
+            data_path = os.path.join(tempfile.gettempdir(), f"zyra_bench_{rows}.csv")
+            if not os.path.exists(data_path):
+                generate_dataset(n_samples=rows).to_csv(data_path, index=False)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                metrics = train_model(data_path=data_path, version=version)
+                seconds = time.perf_counter() - start
+            results[f"rows_{rows}"] = {
+                "seconds": round(seconds, 3),
+                "throughput_per_s": round(rows / seconds, 1),
+                "roc_auc": metrics["roc_auc"],
+            }
+    finally:
+        shutil.rmtree(version_dir(version), ignore_errors=True)
+    return results
+
+
+def bench_cold_start(scale: float, quick: bool) -> dict:
+    runs = []
+    for _ in range(1 if quick else COLD_START_RUNS):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--cold-start-child"],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    # Median run by time to ready
+    runs.sort(key=lambda run: run["ready_s"])
+    return runs[len(runs) // 2]
+
+
+def _cold_start_child():
+    """Child process: start the app, wait for /ready and print the startup report as JSON."""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        _wait_ready(client)
+        report = client.get("/startup").json()["startup"]
+    print(json.dumps({
+        "accepting_traffic_s": report["accepting_traffic_s"],
+        "ready_s": report["ready_s"],
+        "phases_s": report["phases_s"],
+    }))
+
+
+SECTION_RUNNERS = {
+    "predict": bench_predict,
+    "batch": bench_batch,
+    "shap": bench_shap,
+    "http": bench_http,
+    "training": bench_training,
+    "cold_start": bench_cold_start,
+}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics that got worse than the baseline by more than `tolerance` (a fraction)."""
+    baseline_metrics = dict(_flatten(baseline))
+    regressions = []
+    for path, value in _flatten(current):
+        name = path.rsplit(".", 1)[-1]
+        before = baseline_metrics.get(path)
+        if path.startswith("meta.") or not before or not isinstance(value, (int, float)):
+            continue
+        change = (value - before) / before
+        if (name in LOWER_IS_BETTER and change > tolerance) or (name in HIGHER_IS_BETTER and -change > tolerance):
+            regressions.append({"metric": path, "baseline": before, "current": value, "change_pct": round(100 * change, 1)})
+    return regressions
+
+
+def _flatten(results: dict, prefix: str = ""):
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{path}.")
+        else:
+            yield path, value
+
+
+def _wait_ready(client):
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while client.get("/ready").status_code != 200:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Service not ready after {READY_TIMEOUT_SECONDS}s: {client.get('/startup').json()}")
+        time.sleep(0.02)
+
+
+def _environment() -> dict:
+    import numpy
+    import sklearn
+
+    from app.models.model_loader import get_model_version
+    from app.utils.config import INFERENCE_BACKEND, MMAP_ARTIFACTS
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "scikit_learn": sklearn.__version__,
+        "cpu_count": os.cpu_count(),
+        "inference_backend": INFERENCE_BACKEND,
+        "mmap_artifacts": MMAP_ARTIFACTS,
+        "model_version": get_model_version(),
+    }
+
+
+def _n(iterations: int, scale: float) -> int:
+    return max(5, int(iterations * scale))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sections", default=",".join(SECTIONS), help=f"comma-separated subset of {','.join(SECTIONS)}")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations and smaller training sets")
+    parser.add_argument("--out", help="write the results JSON here (default: stdout)")
+    parser.add_argument("--input", help="compare an existing results JSON instead of running the suite")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="flag regressions against the baseline (exit 1)")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown as a fraction (default 0.15)")
+    parser.add_argument("--cold-start-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_child:
+        _cold_start_child()
+        return
+
+    if args.input:
+        with open(args.input, "r") as f:
+            results = json.load(f)
+    else:
+        sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+        unknown = set(sections) - set(SECTIONS)
+        if unknown:
+            parser.error(f"unknown sections: {sorted(unknown)}")
+        results = run_suite(sections, quick=args.quick)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+    elif not args.input:
+        print(output)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(output)
+        print(f"💾 Baseline saved to {args.baseline}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(
+                f"❌ {r['metric']}: {r['baseline']} → {r['current']} ({r['change_pct']:+.1f}%)",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
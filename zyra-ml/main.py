@@ -6,34 +6,69 @@ Features:
   - SHAP-based per-prediction explainability
   - Health score computation: 100 - (failure_probability × 100)
   - Model evaluation metrics (Accuracy, F1, ROC AUC)
+  - Versioned model artifacts with zero-downtime activation
 
 Startup lifecycle:
-  1. Train model if no artifacts exist
-  2. Load model, scaler, metrics into memory
+  1. Start the micro-batching worker and accept traffic (GET /health answers)
+  2. In the background: train a model if no artifacts exist, load the active
+     model version, warm it up — GET /ready answers 503 until this finishes
   3. Serve predictions via POST /predict
+  4. GET /startup reports the time spent in each startup phase
+
+Every response carries a Server-Timing header with its per-stage latency;
+GET /telemetry exposes the aggregated histograms (STAGE_TIMING_ENABLED).
 """
 
+from app.utils.startup_report import startup_report
+
+import os
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.routers import predict, health
+from app.routers import predict, health, features, drift, models, telemetry, fleet
+from app.services.prediction_batcher import prediction_batcher
+from app.services.training_jobs import training_jobs
+from app.utils.stage_timing import StageTimingMiddleware, stage_timer
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Startup: train model if needed, then load artifacts."""
-    import os
-    from app.ml.training_pipeline import train_model, MODEL_PATH
-    from app.models.model_loader import load_model
+def _prepare_model():
+    """Train if needed, load and warm up the model — off the startup critical path."""
+    from app.models.model_loader import MODEL_PATH, load_model, read_active_version, get_active_bundle
+    from app.services.model_registry import model_registry
+
+    try:
+        if not os.path.exists(MODEL_PATH) and read_active_version() is None:
+            print("🔄 No trained model found — running training pipeline in the background...")
+            # Imported here: pandas and the sklearn training stack are only needed to train
+            from app.ml.training_pipeline import train_model
 
-    if not os.path.exists(MODEL_PATH):
-        print("🔄 No trained model found — running training pipeline...")
-        train_model()
+            with startup_report.phase("training"):
+                train_model()
 
-    load_model()
-    print("🚀 Zyra ML Service ready")
+        with startup_report.phase("model_load"):
+            if not load_model():
+                raise RuntimeError("No trained model available")
+        with startup_report.phase("warmup"):
+            model_registry.warm_up(get_active_bundle())
+        startup_report.ready()
+        print("🚀 Zyra ML Service ready")
+    except Exception as e:
+        startup_report.failed(str(e))
+        print(f"❌ Model preparation failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup: accept traffic immediately, prepare the model in the background."""
+    startup_report.lap("imports")
+    await prediction_batcher.start()
+    threading.Thread(target=_prepare_model, daemon=True, name="prepare-model").start()
+    startup_report.accepting_traffic()
     yield
+    await prediction_batcher.stop()
+    training_jobs.shutdown()
     print("👋 Zyra ML Service shutting down")
 
 
@@ -51,8 +86,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Per-stage latency: Server-Timing header and GET /telemetry histograms
+app.add_middleware(StageTimingMiddleware, timer=stage_timer)
+
 # Routes
 app.include_router(health.router, tags=["Health"])
 app.include_router(predict.router, tags=["Prediction"])
+app.include_router(features.router, tags=["Features"])
+app.include_router(drift.router, tags=["Monitoring"])
+app.include_router(models.router, tags=["Models"])
+app.include_router(telemetry.router, tags=["Monitoring"])
+app.include_router(fleet.router, tags=["Fleet"])
@@ -19,5 +19,7 @@ module.exports = {
   JWT_EXPIRES_IN: process.env.JWT_EXPIRES_IN || "7d",
   GEMINI_API_KEY: process.env.GEMINI_API_KEY || "",
   ML_SERVICE_URL: process.env.ML_SERVICE_URL || "http://localhost:8000",
+  // Largest /predict/batch request; keep at or below the ML service's MAX_BATCH_SIZE
+  ML_MAX_BATCH_SIZE: parseInt(process.env.ML_MAX_BATCH_SIZE, 10) || 1000,
   CLIENT_URL: process.env.CLIENT_URL || "http://localhost:5173",
 };
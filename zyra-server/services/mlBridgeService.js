@@ -6,7 +6,7 @@
  */
 
 const axios = require("axios");
-const { ML_SERVICE_URL } = require("../config/env");
+const { ML_SERVICE_URL, ML_MAX_BATCH_SIZE } = require("../config/env");
 const logger = require("../utils/logger");
 
 const mlClient = axios.create({
@@ -40,6 +40,48 @@ exports.predictFailure = async (features) => {
   }
 };
 
+/**
+ * Predict failure for many machines, ML_MAX_BATCH_SIZE items per round trip.
+ * Results come back in input order, each with either a prediction or an error;
+ * the chunk responses are merged into one, indexed against `items`.
+ * @param {Object[]} items - Feature vectors, one per machine
+ */
+exports.predictFailureBatch = async (items) => {
+  const merged = { success: true, count: 0, failed: 0, results: [] };
+  for (let start = 0; start < items.length; start += ML_MAX_BATCH_SIZE) {
+    const batch = await postBatch(items.slice(start, start + ML_MAX_BATCH_SIZE));
+    merged.success = merged.success && batch.success;
+    merged.count += batch.count;
+    merged.failed += batch.failed;
+    for (const result of batch.results) {
+      merged.results.push({ ...result, index: result.index + start });
+    }
+  }
+  return merged;
+};
+
+async function postBatch(items) {
+  try {
+    const response = await mlClient.post("/predict/batch", { items });
+    return response.data;
+  } catch (error) {
+    logger.error("ML batch prediction failed", {
+      error: error.message,
+      status: error.response?.status,
+      count: items.length,
+    });
+
+    if (error.code === "ECONNREFUSED") {
+      throw Object.assign(new Error("ML service is unavailable"), { statusCode: 503 });
+    }
+
+    throw Object.assign(
+      new Error(error.response?.data?.detail || "ML batch prediction failed"),
+      { statusCode: error.response?.status || 500 }
+    );
+  }
+}
+
 /**
  * Check if the ML service is healthy.
  */
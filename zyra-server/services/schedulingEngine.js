@@ -300,30 +300,49 @@ exports.optimize = async (input) => {
 async function enrichMachineRisk(machines, fetchMlRisk) {
   if (!fetchMlRisk) return machines;
 
-  const enriched = [];
-  for (const machine of machines) {
-    if (machine.sensor_data) {
-      try {
-        const prediction = await mlBridgeService.predictFailure({
-          equipment_id: machine.id,
-          ...machine.sensor_data,
-        });
-        enriched.push({
-          ...machine,
-          failure_probability: prediction.failure_probability,
-          health_score: prediction.health_score,
-          risk_level: prediction.risk_level,
-        });
-        continue;
-      } catch (err) {
-        logger.warn(`ML prediction failed for machine ${machine.id}, using provided value`, {
-          error: err.message,
-        });
-      }
-    }
-    enriched.push(machine);
+  // Batched ML calls (ML_MAX_BATCH_SIZE machines each) for every machine that reports sensor data
+  const withSensors = machines.filter((machine) => machine.sensor_data);
+  if (withSensors.length === 0) return machines;
+
+  let results;
+  try {
+    const batch = await mlBridgeService.predictFailureBatch(
+      withSensors.map((machine) => ({
+        equipment_id: machine.id,
+        ...machine.sensor_data,
+        explain: "none", // only the probability is used here
+      }))
+    );
+    results = batch.results;
+  } catch (err) {
+    logger.warn("ML batch prediction failed, using provided values", {
+      error: err.message,
+    });
+    return machines;
   }
-  return enriched;
+
+  const predictions = new Map();
+  withSensors.forEach((machine, i) => {
+    const result = results[i];
+    if (result && result.success) {
+      predictions.set(machine, result.prediction);
+    } else {
+      logger.warn(`ML prediction failed for machine ${machine.id}, using provided value`, {
+        error: result ? result.error : "missing result",
+      });
+    }
+  });
+
+  return machines.map((machine) => {
+    const prediction = predictions.get(machine);
+    if (!prediction) return machine;
+    return {
+      ...machine,
+      failure_probability: prediction.failure_probability,
+      health_score: prediction.health_score,
+      risk_level: prediction.risk_level,
+    };
+  });
 }
 
 function round(value, decimals) {